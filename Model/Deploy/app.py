@@ -1,17 +1,39 @@
+import time
+IMPORT_STARTED = time.perf_counter()
+
 import os
-import re
+import asyncio
 import math
-import joblib
+import hashlib
+import hmac
+import json
+import signal
+from collections import OrderedDict
+from concurrent.futures import BrokenExecutor, ProcessPoolExecutor, ThreadPoolExecutor
 import numpy as np
-import pandas as pd
-from urllib.parse import urlparse
-from scipy.sparse import hstack, csr_matrix
-from fastapi import FastAPI, HTTPException
-from fastapi.responses import HTMLResponse
+from fastapi import FastAPI, HTTPException, Header, Request, Depends
+from fastapi.responses import HTMLResponse, PlainTextResponse, JSONResponse, StreamingResponse, Response
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
-import uvicorn
-import tldextract
+from typing import List, Optional, Union
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except Exception:
+    ORJSON_AVAILABLE = False
+
+# Shared modules from Model/ (one tokenizer for serving and training). The Docker image copies them
+# next to app.py; for local runs start_server.py puts Model/ on PYTHONPATH (or: PYTHONPATH=.. uvicorn app:app)
+from text_scanner import URL_SHORTENERS, SUSPICIOUS_TLDS, scan_message, extract_all_urls, url_host, calculate_domain_entropy, is_ip_address, has_suspicious_pattern
+import public_suffix
+from keyword_automaton import GENERALIZED_KEYWORDS
+from domain_cache import memoize_hosts, cache_stats
+from linear_bundle import BUNDLE_DIR, BUNDLE_ARRAYS, LinearScorer, fold_scaler, scaler_moments
+from latency_metrics import MetricsRegistry, LATENCY_BUCKETS, SIZE_BUCKETS, COUNT_BUCKETS
+# joblib/sklearn, scipy and pandas are imported where they are used: they dominate import time,
+# and the bundle format needs none of them
+IMPORT_SECONDS = time.perf_counter() - IMPORT_STARTED
 
 # --- Configuration ---
 app = FastAPI(
@@ -28,19 +50,65 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# --- Constants ---
-URL_SHORTENERS = {
-    'bit.ly', 'tinyurl.com', 'goo.gl', 'ow.ly', 't.co', 'is.gd', 'buff.ly',
-    'adf.ly', 'bit.do', 'mcaf.ee', 'su.pr', 'tiny.cc', 'tr.im', 'cli.gs',
-    'x.co', 'shorturl.at', 'cutt.ly', 'rb.gy', 'short.io', 'tiny.one',
-    'qrco.de', 'q-r.to', 'clk.sh', 's.id', 'rebrand.ly', 'bl.ink'
-}
+MAX_BATCH_SIZE = int(os.environ.get("MAX_BATCH_SIZE", "1000"))
 
-SUSPICIOUS_TLDS = {
-    'xyz', 'top', 'club', 'work', 'click', 'link', 'online', 'site',
-    'website', 'space', 'tech', 'store', 'business', 'tk', 'ml', 'ga',
-    'cf', 'gq', 'pw', 'cc', 'info', 'ws', 'su', 'icu', 'bid', 'loan'
-}
+# /predict-scam/stream: messages scored per internal batch, and the longest accepted input line
+STREAM_BATCH_SIZE = int(os.environ.get("STREAM_BATCH_SIZE", "256"))
+STREAM_MAX_LINE_BYTES = int(os.environ.get("STREAM_MAX_LINE_BYTES", str(1 << 20)))
+
+# Scam probability above which a message is labelled "scam" (0.5 matches model.predict)
+DECISION_THRESHOLD = float(os.environ.get("SCAM_DECISION_THRESHOLD", "0.5"))
+if not 0.0 < DECISION_THRESHOLD < 1.0:
+    raise ValueError(f"SCAM_DECISION_THRESHOLD must be between 0 and 1, got {DECISION_THRESHOLD}")
+
+# Opt-in request coalescing for /predict-scam (see MicroBatcher)
+ENABLE_MICRO_BATCHING = os.environ.get("ENABLE_MICRO_BATCHING", "0") == "1"
+MICRO_BATCH_MAX_SIZE = int(os.environ.get("MICRO_BATCH_MAX_SIZE", "64"))
+MICRO_BATCH_MAX_WAIT_MS = float(os.environ.get("MICRO_BATCH_MAX_WAIT_MS", "2"))
+MICRO_BATCH_QUEUE_SIZE = int(os.environ.get("MICRO_BATCH_QUEUE_SIZE", "10000"))
+
+# Where inference runs: "inline" (on the event loop), "thread" or "process" (worker pool)
+INFERENCE_MODE = os.environ.get("INFERENCE_MODE", "inline").lower()
+INFERENCE_WORKERS = int(os.environ.get("INFERENCE_WORKERS", str(os.cpu_count() or 1)))
+if INFERENCE_MODE not in ("inline", "thread", "process"):
+    raise ValueError(f"Unknown INFERENCE_MODE={INFERENCE_MODE!r}, expected inline, thread or process")
+
+# In-process LRU cache of prediction results (size 0 disables, TTL 0 never expires)
+RESULT_CACHE_SIZE = int(os.environ.get("RESULT_CACHE_SIZE", "10000"))
+RESULT_CACHE_TTL_SECONDS = float(os.environ.get("RESULT_CACHE_TTL_SECONDS", "3600"))
+# "raw" keys on the exact text; "normalized" keys on preprocess() output plus the URL set
+RESULT_CACHE_KEY = os.environ.get("RESULT_CACHE_KEY", "raw").lower()
+if RESULT_CACHE_KEY not in ("raw", "normalized"):
+    raise ValueError(f"Unknown RESULT_CACHE_KEY={RESULT_CACHE_KEY!r}, expected raw or normalized")
+
+# Text vectorizer artifacts: "vocabulary" (trained TfidfVectorizer) or "hashed" (hashed_vectorizer.py export)
+TEXT_VECTORIZER = os.environ.get("TEXT_VECTORIZER", "vocabulary").lower()
+if TEXT_VECTORIZER not in ("vocabulary", "hashed"):
+    raise ValueError(f"Unknown TEXT_VECTORIZER={TEXT_VECTORIZER!r}, expected vocabulary or hashed")
+
+# Model artifacts: "joblib" (sklearn objects) or "bundle" (linear_bundle.py export scored without sklearn/SciPy)
+MODEL_FORMAT = os.environ.get("MODEL_FORMAT", "joblib").lower()
+if MODEL_FORMAT not in ("joblib", "bundle"):
+    raise ValueError(f"Unknown MODEL_FORMAT={MODEL_FORMAT!r}, expected joblib or bundle")
+
+# Per-stage latency, message size and URL count histograms served on /metrics
+ENABLE_METRICS = os.environ.get("ENABLE_METRICS", "1") == "1"
+
+# "eager" loads artifacts at import and warms up before the server accepts requests;
+# "background" binds the port first, then loads and warms up in a background task (see /readyz)
+ARTIFACT_LOADING = os.environ.get("ARTIFACT_LOADING", "eager").lower()
+if ARTIFACT_LOADING not in ("eager", "background"):
+    raise ValueError(f"Unknown ARTIFACT_LOADING={ARTIFACT_LOADING!r}, expected eager or background")
+
+# Hot reload of retrained artifacts (see ModelReloader): seconds between checks of the artifact
+# files (0 disables the watcher); SIGHUP and POST /admin/reload (only when RELOAD_TOKEN is set) also reload
+MODEL_RELOAD_POLL_SECONDS = float(os.environ.get("MODEL_RELOAD_POLL_SECONDS", "0"))
+RELOAD_TOKEN = os.environ.get("RELOAD_TOKEN", "")
+# Share of canary messages a new model must label like the active one (0 only checks the probabilities)
+RELOAD_MIN_AGREEMENT = float(os.environ.get("RELOAD_MIN_AGREEMENT", "0"))
+
+# Per-host memo of URL domain analysis (public suffix split, entropy, pattern flags); 0 disables
+DOMAIN_CACHE_SIZE = int(os.environ.get("DOMAIN_CACHE_SIZE", "4096"))
 
 # --- Data Models ---
 class TextRequest(BaseModel):
@@ -51,38 +119,38 @@ class ScamPredictionResponse(BaseModel):
     prediction: str
     confidence: float
     threat_indicators: dict
+    artifact_hash: str
+
+class CompactScamPredictionResponse(BaseModel):
+    prediction: str
+    scam_probability: float
+    artifact_hash: str
+    threat_mask: Optional[int] = None
+    threat_indicators: Optional[dict] = None
+
+class BatchTextRequest(BaseModel):
+    texts: List[str]
+
+class BatchScamPredictionResponse(BaseModel):
+    results: List[Union[ScamPredictionResponse, CompactScamPredictionResponse]]
 
 # --- Helper Functions ---
-def is_ip_address(domain):
-    if not domain: return False
-    return bool(re.match(r'^\d{1,3}\.\d{1,3}\.\d{1,3}\.\d{1,3}$', domain))
-
-def calculate_domain_entropy(domain):
-    if not domain or len(domain) < 3: return 0.0
-    freq = {}
-    for c in domain: freq[c] = freq.get(c, 0) + 1
-    entropy = 0.0
-    for cnt in freq.values():
-        p = cnt / len(domain)
-        entropy -= p * math.log2(p)
-    return entropy
-
-def has_suspicious_pattern(domain):
-    if not domain: return False
-    d = domain.lower()
-    if d.count('-') >= 2: return True
-    if re.search(r'[a-z]\d[a-z]|\d[a-z]\d', d): return True
-    suffixes = ['secure', 'verify', 'login', 'account', 'update', 'confirm', 'alert', 'support', 'service', 'online', 'verif']
-    if any(s in d.split('.')[0] or d.endswith(s) for s in suffixes): return True
-    if len(d.split('.')[0]) > 20: return True
-    return False
-
-def extract_all_urls(text):
-    if not text: return []
-    return re.findall(r'https?://[^\s]+|www\.[^\s]+|[a-zA-Z0-9-]+\.[a-zA-Z]{2,}(?:/[^\s]*)?', str(text))
-
-def extract_domain_features(text):
-    feats = {
+@memoize_hosts(DOMAIN_CACHE_SIZE)
+def analyze_host(netloc):
+    """Host-only URL checks for one netloc, memoized per netloc (shared record: do not mutate)."""
+    ext = public_suffix.extract(netloc)
+    d, tld = ext.domain, ext.suffix
+    full_d = f"{d}.{tld}" if d and tld else netloc
+    return {
+        'has_ip_url': is_ip_address(netloc.split(':')[0]),
+        'has_url_shortener': full_d.lower() in URL_SHORTENERS,
+        'has_suspicious_tld': bool(tld) and tld.split('.')[-1].lower() in SUSPICIOUS_TLDS,
+        'entropy': calculate_domain_entropy(d) if d else None,
+        'has_suspicious_pattern': bool(d) and has_suspicious_pattern(d),
+    }
+
+def base_features(text):
+    return {
         'has_url': 0, 'url_count': 0, 'has_ip_url': 0, 'has_url_shortener': 0, 
         'has_suspicious_tld': 0, 'avg_domain_entropy': 0.0, 'has_suspicious_pattern': 0, 
         'has_https': 0, 'has_non_standard_port': 0, 'text_length': len(str(text)), 
@@ -90,12 +158,9 @@ def extract_domain_features(text):
         'special_char_ratio': 0.0, 'has_urgency': 0, 'has_financial_keywords': 0, 
         'has_verification_keywords': 0, 'has_prize_keywords': 0
     }
-    
-    if not text: return feats
-    txt = str(text)
-    txt_l = txt.lower()
-    
-    urls = extract_all_urls(txt)
+
+def add_url_features(feats, urls):
+    """URL part of extract_domain_features: URL counts plus per-host checks (public suffix, entropy)."""
     feats['url_count'] = len(urls)
     feats['has_url'] = 1 if urls else 0
     
@@ -103,32 +168,27 @@ def extract_domain_features(text):
         entropies = []
         for url in urls:
             try:
-                if not url.startswith(('http://', 'https://')):
-                    url = 'http://' + url
-                parsed = urlparse(url)
-                netloc = parsed.netloc or parsed.path.split('/')[0]
+                netloc = url_host(url)
                 
-                if is_ip_address(netloc.split(':')[0]): feats['has_ip_url'] = 1
                 if ':' in netloc and netloc.split(':')[-1].isdigit():
                     port = int(netloc.split(':')[-1])
                     if port not in [80, 443]: feats['has_non_standard_port'] = 1
                 
                 if url.startswith('https://'): feats['has_https'] = 1
                 
-                ext = tldextract.extract(url)
-                d, tld = ext.domain, ext.suffix
-                full_d = f"{d}.{tld}" if d and tld else netloc
-                
-                if full_d.lower() in URL_SHORTENERS: feats['has_url_shortener'] = 1
-                if tld and tld.split('.')[-1].lower() in SUSPICIOUS_TLDS: feats['has_suspicious_tld'] = 1
-                
-                if d:
-                    entropies.append(calculate_domain_entropy(d))
-                    if has_suspicious_pattern(d): feats['has_suspicious_pattern'] = 1
+                host = analyze_host(netloc)
+                if host['has_ip_url']: feats['has_ip_url'] = 1
+                if host['has_url_shortener']: feats['has_url_shortener'] = 1
+                if host['has_suspicious_tld']: feats['has_suspicious_tld'] = 1
+                if host['entropy'] is not None:
+                    entropies.append(host['entropy'])
+                    if host['has_suspicious_pattern']: feats['has_suspicious_pattern'] = 1
             except: continue
         
         if entropies: feats['avg_domain_entropy'] = float(np.mean(entropies))
-    
+
+def add_text_features(feats, txt):
+    """Text part of extract_domain_features: character ratios and keyword groups."""
     if txt:
         dcnt = sum(c.isdigit() for c in txt)
         ucnt = sum(c.isupper() for c in txt)
@@ -137,72 +197,780 @@ def extract_domain_features(text):
         feats['uppercase_ratio'] = ucnt / len(txt)
         feats['special_char_ratio'] = scnt / len(txt)
     
-    urgency = ['urgent', 'immediately', 'now', 'act now', 'limited time', 'expire', 'suspended', 'locked', 'frozen']
-    feats['has_urgency'] = 1 if any(k in txt_l for k in urgency) else 0
-    
-    financial = ['bank', 'account', 'card', 'payment', 'money', 'transfer', 'refund', 'prize', 'win', 'won', 'claim', 'reward']
-    feats['has_financial_keywords'] = 1 if any(k in txt_l for k in financial) else 0
-    
-    verification = ['verify', 'verification', 'confirm', 'validate', 'authenticate', 'code', 'otp', 'pin']
-    feats['has_verification_keywords'] = 1 if any(k in txt_l for k in verification) else 0
-    
-    prize = ['congratulations', 'winner', 'selected', 'prize', 'gift', 'free']
-    feats['has_prize_keywords'] = 1 if any(k in txt_l for k in prize) else 0
-    
-    return feats
+    kw = GENERALIZED_KEYWORDS.hits(txt.lower())
+    feats['has_urgency'] = kw['urgency']
+    feats['has_financial_keywords'] = kw['financial']
+    feats['has_verification_keywords'] = kw['verification']
+    feats['has_prize_keywords'] = kw['prize']
 
-def preprocess(text):
-    if not text: return ""
-    t = str(text).lower()
-    t = re.sub(r'https?://[^\s]+', ' URL ', t)
-    t = re.sub(r'www\.[^\s]+', ' URL ', t)
-    t = re.sub(r'[a-zA-Z0-9-]+\.[a-zA-Z]{2,}(?:/[^\s]*)?', ' URL ', t)
-    t = re.sub(r'\S+@\S+', ' EMAIL ', t)
-    t = re.sub(r'\d{10,}', ' PHONE ', t)
-    t = re.sub(r'[^a-z0-9\s]', ' ', t)
-    return re.sub(r'\s+', ' ', t).strip()
+def extract_domain_features(text, urls=None):
+    feats = base_features(text)
+    if not text: return feats
+    txt = str(text)
+    if urls is None:
+        urls = extract_all_urls(txt)
+    add_url_features(feats, urls)
+    add_text_features(feats, txt)
+    return feats
 
 # --- Load Models ---
 current_dir = os.path.dirname(os.path.abspath(__file__))
-artifacts_dir = os.path.join(current_dir, "..", "artifacts")
+# Model/artifacts in the source tree; the Docker image sets ARTIFACTS_DIR to its copy
+artifacts_dir = os.environ.get("ARTIFACTS_DIR", os.path.join(current_dir, "..", "artifacts"))
 
-try:
-    model = joblib.load(os.path.join(artifacts_dir, "scam_detector_generalized.joblib"))
-    vectorizer = joblib.load(os.path.join(artifacts_dir, "tfidf_vectorizer_generalized.joblib"))
-    scaler = joblib.load(os.path.join(artifacts_dir, "feature_scaler_generalized.joblib"))
-    print("✓ Generalized model loaded successfully!")
-except Exception as e:
-    print(f"❌ Error loading model: {e}")
-    model = None
-    vectorizer = None
-    scaler = None
+# Order of the engineered feature columns the scaler and model were fitted on
+# (base_features keeps batch_features.GENERALIZED_COLUMNS order; importing that module would pull in pandas)
+FEATURE_COLUMNS = list(base_features(""))
 
-def predict_message(text):
-    if not model:
+def fold_model(model, scaler):
+    """Split model.coef_ into text and raw-feature weights, folding the scaler into the latter."""
+    names = list(getattr(scaler, "feature_names_in_", FEATURE_COLUMNS))
+    if names != FEATURE_COLUMNS:
+        raise ValueError(f"Scaler columns {names} do not match the served features {FEATURE_COLUMNS}")
+    coef = model.coef_[0]
+    n_text = coef.shape[0] - len(FEATURE_COLUMNS)
+    folded, folded_intercept = fold_scaler(coef[n_text:], model.intercept_[0],
+                                           *scaler_moments(scaler, len(FEATURE_COLUMNS)))
+    return coef[:n_text], folded, folded_intercept
+
+class ModelVersion:
+    """One loaded artifact set, identified by artifact_hash.
+
+    Replaced as a whole (one assignment to active_model), so a batch is always scored by a single
+    consistent model / vectorizer / scaler triple even while a reload swaps in a new one.
+    """
+
+    def __init__(self, artifact_hash, model=None, vectorizer=None, scaler=None, scorer=None):
+        self.artifact_hash = artifact_hash
+        self.model = model
+        self.vectorizer = vectorizer
+        self.scaler = scaler
+        self.scorer = scorer
+        # Linear weights with the scaler folded in (see fold_scaler): raw engineered features go straight in
+        self.text_coef = self.feature_coef = self.intercept = None
+        if scorer is None:
+            self.text_coef, self.feature_coef, self.intercept = fold_model(model, scaler)
+        self.loaded_at = time.time()
+
+active_model = None
+
+def artifact_paths():
+    """Files of the artifact set selected by MODEL_FORMAT and TEXT_VECTORIZER."""
+    if MODEL_FORMAT == "bundle":
+        bundle_dir = os.path.join(artifacts_dir, BUNDLE_DIR)
+        return [os.path.join(bundle_dir, "bundle.json")] + [os.path.join(bundle_dir, f"{name}.npy") for name in BUNDLE_ARRAYS]
+    suffix = "_hashed" if TEXT_VECTORIZER == "hashed" else ""
+    return [
+        os.path.join(artifacts_dir, f"scam_detector_generalized{suffix}.joblib"),
+        os.path.join(artifacts_dir, f"tfidf_vectorizer_generalized{suffix}.joblib"),
+        os.path.join(artifacts_dir, "feature_scaler_generalized.joblib"),
+    ]
+
+def file_hash(path):
+    """SHA-256 of a file, as evaluate.py's artifact_hash computes it."""
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+def artifact_set_hash(paths):
+    """SHA-256 over the file name and file_hash of every artifact, in artifact_paths order."""
+    h = hashlib.sha256()
+    for path in paths:
+        h.update(f"{os.path.basename(path)}:{file_hash(path)}\n".encode("utf-8"))
+    return h.hexdigest()
+
+def load_model_version():
+    """Load the artifact set currently on disk; raises if it is missing or inconsistent."""
+    paths = artifact_paths()
+    # Hashed before loading: a file replaced mid-load changes the stamp, and the watcher loads it again
+    digest = artifact_set_hash(paths)
+    if MODEL_FORMAT == "bundle":
+        scorer = LinearScorer.load(os.path.dirname(paths[0]))
+        if scorer.feature_names != FEATURE_COLUMNS:
+            raise ValueError(f"Bundle columns {scorer.feature_names} do not match the served features")
+        return ModelVersion(digest, model=scorer, scorer=scorer)
+    import joblib
+    model_path, vectorizer_path, scaler_path = paths
+    return ModelVersion(digest, model=joblib.load(model_path), vectorizer=joblib.load(vectorizer_path),
+                        scaler=joblib.load(scaler_path))
+
+# Startup progress and timings, reported by /readyz and /health
+startup_report = {
+    "artifact_loading": ARTIFACT_LOADING,
+    "phase": "loading",
+    "import_seconds": IMPORT_SECONDS,
+    "load_seconds": None,
+    "warmup_seconds": None,
+    "ready_seconds": None,
+    "error": None,
+}
+
+def load_artifacts():
+    """Initial load into active_model; on failure it stays None and the error is reported."""
+    global active_model
+    started = time.perf_counter()
+    try:
+        active_model = load_model_version()
+        print("✓ Generalized model loaded successfully!")
+    except Exception as e:
+        print(f"❌ Error loading model: {e}")
+        startup_report["error"] = str(e)
+        active_model = None
+    startup_report["load_seconds"] = time.perf_counter() - started
+
+if ARTIFACT_LOADING == "eager":
+    load_artifacts()
+
+# Bit of each threat indicator in the compact threat_mask (and the key order of threat_indicators)
+INDICATOR_BITS = {
+    "ip_based_url": 1,
+    "url_shortener": 2,
+    "suspicious_tld": 4,
+    "suspicious_pattern": 8,
+    "urgency_keywords": 16,
+    "high_entropy_domain": 32,
+}
+
+def indicator_mask(feats):
+    return ((1 if feats['has_ip_url'] else 0)
+            | (2 if feats['has_url_shortener'] else 0)
+            | (4 if feats['has_suspicious_tld'] else 0)
+            | (8 if feats['has_suspicious_pattern'] else 0)
+            | (16 if feats['has_urgency'] else 0)
+            | (32 if feats['avg_domain_entropy'] > 3.5 else 0))
+
+def build_indicators(mask):
+    """The threat_indicators dict of an indicator_mask; only built for responses that ask for it."""
+    indicators = {name: bool(mask & bit) for name, bit in INDICATOR_BITS.items()}
+    indicators["total_red_flags"] = bin(mask).count("1")
+    return indicators
+
+def timed_predict(texts, version=None):
+    """Score a list of messages with one vectorizer pass and one linear pass over the whole batch.
+
+    Returns (results, samples). Results are (pred, prob, indicator_mask, artifact_hash) tuples scored by
+    version (default: the active model); samples are (histogram, label, value) tuples for
+    record_samples. preprocess and the two domain-feature stages are timed per message, the array
+    build, vectorizer and model stages per call (once for the whole batch).
+    """
+    version = version or active_model
+    if version is None:
         raise Exception("Model not loaded")
-        
-    X_txt = vectorizer.transform([preprocess(text)])
-    feats = extract_domain_features(text)
-    X_feat = scaler.transform(pd.DataFrame([feats]))
-    X = hstack([X_txt, csr_matrix(X_feat)])
-    
-    pred = model.predict(X)[0]
-    prob = model.predict_proba(X)[0, 1]
+    texts = list(texts)
+    if not texts:
+        return [], []
+
+    clock = time.perf_counter
+    samples = []
+    scans, feats = [], []
+    for t in texts:
+        start = clock()
+        scan = scan_message(t)
+        scanned = clock()
+        f = base_features(t)
+        if t:
+            add_url_features(f, scan.urls)
+            urls_done = clock()
+            add_text_features(f, str(t))
+        else:
+            urls_done = clock()
+        done = clock()
+        scans.append(scan)
+        feats.append(f)
+        samples += [
+            ("stage_seconds", "preprocess", scanned - start),
+            ("stage_seconds", "domain_features_url", urls_done - scanned),
+            ("stage_seconds", "domain_features_text", done - urls_done),
+            ("message_urls", None, len(scan.urls)),
+        ]
+
+    start = clock()
+    # Raw engineered features in the fitted column order; the scaler is folded into the weights
+    X_feat = np.array([[f[name] for name in FEATURE_COLUMNS] for f in feats], dtype=np.float64)
+    normalized = [scan.normalized for scan in scans]
+    samples.append(("stage_seconds", "feature_matrix", clock() - start))
     
-    indicators = {
-        "ip_based_url": bool(feats['has_ip_url']),
-        "url_shortener": bool(feats['has_url_shortener']),
-        "suspicious_tld": bool(feats['has_suspicious_tld']),
-        "suspicious_pattern": bool(feats['has_suspicious_pattern']),
-        "urgency_keywords": bool(feats['has_urgency']),
-        "high_entropy_domain": feats['avg_domain_entropy'] > 3.5,
-        "total_red_flags": sum([
-            feats['has_ip_url'], feats['has_url_shortener'], 
-            feats['has_suspicious_tld'], feats['has_suspicious_pattern'], 
-            feats['has_urgency'], 1 if feats['avg_domain_entropy'] > 3.5 else 0
-        ])
-    }
-    return pred, prob, indicators
+    # One probability pass; the label is derived from it so label and confidence always agree
+    if version.scorer is not None:
+        # The bundle scorer looks up n-grams as part of scoring, so it is timed as one "model" stage
+        start = clock()
+        probs = version.scorer.predict_proba(normalized, X_feat)
+        samples.append(("stage_seconds", "model", clock() - start))
+    else:
+        from scipy.special import expit  # already imported by the sklearn artifacts
+        start = clock()
+        X_txt = version.vectorizer.transform(normalized)
+        vectorized = clock()
+        probs = expit(X_txt @ version.text_coef + X_feat @ version.feature_coef + version.intercept)
+        samples += [
+            ("stage_seconds", "vectorizer", vectorized - start),
+            ("stage_seconds", "model", clock() - vectorized),
+        ]
+    preds = (probs > DECISION_THRESHOLD).astype(int)
+    return [(preds[i], probs[i], indicator_mask(feats[i]), version.artifact_hash) for i in range(len(texts))], samples
+
+def predict_messages(texts):
+    return timed_predict(texts)[0]
+
+def predict_message(text):
+    return predict_messages([text])[0]
+
+# Pays first-call costs (regex and keyword tables, sklearn/NumPy code paths, domain analysis)
+# before the service reports ready; also the canary batch a reloaded model must pass
+WARMUP_TEXTS = [
+    "URGENT: your account has been suspended. Verify your details at http://secure-verify.example.xyz/login",
+    "You have won a $1000 gift card! Claim your prize: https://bit.ly/3xYzAbc",
+    "Hey, are we still meeting for lunch tomorrow at 12?",
+]
+
+def warmup(version=None):
+    """Score WARMUP_TEXTS once (not recorded in the metrics); returns the seconds it took."""
+    started = time.perf_counter()
+    timed_predict(WARMUP_TEXTS, version)
+    return time.perf_counter() - started
+
+def canary_check(version, current=None):
+    """Raise ValueError unless version scores the canary batch with valid probabilities and, when
+    RELOAD_MIN_AGREEMENT > 0, labels it like the current model often enough."""
+    results, _ = timed_predict(WARMUP_TEXTS, version)
+    probs = np.array([result[1] for result in results], dtype=np.float64)
+    if len(results) != len(WARMUP_TEXTS) or not np.all(np.isfinite(probs)) or np.any((probs < 0) | (probs > 1)):
+        raise ValueError("Canary batch produced invalid probabilities")
+    if current is not None and RELOAD_MIN_AGREEMENT > 0:
+        expected = [result[0] for result in timed_predict(WARMUP_TEXTS, current)[0]]
+        agreement = float(np.mean([result[0] == label for result, label in zip(results, expected)]))
+        if agreement < RELOAD_MIN_AGREEMENT:
+            raise ValueError(f"Canary label agreement {agreement:.2f} is below RELOAD_MIN_AGREEMENT={RELOAD_MIN_AGREEMENT}")
+
+# --- Metrics ---
+metrics = None
+if ENABLE_METRICS:
+    metrics = MetricsRegistry("scam_api")
+    metrics.histogram("stage_seconds", "Time spent in each inference stage", LATENCY_BUCKETS, label="stage")
+    metrics.histogram("request_seconds", "End-to-end request handling time", LATENCY_BUCKETS, label="endpoint")
+    metrics.histogram("message_chars", "Characters per submitted message", SIZE_BUCKETS, label="endpoint")
+    metrics.histogram("message_urls", "URLs found per scored message", COUNT_BUCKETS)
+
+def record_samples(samples):
+    """Add timed_predict samples to the histograms (event loop only, like the result cache)."""
+    if metrics:
+        for name, label, value in samples:
+            metrics.observe(name, value, label)
+
+def record_request(endpoint, texts, started):
+    if metrics:
+        metrics.observe("request_seconds", time.perf_counter() - started, endpoint)
+        for text in texts:
+            metrics.observe("message_chars", len(text), endpoint)
+
+# --- Inference Execution ---
+executor = None
+
+def init_worker(version=None):
+    """Process pool initializer, run once in every worker before its first task: workers serve version
+    (a reload's new pool); forked workers otherwise inherit the loaded artifacts and spawned ones load
+    them here. The worker then warms itself up, so no request pays its first-call costs. Raising
+    (no model) breaks the pool, which warm_executor reports."""
+    global active_model
+    if version is not None:
+        active_model = version
+    elif active_model is None:
+        load_artifacts()
+    if active_model is None:
+        raise RuntimeError("No model loaded in inference worker")
+    warmup()
+
+def worker_ready():
+    return active_model is not None
+
+def make_executor(version=None):
+    if INFERENCE_MODE == "thread":
+        return ThreadPoolExecutor(max_workers=INFERENCE_WORKERS, thread_name_prefix="inference")
+    if INFERENCE_MODE == "process":
+        return ProcessPoolExecutor(max_workers=INFERENCE_WORKERS, initializer=init_worker, initargs=(version,))
+    return None
+
+async def warm_executor(pool):
+    """Start the workers of pool before the first request; True once they can serve.
+
+    Process workers warm up in init_worker, so this only has to make the pool start them (a task per
+    worker; a worker started later still warms up before its first task). Threads share this
+    process's model and first-call costs, so one warmup covers all of them.
+    """
+    loop = asyncio.get_running_loop()
+    try:
+        if isinstance(pool, ThreadPoolExecutor):
+            await loop.run_in_executor(pool, warmup)
+            return worker_ready()
+        return all(await asyncio.gather(*[loop.run_in_executor(pool, worker_ready) for _ in range(INFERENCE_WORKERS)]))
+    except BrokenExecutor as e:
+        print(f"❌ Inference workers failed to start: {e}")
+        return False
+
+def start_executor():
+    global executor
+    executor = make_executor()
+
+def stop_executor():
+    global executor
+    if executor:
+        executor.shutdown(wait=True, cancel_futures=True)
+        executor = None
+
+async def run_inference(texts):
+    """Score texts with predict_messages, off the event loop when a worker pool is configured."""
+    pool = executor
+    if pool is None:
+        results, samples = timed_predict(texts)
+    else:
+        loop = asyncio.get_running_loop()
+        # Workers send their stage timings back with the results, so one set of histograms covers every mode
+        results, samples = await loop.run_in_executor(pool, timed_predict, list(texts))
+    record_samples(samples)
+    return results
+
+# --- Result Cache ---
+class ResultCache:
+    """Bounded LRU cache of (pred, prob, indicator_mask, artifact_hash) tuples keyed on a hash of the message.
+
+    Scam campaigns resend the same template to many recipients, so repeats skip TF-IDF,
+    domain analysis and the model entirely. Only touched from the event loop, so no locking.
+    """
+
+    def __init__(self, max_size, ttl_seconds, key_mode):
+        self.max_size = max_size
+        self.ttl = ttl_seconds
+        self.key_mode = key_mode
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def key(self, text):
+        if self.key_mode == "normalized":
+            # Case, punctuation and long digit runs are ignored, so near-identical templates share a result
+            scan = scan_message(text)
+            text = scan.normalized + "\0" + "\n".join(sorted(set(scan.urls)))
+        return hashlib.blake2b(text.encode("utf-8", "surrogatepass"), digest_size=16).digest()
+
+    def get(self, key):
+        entry = self.entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        expires_at, result = entry
+        if expires_at and expires_at < time.monotonic():
+            del self.entries[key]
+            self.expirations += 1
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return result
+
+    def put(self, key, result):
+        expires_at = time.monotonic() + self.ttl if self.ttl > 0 else 0
+        self.entries[key] = (expires_at, result)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self):
+        self.entries.clear()
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "enabled": True,
+            "key_mode": self.key_mode,
+            "size": len(self.entries),
+            "max_size": self.max_size,
+            "ttl_seconds": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+        }
+
+result_cache = ResultCache(RESULT_CACHE_SIZE, RESULT_CACHE_TTL_SECONDS, RESULT_CACHE_KEY) if RESULT_CACHE_SIZE > 0 else None
+
+def cacheable(result):
+    # A batch still scored by a model that was swapped out meanwhile must not refill the cache
+    return active_model is not None and result[3] == active_model.artifact_hash
+
+async def score_texts(texts):
+    """Return predict_messages results for texts, serving repeats from the result cache."""
+    texts = list(texts)
+    if result_cache is None:
+        return await run_inference(texts)
+    keys = [result_cache.key(t) for t in texts]
+    results = [None] * len(texts)
+    pending = {}
+    for i, key in enumerate(keys):
+        if key in pending:
+            # Duplicate inside the same batch: score it once
+            pending[key].append(i)
+            continue
+        cached = result_cache.get(key)
+        if cached is None:
+            pending[key] = [i]
+        else:
+            results[i] = cached
+    if pending:
+        fresh = await run_inference([texts[idx[0]] for idx in pending.values()])
+        for (key, idx), result in zip(pending.items(), fresh):
+            if cacheable(result):
+                result_cache.put(key, result)
+            for i in idx:
+                results[i] = result
+    return results
+
+# --- Responses ---
+def json_bytes(content):
+    """Compact JSON; raises TypeError/ValueError for content JSON cannot represent (NaN, orjson's 64-bit int limit)."""
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(content)
+    return json.dumps(content, separators=(",", ":"), allow_nan=False).encode("utf-8")
+
+class FastJSONResponse(Response):
+    """JSON serialized with orjson when installed; prediction endpoints return it to skip pydantic."""
+    media_type = "application/json"
+
+    def render(self, content):
+        return json_bytes(content)
+
+def response_options(response: Optional[str] = None, indicators: Optional[str] = None,
+                     x_response_mode: Optional[str] = Header(default=None)):
+    """(compact, indicators) from ?response=full|compact (or the X-Response-Mode header) and
+    ?indicators=none|bitmask|full, which only applies to compact responses (default none)."""
+    mode = (response or x_response_mode or "full").lower()
+    if mode not in ("full", "compact"):
+        raise HTTPException(status_code=400, detail=f"Unknown response mode {mode!r}, expected full or compact")
+    indicators = (indicators or "none").lower()
+    if indicators not in ("none", "bitmask", "full"):
+        raise HTTPException(status_code=400, detail=f"Unknown indicators {indicators!r}, expected none, bitmask or full")
+    return mode == "compact", indicators
+
+def render_result(text, result, options):
+    """Response record of one scored message: ScamPredictionResponse or, compact, CompactScamPredictionResponse."""
+    pred, prob, mask, artifact_hash = result
+    compact, indicators = options
+    prediction = "scam" if pred == 1 else "not a scam"
+    if not compact:
+        return {
+            "input_text": text,
+            "prediction": prediction,
+            "confidence": float(prob if pred == 1 else 1 - prob),
+            "threat_indicators": build_indicators(mask),
+            "artifact_hash": artifact_hash,
+        }
+    # Only what a gateway needs: no echoed text, indicators on request
+    record = {"prediction": prediction, "scam_probability": float(prob), "artifact_hash": artifact_hash}
+    if indicators == "bitmask":
+        record["threat_mask"] = mask
+    elif indicators == "full":
+        record["threat_indicators"] = build_indicators(mask)
+    return record
+
+# --- Micro-batching ---
+class MicroBatcher:
+    """Collects concurrent single-message requests and scores them as one predict_messages batch.
+
+    A batch is flushed when it reaches max_batch_size or when max_wait_ms has passed since
+    its first message arrived. Each caller awaits its own future, so responses stay per-request.
+    """
+
+    def __init__(self, max_batch_size, max_wait_ms, max_queue_size):
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self.max_queue_size = max_queue_size
+        self.queue = None
+        self.task = None
+        self.flushes = 0
+        self.flushed_items = 0
+        self.last_flush_size = 0
+        self.max_flush_size = 0
+        self.inflight = set()
+
+    async def start(self):
+        # Created here so the queue binds to the server's running event loop
+        self.queue = asyncio.Queue(maxsize=self.max_queue_size)
+        self.task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self.task:
+            self.task.cancel()
+            try:
+                await self.task
+            except asyncio.CancelledError:
+                pass
+        if self.inflight:
+            await asyncio.gather(*self.inflight, return_exceptions=True)
+        while self.queue and not self.queue.empty():
+            _, fut = self.queue.get_nowait()
+            if not fut.done():
+                fut.set_exception(RuntimeError("Server shutting down"))
+
+    async def submit(self, text):
+        fut = asyncio.get_running_loop().create_future()
+        self.queue.put_nowait((text, fut))
+        return await fut
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self.queue.get()]
+            deadline = loop.time() + self.max_wait
+            while len(batch) < self.max_batch_size:
+                if not self.queue.empty():
+                    batch.append(self.queue.get_nowait())
+                    continue
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self.queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            # Flush concurrently so a batch running on the worker pool does not hold up the next one
+            task = asyncio.create_task(self._flush(batch))
+            self.inflight.add(task)
+            task.add_done_callback(self.inflight.discard)
+
+    async def _flush(self, batch):
+        self.flushes += 1
+        self.flushed_items += len(batch)
+        self.last_flush_size = len(batch)
+        self.max_flush_size = max(self.max_flush_size, len(batch))
+        try:
+            results = await run_inference([text for text, _ in batch])
+        except Exception as e:
+            for _, fut in batch:
+                if not fut.done():
+                    fut.set_exception(e)
+            return
+        for (_, fut), result in zip(batch, results):
+            if not fut.done():
+                fut.set_result(result)
+
+    def stats(self):
+        return {
+            "enabled": True,
+            "queue_depth": self.queue.qsize() if self.queue else 0,
+            "max_queue_size": self.max_queue_size,
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait * 1000.0,
+            "flushes": self.flushes,
+            "last_flush_size": self.last_flush_size,
+            "max_flush_size": self.max_flush_size,
+            "avg_flush_size": self.flushed_items / self.flushes if self.flushes else 0.0,
+        }
+
+batcher = MicroBatcher(MICRO_BATCH_MAX_SIZE, MICRO_BATCH_MAX_WAIT_MS, MICRO_BATCH_QUEUE_SIZE) if ENABLE_MICRO_BATCHING else None
+
+# --- Hot Reload ---
+class ModelReloader:
+    """Swaps retrained artifacts in without a restart or dropped requests.
+
+    reload() loads the artifact set on disk in a thread, runs the canary batch through it
+    (canary_check, which also warms it up) and only then replaces active_model in one
+    assignment; batches already running finish on the version they started with. With
+    INFERENCE_MODE=process a new worker pool is started on the new version and warmed before
+    it replaces the old one, which finishes its queued batches and exits, so serving capacity
+    never drops (the host briefly runs both pools). Triggered by the file watcher
+    (poll_seconds > 0), SIGHUP or POST /admin/reload; reloads run one at a time and a set
+    whose artifact_hash is already active is skipped.
+    """
+
+    def __init__(self, poll_seconds):
+        self.poll_seconds = poll_seconds
+        self.lock = None
+        self.task = None
+        self.triggered = set()
+        self.stamp = None
+        self.reloads = 0
+        self.failures = 0
+        self.last_result = None
+
+    async def start(self):
+        self.lock = asyncio.Lock()
+        self.stamp = artifact_stamp()
+        if self.poll_seconds > 0:
+            self.task = asyncio.create_task(self._watch())
+        try:
+            asyncio.get_running_loop().add_signal_handler(signal.SIGHUP, self.trigger, "signal")
+        except (AttributeError, NotImplementedError, RuntimeError, ValueError):
+            pass  # No SIGHUP on Windows, or not running in the main thread
+
+    async def stop(self):
+        try:
+            asyncio.get_running_loop().remove_signal_handler(signal.SIGHUP)
+        except (AttributeError, NotImplementedError, RuntimeError, ValueError):
+            pass
+        for task in [self.task, *self.triggered]:
+            if task:
+                task.cancel()
+        await asyncio.gather(*[task for task in [self.task, *self.triggered] if task], return_exceptions=True)
+
+    def trigger(self, reason):
+        task = asyncio.create_task(self.reload(reason))
+        self.triggered.add(task)
+        task.add_done_callback(self.triggered.discard)
+
+    async def _watch(self):
+        previous = self.stamp
+        while True:
+            await asyncio.sleep(self.poll_seconds)
+            stamp = artifact_stamp()
+            # Reload once the files differ from the loaded set and have not changed for one interval
+            # (a training run may still be writing them)
+            if stamp != self.stamp and stamp == previous and None not in stamp:
+                await self.reload("watcher")
+            previous = stamp
+
+    async def reload(self, reason):
+        global active_model, executor
+        async with self.lock:
+            if startup_task is not None and not startup_task.done():
+                await asyncio.shield(startup_task)
+            loop = asyncio.get_running_loop()
+            started = time.perf_counter()
+            stamp = artifact_stamp()
+            try:
+                version = await loop.run_in_executor(None, load_model_version)
+                if active_model is not None and version.artifact_hash == active_model.artifact_hash:
+                    self.stamp = stamp
+                    return self._result("unchanged", reason, started, version.artifact_hash)
+                await loop.run_in_executor(None, canary_check, version, active_model)
+                new_pool = None
+                if INFERENCE_MODE == "process":
+                    new_pool = make_executor(version)
+                    if not await warm_executor(new_pool):
+                        new_pool.shutdown(wait=False, cancel_futures=True)
+                        raise RuntimeError("New model not loaded in an inference worker")
+            except Exception as e:
+                self.stamp = stamp
+                self.failures += 1
+                print(f"❌ Model reload ({reason}) failed, keeping {active_model.artifact_hash[:12] if active_model else 'no model'}: {e}")
+                return self._result("failed", reason, started, error=str(e))
+
+            # The swap: nothing below awaits, so requests see either the old or the new version
+            previous = active_model
+            active_model = version
+            old_pool = None
+            if new_pool is not None:
+                old_pool, executor = executor, new_pool
+            if result_cache:
+                result_cache.clear()
+            if not is_ready():
+                # A model that passes the canary also recovers a service whose startup load failed
+                startup_report.update(phase="ready", error=None)
+            self.stamp = stamp
+            self.reloads += 1
+            if old_pool is not None:
+                # Lets batches already queued on the old workers finish before they exit
+                loop.run_in_executor(None, old_pool.shutdown)
+            print(f"✓ Model reloaded ({reason}): {previous.artifact_hash[:12] if previous else 'none'} -> {version.artifact_hash[:12]}")
+            return self._result("reloaded", reason, started, version.artifact_hash)
+
+    def _result(self, status, reason, started, artifact_hash=None, error=None):
+        self.last_result = {
+            "status": status,
+            "reason": reason,
+            "artifact_hash": artifact_hash,
+            "error": error,
+            "seconds": time.perf_counter() - started,
+            "at": time.time(),
+        }
+        return self.last_result
+
+    def stats(self):
+        return {
+            "poll_seconds": self.poll_seconds,
+            "reloads": self.reloads,
+            "failures": self.failures,
+            "last": self.last_result,
+        }
+
+def artifact_stamp():
+    """(size, mtime) of every artifact file, None for missing ones; cheap enough to poll."""
+    stamp = []
+    for path in artifact_paths():
+        try:
+            info = os.stat(path)
+            stamp.append((info.st_size, info.st_mtime_ns))
+        except OSError:
+            stamp.append(None)
+    return tuple(stamp)
+
+reloader = ModelReloader(MODEL_RELOAD_POLL_SECONDS)
+
+# --- Startup ---
+startup_task = None
+
+def is_ready():
+    return startup_report["phase"] == "ready"
+
+async def prepare_service():
+    """Load artifacts (background mode), start the worker pool and warm it up, then mark the service ready."""
+    loop = asyncio.get_running_loop()
+    background = ARTIFACT_LOADING == "background"
+    if background:
+        await loop.run_in_executor(None, load_artifacts)
+    start_executor()
+    if active_model is None:
+        startup_report["phase"] = "failed"
+        return
+    startup_report["phase"] = "warming_up"
+    started = time.perf_counter()
+    if executor:
+        # Start the workers now so their artifact loading and first-call costs happen before the first request
+        if not await warm_executor(executor):
+            startup_report["phase"] = "failed"
+            startup_report["error"] = "Model not loaded in an inference worker"
+            return
+    elif background:
+        await loop.run_in_executor(None, warmup)
+    else:
+        warmup()
+    startup_report["warmup_seconds"] = time.perf_counter() - started
+    startup_report["ready_seconds"] = time.perf_counter() - IMPORT_STARTED
+    startup_report["phase"] = "ready"
+    print(f"✓ Ready in {startup_report['ready_seconds']:.2f}s (imports {startup_report['import_seconds']:.2f}s, "
+          f"artifact load {startup_report['load_seconds']:.2f}s, warmup {startup_report['warmup_seconds']:.2f}s)")
+
+async def ensure_ready():
+    """Hold requests that arrive while a background load is running; 503 if the model is unavailable."""
+    if not is_ready() and startup_task is not None and not startup_task.done():
+        await asyncio.shield(startup_task)
+    if not is_ready():
+        raise HTTPException(status_code=503, detail=f"Model not loaded ({startup_report['phase']})")
+
+@app.on_event("startup")
+async def startup():
+    global startup_task
+    if batcher:
+        await batcher.start()
+    await reloader.start()
+    if ARTIFACT_LOADING == "background":
+        # Returning right away lets the server bind its port while the model loads
+        startup_task = asyncio.create_task(prepare_service())
+    else:
+        await prepare_service()
+
+@app.on_event("shutdown")
+async def shutdown():
+    if startup_task and not startup_task.done():
+        startup_task.cancel()
+    await reloader.stop()
+    if batcher:
+        await batcher.stop()
+    stop_executor()
 
 # --- API Endpoints ---
 @app.get("/", response_class=HTMLResponse)
@@ -218,25 +986,268 @@ async def root():
     </html>
     """
 
-@app.post("/predict-scam", response_model=ScamPredictionResponse)
-async def predict_scam(req: TextRequest):
+@app.post("/predict-scam", response_model=Union[ScamPredictionResponse, CompactScamPredictionResponse])
+async def predict_scam(req: TextRequest, options: tuple = Depends(response_options)):
+    """Score one message. ?response=compact (or X-Response-Mode: compact) returns a
+    CompactScamPredictionResponse instead; ?indicators=bitmask|full adds the threat indicators to it."""
+    started = time.perf_counter()
+    await ensure_ready()
     try:
-        pred, conf, indicators = predict_message(req.text)
-        return ScamPredictionResponse(
-            input_text=req.text,
-            prediction="scam" if pred == 1 else "not a scam",
-            confidence=float(conf if pred == 1 else 1 - conf),
-            threat_indicators=indicators
-        )
+        key = result_cache.key(req.text) if result_cache else None
+        cached = result_cache.get(key) if result_cache else None
+        if cached:
+            result = cached
+        elif batcher:
+            try:
+                result = await batcher.submit(req.text)
+            except asyncio.QueueFull:
+                raise HTTPException(status_code=503, detail="Micro-batch queue is full, retry later")
+        else:
+            result = (await run_inference([req.text]))[0]
+        if result_cache and not cached and cacheable(result):
+            result_cache.put(key, result)
+        response = FastJSONResponse(render_result(req.text, result, options))
+        record_request("predict-scam", [req.text], started)
+        return response
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.post("/predict-scam/batch", response_model=BatchScamPredictionResponse)
+async def predict_scam_batch(req: BatchTextRequest, options: tuple = Depends(response_options)):
+    """Score up to MAX_BATCH_SIZE messages; takes the same response options as /predict-scam."""
+    started = time.perf_counter()
+    if len(req.texts) > MAX_BATCH_SIZE:
+        raise HTTPException(status_code=413, detail=f"Batch of {len(req.texts)} exceeds MAX_BATCH_SIZE={MAX_BATCH_SIZE}")
+    await ensure_ready()
+    try:
+        results = await score_texts(req.texts)
+        response = FastJSONResponse({
+            "results": [render_result(text, result, options) for text, result in zip(req.texts, results)]
+        })
+        record_request("predict-scam/batch", req.texts, started)
+        return response
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+# --- Streaming ---
+async def stream_lines(request):
+    """Yield (line_number, bytes_or_error) for each non-empty line of the request body as it arrives.
+
+    At most one partial line is buffered; a line longer than STREAM_MAX_LINE_BYTES is reported
+    as an error and skipped up to its newline instead of being accumulated.
+    """
+    buffer = bytearray()
+    number = 0
+    oversized = False
+    async for chunk in request.stream():
+        start = 0
+        while True:
+            end = chunk.find(b"\n", start)
+            if end < 0:
+                if not oversized:
+                    buffer += chunk[start:]
+                    if len(buffer) > STREAM_MAX_LINE_BYTES:
+                        oversized = True
+                        buffer.clear()
+                break
+            number += 1
+            if oversized:
+                oversized = False
+                yield number, ValueError(f"Line exceeds STREAM_MAX_LINE_BYTES={STREAM_MAX_LINE_BYTES}")
+            else:
+                buffer += chunk[start:end]
+                if len(buffer) > STREAM_MAX_LINE_BYTES:
+                    yield number, ValueError(f"Line exceeds STREAM_MAX_LINE_BYTES={STREAM_MAX_LINE_BYTES}")
+                elif buffer.strip():
+                    yield number, bytes(buffer)
+                buffer.clear()
+            start = end + 1
+    number += 1
+    if oversized:
+        yield number, ValueError(f"Line exceeds STREAM_MAX_LINE_BYTES={STREAM_MAX_LINE_BYTES}")
+    elif buffer.strip():
+        yield number, bytes(buffer)
+
+def parse_stream_line(raw, plain_text):
+    """(text, id) of one input line: a JSON string or {"text": ..., "id": ...} object, or the raw line."""
+    line = raw.decode("utf-8").rstrip("\r")
+    if plain_text:
+        return line, None
+    item = json.loads(line)
+    if isinstance(item, str):
+        return item, None
+    if isinstance(item, dict) and isinstance(item.get("text"), str):
+        item_id = item.get("id")
+        # json.loads accepts NaN/Infinity, which cannot be written back as valid JSON
+        if isinstance(item_id, float) and not math.isfinite(item_id):
+            raise ValueError('"id" must be a finite number')
+        return item["text"], item_id
+    raise ValueError('Expected a JSON string or an object with a "text" string')
+
+async def stream_batches(request, plain_text):
+    """Group input lines into batches of up to STREAM_BATCH_SIZE (line, id, text, error) items."""
+    batch = []
+    async for number, raw in stream_lines(request):
+        if isinstance(raw, Exception):
+            batch.append((number, None, None, str(raw)))
+        else:
+            try:
+                text, item_id = parse_stream_line(raw, plain_text)
+                batch.append((number, item_id, text, None))
+            except (ValueError, UnicodeDecodeError) as e:
+                batch.append((number, None, None, f"Invalid line: {e}"))
+        if len(batch) >= STREAM_BATCH_SIZE:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+class DuplexStreamingResponse(StreamingResponse):
+    """StreamingResponse whose body is produced while the request body is still being read.
+
+    Starlette's version watches for a client disconnect by reading receive() alongside the
+    response, which would take request body chunks away from request.stream(); here the
+    generator's own request.stream() raises ClientDisconnect instead.
+    """
+
+    async def __call__(self, scope, receive, send):
+        await self.stream_response(send)
+        if self.background is not None:
+            await self.background()
+
+def stream_records(batch, results, options):
+    """NDJSON output lines for one scored batch, in input order (input text never echoed)."""
+    results = iter(results)
+    lines = []
+    for number, item_id, text, error in batch:
+        record = {"line": number}
+        if item_id is not None:
+            record["id"] = item_id
+        if error is not None:
+            record["error"] = error
+        else:
+            record.update(render_result(text, next(results), options))
+            record.pop("input_text", None)
+        lines.append(record_bytes(record))
+    return b"\n".join(lines) + b"\n"
+
+def record_bytes(record):
+    """One NDJSON record; a client id orjson cannot encode (integers beyond 64 bits) goes through
+    json.dumps, and one no JSON can hold turns into an error for that line only."""
+    try:
+        return json_bytes(record)
+    except (TypeError, ValueError):
+        pass
+    try:
+        return json.dumps(record, separators=(",", ":"), allow_nan=False).encode("utf-8")
+    except (TypeError, ValueError) as e:
+        return json_bytes({"line": record["line"], "error": f"Unserializable id: {e}"})
+
+@app.post("/predict-scam/stream")
+async def predict_scam_stream(request: Request, options: tuple = Depends(response_options)):
+    """Score an NDJSON (or, with Content-Type: text/plain, one message per line) upload of any size.
+
+    Input lines are scored in batches of STREAM_BATCH_SIZE through the same path as
+    /predict-scam/batch (result cache, worker pool) and NDJSON results are streamed back as each
+    batch finishes: one {"line", "id"?, "prediction", "confidence", "threat_indicators",
+    "artifact_hash"} record per input line (or the compact record, see /predict-scam), or
+    {"line", "error"} for a line that could not be parsed. The next batch is read while the current one is scored, so at most two batches are
+    held in memory and a slow reader slows the upload down rather than growing buffers. Clients
+    must therefore read results while uploading (curl does; a client that sends the whole body
+    before reading stalls once the results fill the socket buffers).
+    """
+    await ensure_ready()
+    plain_text = request.headers.get("content-type", "").startswith("text/plain")
+
+    async def score(batch):
+        texts = [text for _, _, text, error in batch if error is None]
+        results = await score_texts(texts) if texts else []
+        if metrics:
+            for text in texts:
+                metrics.observe("message_chars", len(text), "predict-scam/stream")
+        return batch, results, options
+
+    async def generate():
+        started = time.perf_counter()
+        pending = None
+        try:
+            async for batch in stream_batches(request, plain_text):
+                task = asyncio.create_task(score(batch))
+                if pending is not None:
+                    yield stream_records(*await pending)
+                pending = task
+            if pending is not None:
+                yield stream_records(*await pending)
+                pending = None
+        except Exception as e:
+            # The status line has already been sent; report the failure in-band and stop
+            yield json_bytes({"error": f"Stream aborted: {e}"}) + b"\n"
+        finally:
+            if pending is not None:
+                pending.cancel()
+            if metrics:
+                metrics.observe("request_seconds", time.perf_counter() - started, "predict-scam/stream")
+
+    return DuplexStreamingResponse(generate(), media_type="application/x-ndjson")
+
 @app.get("/health")
 async def health():
-    return {"status": "healthy", "model": "generalized", "version": "3.0"}
+    status = "healthy" if is_ready() else ("unhealthy" if startup_report["phase"] == "failed" else "starting")
+    return JSONResponse(status_code=200 if is_ready() else 503, content={
+        "status": status, "model": "generalized", "version": "3.0",
+        "decision_threshold": DECISION_THRESHOLD,
+        "inference_mode": INFERENCE_MODE,
+        "inference_workers": INFERENCE_WORKERS if executor else 0,
+        "text_vectorizer": TEXT_VECTORIZER,
+        "artifact_hash": active_model.artifact_hash if active_model else None,
+        "model_loaded_at": active_model.loaded_at if active_model else None,
+        "startup": startup_report,
+    })
+
+@app.get("/livez")
+async def livez():
+    """Liveness: the process is up and serving HTTP, whether or not the model is loaded yet."""
+    return {"status": "alive"}
+
+@app.get("/readyz")
+async def readyz():
+    """Readiness: 200 once artifacts are loaded and warmed up, 503 while starting or after a failed load."""
+    return JSONResponse(status_code=200 if is_ready() else 503, content=startup_report)
+
+@app.get("/stats")
+async def stats():
+    return {
+        "inference": {"mode": INFERENCE_MODE, "workers": INFERENCE_WORKERS if executor else 0},
+        "micro_batching": batcher.stats() if batcher else {"enabled": False},
+        "result_cache": result_cache.stats() if result_cache else {"enabled": False},
+        # Counts lookups made in this process; with INFERENCE_MODE=process each worker has its own cache
+        "domain_cache": cache_stats(analyze_host) if DOMAIN_CACHE_SIZE > 0 else {"enabled": False},
+        "latency": metrics.snapshot() if metrics else {"enabled": False},
+        "model_reload": reloader.stats(),
+    }
+
+@app.post("/admin/reload")
+async def admin_reload(x_reload_token: str = Header(default="")):
+    """Reload the artifacts from disk now (needs the X-Reload-Token header to match RELOAD_TOKEN)."""
+    if not RELOAD_TOKEN:
+        raise HTTPException(status_code=404, detail="Reload endpoint is disabled (RELOAD_TOKEN is not set)")
+    if not hmac.compare_digest(x_reload_token.encode("utf-8"), RELOAD_TOKEN.encode("utf-8")):
+        raise HTTPException(status_code=403, detail="Invalid reload token")
+    result = await reloader.reload("endpoint")
+    return JSONResponse(status_code=409 if result["status"] == "failed" else 200, content=result)
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def prometheus_metrics():
+    """Histograms in Prometheus text format (buckets, sum, count, plus p50/p95/p99 estimates)."""
+    if not metrics:
+        raise HTTPException(status_code=404, detail="Metrics are disabled (ENABLE_METRICS=0)")
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
 
 if __name__ == "__main__":
     print("="*80)
     print("🚀 Generalized Scam Detection API v3.0 - Pattern-based")
     print("="*80)
+    import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8004)
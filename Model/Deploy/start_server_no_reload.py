@@ -10,11 +10,14 @@ import uvicorn
 script_dir = os.path.dirname(os.path.abspath(__file__))
 os.chdir(script_dir)
 
-# Add the current directory to Python path
-sys.path.insert(0, script_dir)
+# Add the current directory and Model/ (shared scanner, public suffix list, ...) to Python path;
+# PYTHONPATH as well, so the reloader's and inference pool's child processes see them too
+model_dir = os.path.dirname(script_dir)
+sys.path[:0] = [script_dir, model_dir]
+os.environ["PYTHONPATH"] = os.pathsep.join(filter(None, [script_dir, model_dir, os.environ.get("PYTHONPATH")]))
 
 print(f"Working directory: {os.getcwd()}")
-print(f"Python path includes: {script_dir}")
+print(f"Python path includes: {script_dir}, {model_dir}")
 
 if __name__ == "__main__":
     uvicorn.run("app:app", host="127.0.0.1", port=8002, reload=False)
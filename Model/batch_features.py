@@ -0,0 +1,250 @@
+"""
+Batch Feature Engine
+Column-at-a-time feature extraction for whole corpora. Text statistics and keyword flags are
+computed per column (with pyarrow compute kernels when available, pandas .str otherwise); URLs
+are pulled out with one regex pass (extractall) and each distinct URL is analyzed once, so
+per-row Python work is limited to the few rows that need it. Output matches building a
+DataFrame from the per-message extractors.
+"""
+import re
+
+import numpy as np
+import pandas as pd
+
+import public_suffix
+from feature_store import FEATURE_STORE_DIR, cached_features
+from text_scanner import URL_PATTERN, url_host, calculate_domain_entropy, is_ip_address, has_suspicious_pattern
+from keyword_automaton import GENERALIZED_KEYWORDS
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    PYARROW_AVAILABLE = True
+except Exception:
+    PYARROW_AVAILABLE = False
+
+URL_GROUP = '(' + URL_PATTERN.pattern + ')'
+
+# The ASCII characters str.isspace() accepts, spelled out: RE2's \s omits \v and \x1c-\x1f
+_ASCII_SPACE = r'\t-\r\x1c-\x1f '
+
+# Counting patterns that reproduce the str methods exactly on ASCII text, under re and RE2 alike
+ASCII_COUNT_PATTERNS = {
+    'words': '[^' + _ASCII_SPACE + ']+',
+    'spaces': '[' + _ASCII_SPACE + ']',
+    'digits': '[0-9]',
+    'uppers': '[A-Z]',
+    'special': '[^0-9A-Za-z' + _ASCII_SPACE + ']',
+    'punctuation': '[!?]',
+}
+
+# Feature-code version for the feature store: bump whenever generalized feature values or columns change
+GENERALIZED_FEATURE_VERSION = "generalized-2"
+
+GENERALIZED_COLUMNS = [
+    'has_url', 'url_count', 'has_ip_url', 'has_url_shortener', 'has_suspicious_tld',
+    'avg_domain_entropy', 'has_suspicious_pattern', 'has_https', 'has_non_standard_port',
+    'text_length', 'word_count', 'digit_ratio', 'uppercase_ratio', 'special_char_ratio',
+    'has_urgency', 'has_financial_keywords', 'has_verification_keywords', 'has_prize_keywords',
+]
+
+
+def text_columns(texts):
+    """Return (texts, as_str, blank) for a list, array or Series of messages.
+
+    texts is an object Series with a fresh RangeIndex, as_str holds str(text) for every row
+    ('nan' for missing values, as the per-row extractors see them) and blank marks rows the
+    extractors treat as empty (`not text or pd.isna(text)`).
+    """
+    texts = pd.Series(texts, dtype=object).reset_index(drop=True)
+    # Object dtype keeps .str on Python's re; Arrow-backed strings use RE2, whose \s and \w are ASCII-only
+    as_str = texts.map(str).astype(object)
+    blank = texts.isna() | ~texts.astype(bool)
+    return texts, as_str, blank
+
+
+def _python_text_stats(text):
+    return (len(text), len(text.split()), sum(c.isspace() for c in text),
+            sum(c.isdigit() for c in text), sum(c.isupper() for c in text),
+            sum(not c.isalnum() and not c.isspace() for c in text),
+            text.count('!') + text.count('?'))
+
+
+def text_stats(as_str):
+    """Per-row character statistics matching the str methods the per-row extractors use.
+
+    Returns int64 arrays: length, words (len(split())), spaces, digits (isdigit), uppers
+    (isupper), special (not isalnum and not isspace) and punctuation ('!' and '?'). ASCII rows
+    are counted column-wise; the Unicode-dependent rest goes through the str methods.
+    """
+    values = as_str.to_numpy(dtype=object)
+    ascii_mask = as_str.str.isascii().to_numpy(dtype=bool)
+    stats = {name: np.zeros(len(values), dtype=np.int64) for name in
+             ('length', 'words', 'spaces', 'digits', 'uppers', 'special', 'punctuation')}
+    ascii_rows = np.flatnonzero(ascii_mask)
+    if len(ascii_rows):
+        if PYARROW_AVAILABLE:
+            column = pa.array(values[ascii_rows], type=pa.string())
+            stats['length'][ascii_rows] = pc.utf8_length(column).to_numpy(zero_copy_only=False)
+            for name, pattern in ASCII_COUNT_PATTERNS.items():
+                stats[name][ascii_rows] = pc.count_substring_regex(column, pattern).to_numpy(zero_copy_only=False)
+        else:
+            column = as_str[ascii_mask]
+            stats['length'][ascii_rows] = column.str.len().to_numpy(dtype=np.int64)
+            for name, pattern in ASCII_COUNT_PATTERNS.items():
+                stats[name][ascii_rows] = column.str.count(pattern).to_numpy(dtype=np.int64)
+    for i in np.flatnonzero(~ascii_mask).tolist():
+        (stats['length'][i], stats['words'][i], stats['spaces'][i], stats['digits'][i],
+         stats['uppers'][i], stats['special'][i], stats['punctuation'][i]) = _python_text_stats(values[i])
+    return stats
+
+
+def keyword_flags(lowered, families):
+    """{name: int64 array, 1 where any keyword of that family occurs in the lowercased row}."""
+    patterns = {name: '|'.join(re.escape(k) for k in sorted(keywords, key=len, reverse=True))
+                for name, keywords in families.items()}
+    if PYARROW_AVAILABLE:
+        # Literal substring search: RE2 and re agree regardless of the text's characters
+        column = pa.array(lowered.to_numpy(dtype=object), type=pa.string())
+        return {name: pc.match_substring_regex(column, pattern).to_numpy(zero_copy_only=False).astype(np.int64)
+                for name, pattern in patterns.items()}
+    return {name: lowered.str.contains(pattern, regex=True).to_numpy(dtype=np.int64)
+            for name, pattern in patterns.items()}
+
+
+def ratio(counts, lengths, rows):
+    """counts / lengths on the selected rows with a non-zero length, 0.0 elsewhere."""
+    out = np.zeros(len(counts))
+    mask = rows & (lengths > 0)
+    out[mask] = counts[mask] / lengths[mask]
+    return out
+
+
+def exploded_urls(as_str, rows):
+    """All URL matches of the selected rows, in order, as a Series indexed by row number."""
+    # Every URL alternative needs a '.' or '://', so other rows are skipped without a regex pass
+    rows = rows & (as_str.str.contains('.', regex=False) | as_str.str.contains(':', regex=False)).to_numpy(dtype=bool)
+    if not rows.any():
+        return pd.Series([], dtype=object, index=pd.Index([], dtype=np.int64))
+    matches = as_str[rows].str.extractall(URL_GROUP)[0]
+    return pd.Series(matches.to_numpy(dtype=object), index=matches.index.get_level_values(0))
+
+
+def per_unique(values, func):
+    """Apply func once per distinct value; return one result per input value, in order."""
+    codes, uniques = pd.factorize(values)
+    results = [func(value) for value in uniques]
+    return [results[code] for code in codes]
+
+
+def _row_mean(values, rows, n_rows):
+    """np.mean of each row's values (in order), 0.0 for rows without values.
+
+    Single-value rows are filled directly; rows with several values go through np.mean so the
+    summation order matches the per-row extractors bit for bit.
+    """
+    means = np.zeros(n_rows)
+    if not len(values):
+        return means
+    series = pd.Series(values, index=rows)
+    counts = series.groupby(level=0).size()
+    single = counts.index[counts.to_numpy() == 1]
+    means[single] = series[series.index.isin(single)].to_numpy()
+    multi = series[~series.index.isin(single)]
+    for row, group in multi.groupby(level=0):
+        means[row] = np.mean(list(group))
+    return means
+
+
+def generalized_url_flags(url, url_shorteners, suspicious_tlds):
+    """Per-URL part of extract_generalized_features.
+
+    Returns (ip, non_standard_port, https, shortener, suspicious_tld, entropy, suspicious_pattern);
+    entropy is None when the URL has no domain. Flags set before a parsing error are kept, as in
+    the per-message loop.
+    """
+    ip = port = https = shortener = tld_flag = pattern = 0
+    entropy = None
+    try:
+        netloc = url_host(url)
+        if is_ip_address(netloc.split(':')[0]):
+            ip = 1
+        if ':' in netloc and netloc.split(':')[-1].isdigit():
+            if int(netloc.split(':')[-1]) not in [80, 443]:
+                port = 1
+        if url.startswith('https://'):
+            https = 1
+        extracted = public_suffix.extract(netloc)
+        domain = extracted.domain
+        tld = extracted.suffix
+        full_domain = f"{domain}.{tld}" if domain and tld else netloc
+        if full_domain.lower() in url_shorteners:
+            shortener = 1
+        if tld and tld.split('.')[-1].lower() in suspicious_tlds:
+            tld_flag = 1
+        if domain:
+            entropy = calculate_domain_entropy(domain)
+            if has_suspicious_pattern(domain):
+                pattern = 1
+    except Exception:
+        pass
+    return ip, port, https, shortener, tld_flag, entropy, pattern
+
+
+def generalized_feature_frame(texts, url_shorteners, suspicious_tlds):
+    """Vectorized extract_generalized_features over a column of messages.
+
+    Equal to pd.DataFrame([extract_generalized_features(t) for t in texts]) as written in
+    train_generalized_model.py and evaluate.py (same columns, order, dtypes and values).
+    """
+    texts, as_str, blank = text_columns(texts)
+    n = len(texts)
+    present = ~blank.to_numpy()
+    columns = {name: np.zeros(n, dtype=np.int64) for name in GENERALIZED_COLUMNS}
+
+    # Length statistics are reported even for empty/missing rows
+    stats = text_stats(as_str)
+    columns['text_length'] = stats['length']
+    columns['word_count'] = stats['words']
+    columns['digit_ratio'] = ratio(stats['digits'], stats['length'], present)
+    columns['uppercase_ratio'] = ratio(stats['uppers'], stats['length'], present)
+    columns['special_char_ratio'] = ratio(stats['special'], stats['length'], present)
+
+    flags = keyword_flags(as_str.str.lower(), {
+        'has_urgency': GENERALIZED_KEYWORDS.families['urgency'],
+        'has_financial_keywords': GENERALIZED_KEYWORDS.families['financial'],
+        'has_verification_keywords': GENERALIZED_KEYWORDS.families['verification'],
+        'has_prize_keywords': GENERALIZED_KEYWORDS.families['prize'],
+    })
+    for name, flag in flags.items():
+        columns[name] = flag * present
+
+    urls = exploded_urls(as_str, present)
+    url_counts = np.bincount(urls.index.to_numpy(dtype=np.int64), minlength=n)
+    columns['url_count'] = url_counts
+    columns['has_url'] = (url_counts > 0).astype(np.int64)
+    entropy = np.zeros(n)
+    if len(urls):
+        flags = per_unique(urls.to_numpy(), lambda u: generalized_url_flags(u, url_shorteners, suspicious_tlds))
+        rows = urls.index.to_numpy(dtype=np.int64)
+        table = pd.DataFrame(flags, columns=['ip', 'port', 'https', 'shortener', 'tld', 'entropy', 'pattern'])
+        for name, flag in (('has_ip_url', 'ip'), ('has_non_standard_port', 'port'), ('has_https', 'https'),
+                           ('has_url_shortener', 'shortener'), ('has_suspicious_tld', 'tld'),
+                           ('has_suspicious_pattern', 'pattern')):
+            np.maximum.at(columns[name], rows, table[flag].to_numpy(dtype=np.int64))
+        has_domain = table['entropy'].notna().to_numpy()
+        entropy = _row_mean(table['entropy'].to_numpy()[has_domain].astype(float), rows[has_domain], n)
+    columns['avg_domain_entropy'] = entropy
+
+    return pd.DataFrame(columns, columns=GENERALIZED_COLUMNS)
+
+
+def generalized_features(texts, url_shorteners, suspicious_tlds, store_dir=FEATURE_STORE_DIR):
+    """generalized_feature_frame reused from the feature store when texts, lists and version match.
+
+    Returns (frame, hit). store_dir=None always extracts.
+    """
+    return cached_features('generalized', texts, GENERALIZED_FEATURE_VERSION,
+                           lambda column: generalized_feature_frame(column, url_shorteners, suspicious_tlds),
+                           params={'url_shorteners': url_shorteners, 'suspicious_tlds': suspicious_tlds},
+                           store_dir=store_dir)
@@ -0,0 +1,108 @@
+"""
+Typosquatting Lookup Benchmark
+Compares the brand index (brand_index.BrandIndex) with the original linear scan over every
+brand at 100, 1k and 10k brands, and checks both return the same nearest brand and distance.
+
+Usage: python benchmark_typosquatting.py [--queries 2000] [--seed 42]
+"""
+import argparse
+import random
+import string
+import time
+
+from brand_index import BrandIndex
+from extract_features import NORMALIZED_BRANDS, levenshtein_distance
+
+BRAND_COUNTS = [100, 1000, 10000]
+
+
+def linear_nearest(word, brands, max_distance=2):
+    """The original get_typosquatting_features loop: compare against every brand."""
+    best_distance = None
+    best_brand = None
+    for brand in brands:
+        if abs(len(word) - len(brand)) > max_distance:
+            continue
+        distance = levenshtein_distance(word, brand, max_distance=max_distance)
+        if distance is None:
+            continue
+        if best_distance is None or distance < best_distance:
+            best_distance = distance
+            best_brand = brand
+            if distance == 0:
+                break
+    return best_brand, best_distance
+
+
+def make_brands(count, rng):
+    """Real brands padded with random brand-like names up to count."""
+    brands = set(NORMALIZED_BRANDS[:count])
+    while len(brands) < count:
+        length = rng.randint(4, 12)
+        brands.add(''.join(rng.choice(string.ascii_lowercase) for _ in range(length)))
+    return sorted(brands)
+
+
+def make_typo(word, rng):
+    """Apply one or two random edits (substitute, insert, delete)."""
+    for _ in range(rng.randint(1, 2)):
+        i = rng.randrange(len(word) + 1)
+        op = rng.choice('sid')
+        ch = rng.choice(string.ascii_lowercase + string.digits)
+        if op == 's' and i < len(word):
+            word = word[:i] + ch + word[i + 1:]
+        elif op == 'd' and i < len(word) and len(word) > 1:
+            word = word[:i] + word[i + 1:]
+        else:
+            word = word[:i] + ch + word[i:]
+    return word
+
+
+def make_queries(brands, count, rng):
+    """Half typos of known brands, half random registered-domain-like names."""
+    queries = []
+    for _ in range(count):
+        if rng.random() < 0.5:
+            queries.append(make_typo(rng.choice(brands), rng))
+        else:
+            length = rng.randint(3, 20)
+            queries.append(''.join(rng.choice(string.ascii_lowercase + string.digits) for _ in range(length)))
+    return queries
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark brand index vs linear typosquatting scan")
+    parser.add_argument("--queries", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    print("=" * 80)
+    print(f"{'brands':>8} {'build ms':>10} {'linear us/q':>12} {'index us/q':>12} {'speedup':>9} {'match':>7}")
+    print("=" * 80)
+    for count in BRAND_COUNTS:
+        brands = make_brands(count, rng)
+        queries = make_queries(brands, args.queries, rng)
+
+        start = time.perf_counter()
+        index = BrandIndex(brands, levenshtein_distance, max_distance=2)
+        build_ms = (time.perf_counter() - start) * 1000
+
+        start = time.perf_counter()
+        linear = [linear_nearest(q, brands) for q in queries]
+        linear_us = (time.perf_counter() - start) / len(queries) * 1e6
+
+        start = time.perf_counter()
+        indexed = [index.nearest(q) for q in queries]
+        index_us = (time.perf_counter() - start) / len(queries) * 1e6
+
+        match = linear == indexed
+        print(f"{count:>8} {build_ms:>10.1f} {linear_us:>12.1f} {index_us:>12.1f} "
+              f"{linear_us / index_us:>8.1f}x {str(match):>7}")
+        if not match:
+            mismatches = sum(a != b for a, b in zip(linear, indexed))
+            print(f"  ⚠️  {mismatches} queries disagree with the linear scan")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""
+Brand Index
+SymSpell-style deletion index answering "nearest brand within edit distance N" without
+comparing a domain against every brand, so typosquatting checks stay fast as the brand
+list grows into the thousands.
+"""
+
+
+def deletion_variants(word, max_distance):
+    """Return every string obtainable from word by deleting up to max_distance characters."""
+    variants = {word}
+    frontier = {word}
+    for _ in range(max_distance):
+        next_frontier = set()
+        for variant in frontier:
+            for i in range(len(variant)):
+                next_frontier.add(variant[:i] + variant[i + 1:])
+        variants |= next_frontier
+        frontier = next_frontier
+    return variants
+
+
+class BrandIndex:
+    """Deletion dictionary over a brand list.
+
+    Two strings within Levenshtein distance d always share a variant reachable by at most d
+    deletions from each, so a lookup only verifies brands sharing a deletion variant with the
+    query. Build cost is paid once; lookup cost depends on the query length, not the number
+    of brands. `distance(a, b, max_distance)` must return None beyond max_distance.
+    """
+
+    def __init__(self, brands, distance, max_distance=2):
+        self.max_distance = max_distance
+        self.distance = distance
+        self.brands = sorted({brand for brand in brands if brand})
+        self.variants = {}
+        for rank, brand in enumerate(self.brands):
+            for variant in deletion_variants(brand, max_distance):
+                self.variants.setdefault(variant, []).append(rank)
+        lengths = [len(brand) for brand in self.brands]
+        self.min_length = min(lengths) if lengths else 0
+        self.max_length = max(lengths) if lengths else 0
+
+    def __len__(self):
+        return len(self.brands)
+
+    def nearest(self, word):
+        """Return (brand, distance) for the closest brand within max_distance, else (None, None).
+
+        Ties are broken by brand order, matching a linear scan over the sorted brand list.
+        """
+        if not word or not self.brands:
+            return None, None
+        if len(word) > self.max_length + self.max_distance or len(word) < self.min_length - self.max_distance:
+            return None, None
+        candidates = set()
+        for variant in deletion_variants(word, self.max_distance):
+            ranks = self.variants.get(variant)
+            if ranks:
+                candidates.update(ranks)
+        best_rank, best_distance = None, None
+        for rank in sorted(candidates):
+            distance = self.distance(word, self.brands[rank], max_distance=self.max_distance)
+            if distance is None:
+                continue
+            if best_distance is None or distance < best_distance:
+                best_rank, best_distance = rank, distance
+                if distance == 0:
+                    break
+        if best_rank is None:
+            return None, None
+        return self.brands[best_rank], best_distance
@@ -0,0 +1,29 @@
+"""
+Domain Analysis Cache
+Bounded per-host memo for the domain-analysis part of feature extraction (public suffix split,
+entropy, pattern, reputation and typosquatting checks). Real traffic repeats the same few
+thousand hosts, so each is analyzed once and later lookups are a dict hit.
+"""
+from functools import lru_cache
+
+DEFAULT_DOMAIN_CACHE_SIZE = 4096
+
+
+def memoize_hosts(maxsize=DEFAULT_DOMAIN_CACHE_SIZE):
+    """LRU-memoize a host -> record function. Records are shared between callers: do not mutate."""
+    return lru_cache(maxsize=maxsize if maxsize and maxsize > 0 else 0)
+
+
+def cache_stats(cached_function):
+    """Return size, hit rate and eviction counts of a memoize_hosts function."""
+    info = cached_function.cache_info()
+    lookups = info.hits + info.misses
+    return {
+        "size": info.currsize,
+        "max_size": info.maxsize,
+        "hits": info.hits,
+        "misses": info.misses,
+        "hit_rate": round(info.hits / lookups, 4) if lookups else 0.0,
+        # Every miss inserts one record, so misses beyond the current size were evicted
+        "evictions": max(info.misses - info.currsize, 0) if info.maxsize else 0,
+    }
@@ -4,8 +4,10 @@ Advanced features to catch IP-based phishing, URL shorteners, and suspicious dom
 """
 import re
 from urllib.parse import urlparse
-import tldextract
 import pandas as pd
+import public_suffix
+from text_scanner import is_ip_address as is_ipv4
+from domain_cache import memoize_hosts, cache_stats
 
 # Known URL shortener domains
 URL_SHORTENERS = {
@@ -58,31 +60,37 @@ LEGITIMATE_SLD = {
     'amazonaws.com', 'googleusercontent.com', 'cloudflare.com'
 }
 
+# Hosts whose reputation analysis is kept in memory (see analyze_host)
+DOMAIN_CACHE_SIZE = 4096
+
+
+# Explicit URLs only: http(s):// links first, then www. links, as the reputation features were built on
+HTTP_URL_PATTERN = re.compile(r'http[s]?://(?:[a-zA-Z]|[0-9]|[$-_@.&+]|[!*\\(\\),]|(?:%[0-9a-fA-F][0-9a-fA-F]))+')
+WWW_URL_PATTERN = re.compile(r'www\.(?:[a-zA-Z]|[0-9]|[$-_@.&+]|[!*\\(\\),])+')
+
 
 def extract_all_urls(text):
     """Extract all URLs from text."""
     if not text or pd.isna(text):
         return []
     
-    url_pattern = r'http[s]?://(?:[a-zA-Z]|[0-9]|[$-_@.&+]|[!*\\(\\),]|(?:%[0-9a-fA-F][0-9a-fA-F]))+'
-    urls = re.findall(url_pattern, str(text))
+    text = str(text)
+    urls = HTTP_URL_PATTERN.findall(text)
     
     # Also catch www. patterns
-    www_pattern = r'www\.(?:[a-zA-Z]|[0-9]|[$-_@.&+]|[!*\\(\\),])+'
-    www_urls = re.findall(www_pattern, str(text))
-    urls.extend(['http://' + u for u in www_urls])
+    urls.extend(['http://' + u for u in WWW_URL_PATTERN.findall(text)])
     
     return urls
 
 
 def is_ip_address(host):
-    """Check if host is an IP address (IPv4 or IPv6)."""
+    """Check if host is an IP address (IPv4 with optional port, or IPv6)."""
     if not host:
         return False
     
     # IPv4 pattern
-    ipv4_pattern = r'^(\d{1,3}\.){3}\d{1,3}(:\d+)?$'
-    if re.match(ipv4_pattern, host):
+    ip, _, port = host.partition(':')
+    if is_ipv4(ip) and (not port or port.isdigit()):
         return True
     
     # IPv6 pattern (simplified)
@@ -136,6 +144,82 @@ def has_non_standard_port(url):
     return False
 
 
+@memoize_hosts(DOMAIN_CACHE_SIZE)
+def analyze_host(netloc):
+    """Host-only reputation features for one URL netloc, memoized per netloc.
+    
+    The returned record is shared between calls and must not be mutated.
+    """
+    import math
+    
+    features = {
+        'has_ip_url': 0,
+        'has_private_ip': 0,
+        'has_url_shortener': 0,
+        'has_suspicious_tld': 0,
+        'has_legitimate_domain': 0,
+        'domain_entropy': 0.0,
+        'subdomain_count': 0,
+    }
+    host = netloc.split(':')[0]  # Remove port
+    
+    # IP address detection
+    if is_ip_address(host):
+        features['has_ip_url'] = 1
+        if is_private_ip(host):
+            features['has_private_ip'] = 1
+    
+    # Extract domain components
+    ext = public_suffix.extract(netloc)
+    domain = ext.domain
+    tld = ext.suffix
+    subdomain = ext.subdomain
+    
+    # URL shortener detection
+    full_domain = f"{domain}.{tld}" if domain and tld else host
+    if full_domain.lower() in URL_SHORTENERS:
+        features['has_url_shortener'] = 1
+    
+    # Suspicious TLD
+    if tld and tld.lower() in SUSPICIOUS_TLDS:
+        features['has_suspicious_tld'] = 1
+    
+    # Legitimate domain check
+    if full_domain.lower() in LEGITIMATE_DOMAINS:
+        features['has_legitimate_domain'] = 1
+    
+    # Check second-level domain (e.g., github.io)
+    if subdomain and domain and tld:
+        sld = f"{domain}.{tld}".lower()
+        if sld in LEGITIMATE_SLD:
+            features['has_legitimate_domain'] = 1
+    
+    # Domain entropy (randomness)
+    if domain:
+        domain_lower = domain.lower()
+        freq = {}
+        for char in domain_lower:
+            freq[char] = freq.get(char, 0) + 1
+        
+        entropy = 0.0
+        for count in freq.values():
+            prob = count / len(domain_lower)
+            entropy -= prob * math.log2(prob)
+        
+        features['domain_entropy'] = entropy
+    
+    # Subdomain count
+    if subdomain:
+        features['subdomain_count'] = len(subdomain.split('.'))
+    
+    return features
+
+
+def domain_cache_stats():
+    """Size, hit rate and eviction counts of the per-host analysis cache."""
+    return cache_stats(analyze_host)
+
+
 def extract_domain_features(text):
     """
     Extract advanced domain reputation features.
@@ -180,61 +264,13 @@ def extract_domain_features(text):
     
     try:
         parsed = urlparse(url if url.startswith('http') else 'http://' + url)
-        host = parsed.netloc.split(':')[0]  # Remove port
-        
-        # IP address detection
-        if is_ip_address(host):
-            features['has_ip_url'] = 1
-            if is_private_ip(host):
-                features['has_private_ip'] = 1
         
         # Non-standard port
         if has_non_standard_port(url):
             features['has_non_standard_port'] = 1
         
-        # Extract domain components
-        ext = tldextract.extract(url)
-        domain = ext.domain
-        tld = ext.suffix
-        subdomain = ext.subdomain
-        
-        # URL shortener detection
-        full_domain = f"{domain}.{tld}" if domain and tld else host
-        if full_domain.lower() in URL_SHORTENERS:
-            features['has_url_shortener'] = 1
-        
-        # Suspicious TLD
-        if tld and tld.lower() in SUSPICIOUS_TLDS:
-            features['has_suspicious_tld'] = 1
-        
-        # Legitimate domain check
-        if full_domain.lower() in LEGITIMATE_DOMAINS:
-            features['has_legitimate_domain'] = 1
-        
-        # Check second-level domain (e.g., github.io)
-        if subdomain and domain and tld:
-            sld = f"{domain}.{tld}".lower()
-            if sld in LEGITIMATE_SLD:
-                features['has_legitimate_domain'] = 1
-        
-        # Domain entropy (randomness)
-        if domain:
-            import math
-            domain_lower = domain.lower()
-            freq = {}
-            for char in domain_lower:
-                freq[char] = freq.get(char, 0) + 1
-            
-            entropy = 0.0
-            for count in freq.values():
-                prob = count / len(domain_lower)
-                entropy -= prob * math.log2(prob)
-            
-            features['domain_entropy'] = entropy
-        
-        # Subdomain count
-        if subdomain:
-            features['subdomain_count'] = len(subdomain.split('.'))
+        # IP, shortener, TLD, reputation, entropy and subdomains (memoized per host)
+        features.update(analyze_host(parsed.netloc))
         
         # URL path length
         if parsed.path:
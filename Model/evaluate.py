@@ -23,10 +23,7 @@ import os
 import time
 import hashlib
 import random
-import re
-import math
 from pathlib import Path
-from urllib.parse import urlparse
 
 import numpy as np
 import pandas as pd
@@ -40,7 +37,12 @@ import matplotlib
 matplotlib.use('Agg')  # headless backend for CI / server environments
 import matplotlib.pyplot as plt
 import seaborn as sns
-import tldextract
+
+import public_suffix
+from text_scanner import URL_SHORTENERS, SUSPICIOUS_TLDS, extract_all_urls, url_host, calculate_domain_entropy, is_ip_address, has_suspicious_pattern, preprocess as preprocess_text
+from keyword_automaton import GENERALIZED_KEYWORDS
+from batch_features import generalized_features
+from feature_store import FEATURE_STORE_DIR
 
 try:
     from lime.lime_text import LimeTextExplainer
@@ -52,60 +54,10 @@ RANDOM_SEED = 42
 np.random.seed(RANDOM_SEED)
 random.seed(RANDOM_SEED)
 
-# --- Feature Extraction Logic (Copied from train_generalized_model.py) ---
-URL_SHORTENERS = {
-    'bit.ly', 'tinyurl.com', 'goo.gl', 'ow.ly', 't.co', 'is.gd', 'buff.ly',
-    'adf.ly', 'bit.do', 'mcaf.ee', 'su.pr', 'tiny.cc', 'tr.im', 'cli.gs',
-    'x.co', 'shorturl.at', 'cutt.ly', 'rb.gy', 'short.io', 'tiny.one',
-    'qrco.de', 'q-r.to', 'clk.sh', 's.id', 'rebrand.ly', 'bl.ink'
-}
-
-SUSPICIOUS_TLDS = {
-    'xyz', 'top', 'club', 'work', 'click', 'link', 'online', 'site',
-    'website', 'space', 'tech', 'store', 'business', 'tk', 'ml', 'ga',
-    'cf', 'gq', 'pw', 'cc', 'info', 'ws', 'su', 'icu', 'bid', 'loan'
-}
-
-def extract_all_urls(text):
-    if not text or pd.isna(text):
-        return []
-    url_pattern = r'https?://[^\s]+|www\.[^\s]+|[a-zA-Z0-9-]+\.[a-zA-Z]{2,}(?:/[^\s]*)?'
-    return re.findall(url_pattern, str(text))
-
-def is_ip_address(domain):
-    if not domain:
-        return False
-    return bool(re.match(r'^\d{1,3}\.\d{1,3}\.\d{1,3}\.\d{1,3}$', domain))
-
-def calculate_domain_entropy(domain):
-    if not domain or len(domain) < 3:
-        return 0.0
-    freq = {}
-    for char in domain:
-        freq[char] = freq.get(char, 0) + 1
-    entropy = 0.0
-    for count in freq.values():
-        p = count / len(domain)
-        entropy -= p * math.log2(p)
-    return entropy
-
-def has_suspicious_pattern(domain):
-    if not domain:
-        return False
-    domain_lower = domain.lower()
-    if domain_lower.count('-') >= 2:
-        return True
-    if re.search(r'[a-z]\d[a-z]|\d[a-z]\d', domain_lower):
-        return True
-    suspicious_suffixes = ['secure', 'verify', 'login', 'account', 'update', 
-                          'confirm', 'alert', 'support', 'service', 'online']
-    for suffix in suspicious_suffixes:
-        if domain_lower.endswith(suffix):
-            return True
-    if len(domain_lower.split('.')[0]) > 20:
-        return True
-    return False
+# Below this many texts prepare_features builds feature rows one by one (lower fixed overhead)
+BATCH_FEATURES_MIN_ROWS = 64
 
+# --- Feature Extraction Logic (Copied from train_generalized_model.py) ---
 def extract_generalized_features(text):
     features = {
         'has_url': 0, 'url_count': 0, 'has_ip_url': 0, 'has_url_shortener': 0,
@@ -130,14 +82,13 @@ def extract_generalized_features(text):
         entropy_values = []
         for url in urls:
             try:
-                parsed = urlparse(url if url.startswith('http') else f'http://{url}')
-                netloc = parsed.netloc or parsed.path.split('/')[0]
+                netloc = url_host(url)
                 if is_ip_address(netloc.split(':')[0]): features['has_ip_url'] = 1
                 if ':' in netloc and netloc.split(':')[-1].isdigit():
                     port = int(netloc.split(':')[-1])
                     if port not in [80, 443]: features['has_non_standard_port'] = 1
                 if url.startswith('https://'): features['has_https'] = 1
-                extracted = tldextract.extract(url)
+                extracted = public_suffix.extract(netloc)
                 domain = extracted.domain
                 tld = extracted.suffix
                 full_domain = f"{domain}.{tld}" if domain and tld else netloc
@@ -157,29 +108,14 @@ def extract_generalized_features(text):
         features['uppercase_ratio'] = upper_count / len(text_str)
         features['special_char_ratio'] = special_count / len(text_str)
     
-    urgency_keywords = ['urgent', 'immediately', 'now', 'act now', 'limited time', 'expire', 'suspended', 'locked', 'frozen']
-    features['has_urgency'] = 1 if any(kw in text_lower for kw in urgency_keywords) else 0
-    financial_keywords = ['bank', 'account', 'card', 'payment', 'money', 'transfer', 'refund', 'prize', 'win', 'won', 'claim', 'reward']
-    features['has_financial_keywords'] = 1 if any(kw in text_lower for kw in financial_keywords) else 0
-    verification_keywords = ['verify', 'verification', 'confirm', 'validate', 'authenticate', 'code', 'otp', 'pin']
-    features['has_verification_keywords'] = 1 if any(kw in text_lower for kw in verification_keywords) else 0
-    prize_keywords = ['congratulations', 'winner', 'selected', 'prize', 'gift', 'free']
-    features['has_prize_keywords'] = 1 if any(kw in text_lower for kw in prize_keywords) else 0
+    kw = GENERALIZED_KEYWORDS.hits(text_lower)
+    features['has_urgency'] = kw['urgency']
+    features['has_financial_keywords'] = kw['financial']
+    features['has_verification_keywords'] = kw['verification']
+    features['has_prize_keywords'] = kw['prize']
     
     return features
 
-def preprocess_text(text):
-    if not text or pd.isna(text): return ""
-    text = str(text).lower()
-    text = re.sub(r'https?://[^\s]+', ' URL ', text)
-    text = re.sub(r'www\.[^\s]+', ' URL ', text)
-    text = re.sub(r'[a-zA-Z0-9-]+\.[a-zA-Z]{2,}(?:/[^\s]*)?', ' URL ', text)
-    text = re.sub(r'\S+@\S+', ' EMAIL ', text)
-    text = re.sub(r'\d{10,}', ' PHONE ', text)
-    text = re.sub(r'[^a-z0-9\s]', ' ', text)
-    text = re.sub(r'\s+', ' ', text).strip()
-    return text
-
 # --- End Feature Extraction Logic ---
 
 def parse_args():
@@ -194,6 +130,8 @@ def parse_args():
     ap.add_argument('--adversarial', action='store_true', help='Run robustness adversarial tests')
     ap.add_argument('--text-col', default=None, help='Name of text column (auto-detects text/message if None)')
     ap.add_argument('--label-col', default='label', help='Name of label column')
+    ap.add_argument('--feature-store', default=FEATURE_STORE_DIR, help='Engineered feature cache directory (shared with training)')
+    ap.add_argument('--no-feature-cache', action='store_true', help='Always recompute engineered features')
     return ap.parse_args()
 
 
@@ -261,7 +199,7 @@ def plot_confusion(cm, out_dir):
     plt.close()
 
 
-def prepare_features(texts, vectorizer, scaler=None):
+def prepare_features(texts, vectorizer, scaler=None, feature_store=None):
     # 1. Preprocess text
     processed_texts = [preprocess_text(t) for t in texts]
     
@@ -270,20 +208,23 @@ def prepare_features(texts, vectorizer, scaler=None):
     
     # 3. Feature Extraction (if scaler provided)
     if scaler:
-        feature_dicts = [extract_generalized_features(t) for t in texts]
-        feature_df = pd.DataFrame(feature_dicts)
+        # Column-wise engine for corpora; small batches (single-message latency tests) stay per-row
+        if len(texts) >= BATCH_FEATURES_MIN_ROWS:
+            feature_df, _ = generalized_features(texts, URL_SHORTENERS, SUSPICIOUS_TLDS, store_dir=feature_store)
+        else:
+            feature_df = pd.DataFrame([extract_generalized_features(t) for t in texts])
         X_feat_scaled = scaler.transform(feature_df)
         X_combined = hstack([X_tfidf, csr_matrix(X_feat_scaled)])
         return X_combined
     else:
         return X_tfidf
 
-def cross_validation(texts, y, model, vectorizer, scaler, folds: int) -> Bunch:
+def cross_validation(texts, y, model, vectorizer, scaler, folds: int, feature_store=None) -> Bunch:
     skf = StratifiedKFold(n_splits=folds, shuffle=True, random_state=RANDOM_SEED)
     metrics = []
     
     # Pre-compute features once
-    X = prepare_features(texts, vectorizer, scaler)
+    X = prepare_features(texts, vectorizer, scaler, feature_store)
     
     # Note: This is a simplified CV that re-trains the classifier but re-uses the fixed vectorizer/scaler
     # Ideally, vectorizer/scaler should be fit inside the fold, but we are evaluating a PRE-TRAINED pipeline.
@@ -319,7 +260,6 @@ def generate_global_feature_weights(vectorizer, model, out_dir, top_k=20):
     # For now, we'll just use the vectorizer features and ignore the extra ones for this specific report
     # or try to reconstruct the full feature list
     
-    feature_names = list(vectorizer.get_feature_names_out())
     # Add extra feature names if model coef size > vocab size
     extra_features = [
         'has_url', 'url_count', 'has_ip_url', 'has_url_shortener',
@@ -330,6 +270,13 @@ def generate_global_feature_weights(vectorizer, model, out_dir, top_k=20):
         'has_urgency', 'has_financial_keywords', 'has_verification_keywords', 'has_prize_keywords'
     ]
     
+    try:
+        feature_names = list(vectorizer.get_feature_names_out())
+    except (AttributeError, ValueError):
+        # Hashing vectorizers (train_streaming.py) have no vocabulary: name text columns by bucket
+        n_text = model.coef_.shape[1] - len(extra_features)
+        feature_names = [f'hash_{i}' for i in range(n_text)]
+    
     if model.coef_.shape[1] > len(feature_names):
         feature_names.extend(extra_features)
         
@@ -548,9 +495,10 @@ def main():
     vectorizer_hash = artifact_hash(args.vectorizer)
     
     texts = df[text_col].astype(str).tolist()
+    feature_store = None if args.no_feature_cache else args.feature_store
     
-    # Prepare features (TF-IDF + Engineered)
-    X = prepare_features(texts, vectorizer, scaler)
+    # Prepare features (TF-IDF + Engineered; engineered ones reused from the feature store when cached)
+    X = prepare_features(texts, vectorizer, scaler, feature_store)
 
     # Performance (single pass)
     y_pred = model.predict(X)
@@ -564,7 +512,7 @@ def main():
     if args.cv_folds and args.cv_folds > 1:
         # Retrain inside CV; caution if model is already "final"
         cv_model = joblib.load(args.model)  # fresh instance
-        cv_res = cross_validation(texts, y, cv_model, vectorizer, scaler, args.cv_folds)
+        cv_res = cross_validation(texts, y, cv_model, vectorizer, scaler, args.cv_folds, feature_store)
 
     # Global feature weights
     global_weights = generate_global_feature_weights(vectorizer, model, args.out)
@@ -3,17 +3,21 @@ Step 5: Explicit Feature Engineering with Thresholds
 Extract 40 pattern-based features with explicit rules (no TF-IDF memorization)
 """
 
+import argparse
+import os
+from concurrent.futures import ProcessPoolExecutor
 import pandas as pd
 import numpy as np
 import re
 import math
 from urllib.parse import urlparse
-import tldextract
-from tqdm import tqdm
-
-print("="*80)
-print("🔧 STEP 5: EXPLICIT FEATURE ENGINEERING")
-print("="*80)
+import public_suffix
+from keyword_automaton import KeywordAutomaton
+from brand_index import BrandIndex
+from domain_cache import memoize_hosts, cache_stats
+from feature_store import FEATURE_STORE_DIR, incremental_features
+from batch_features import text_columns, text_stats, keyword_flags, ratio, exploded_urls
+from text_scanner import extract_all_urls as scan_urls, is_ip_address, has_suspicious_pattern as scan_has_suspicious_pattern
 
 # ==================== CONSTANTS ====================
 
@@ -113,29 +117,51 @@ SUSPICIOUS_DOMAIN_PATTERNS = {
     'freegift'
 }
 
+# Hosts whose domain analysis is kept in memory (see analyze_host)
+DOMAIN_CACHE_SIZE = 4096
+
+# Messages per process pool task in extract_features_parallel
+DEFAULT_CHUNKSIZE = 5000
+
+# Feature-code version for the feature store: bump whenever extracted values or columns change
+FEATURE_VERSION = "explicit-1"
+
+# Text keyword families
+URGENCY_KEYWORDS = ['urgent', 'immediately', 'now', 'act now', 'limited time', 
+                    'expire', 'today', 'hurry', 'quickly', 'suspended', 'locked']
+FINANCIAL_KEYWORDS = ['money', 'cash', 'prize', 'winner', 'claim', 'refund',
+                      'payment', 'account', 'bank', 'card', 'transfer', 'deposit']
+VERIFICATION_KEYWORDS = ['verify', 'confirm', 'validate', 'authenticate',
+                         'code', 'otp', 'pin', 'password', 'security']
+PRIZE_KEYWORDS = ['congratulations', 'winner', 'selected', 'won', 'prize', 
+                  'reward', 'gift', 'free', 'bonus', 'lucky']
+
+# Keywords that strengthen a brand mention
+BRAND_URGENCY_WORDS = ['urgent', 'immediately', 'now', 'suspended', 'locked', 
+                       'frozen', 'expire', 'limited', 'act now']
+BRAND_VERIFY_WORDS = ['verify', 'confirm', 'validate', 'authenticate']
+BRAND_FINANCIAL_WORDS = ['account', 'payment', 'card', 'bank', 'transfer', 'money']
+
+# One automaton over every family: a single pass per string instead of one `in` per keyword
+KEYWORDS = KeywordAutomaton({
+    'brand': MAJOR_BRANDS,
+    'urgency': URGENCY_KEYWORDS,
+    'financial': FINANCIAL_KEYWORDS,
+    'verification': VERIFICATION_KEYWORDS,
+    'prize': PRIZE_KEYWORDS,
+    'brand_urgency': BRAND_URGENCY_WORDS,
+    'brand_verify': BRAND_VERIFY_WORDS,
+    'brand_financial': BRAND_FINANCIAL_WORDS,
+    'phishing_suffix': PHISHING_SUFFIXES,
+    'suspicious_domain_pattern': SUSPICIOUS_DOMAIN_PATTERNS,
+    'url_shortener': URL_SHORTENERS,
+})
+
 # ==================== HELPER FUNCTIONS ====================
 
 def extract_all_urls(text):
-    """Extract all URLs from text"""
-    if not text or pd.isna(text):
-        return []
-    text_str = str(text)
-    # Multiple URL patterns
-    patterns = [
-        r'https?://[^\s]+',
-        r'www\.[^\s]+',
-        r'[a-zA-Z0-9-]+\.[a-zA-Z]{2,}(?:/[^\s]*)?'
-    ]
-    urls = []
-    for pattern in patterns:
-        urls.extend(re.findall(pattern, text_str))
-    return list(set(urls))  # Remove duplicates
-
-def is_ip_address(domain):
-    """Check if domain is an IP address"""
-    if not domain:
-        return False
-    return bool(re.match(r'^\d{1,3}\.\d{1,3}\.\d{1,3}\.\d{1,3}$', domain))
+    """Extract all unique URLs from text, in order of appearance"""
+    return list(dict.fromkeys(scan_urls(text)))
 
 def is_private_ip(domain):
     """Check if IP is private (10.x, 192.168.x, 172.16-31.x)"""
@@ -170,41 +196,14 @@ def calculate_domain_entropy(domain):
     return entropy
 
 def has_suspicious_pattern(domain):
-    """Detect suspicious patterns in domain"""
-    if not domain:
-        return False
-    
-    domain_lower = domain.lower()
-    
-    # Pattern 1: Multiple hyphens (2+)
-    if domain_lower.count('-') >= 2:
-        return True
-    
-    # Pattern 2: Number-letter mixing (paypa1, amaz0n)
-    if re.search(r'[a-z]\d[a-z]|\d[a-z]\d', domain_lower):
-        return True
-    
-    # Pattern 3: Phishing suffixes
-    for suffix in PHISHING_SUFFIXES:
-        if suffix in domain_lower:
-            return True
-    
-    # Pattern 4: Unusually long (>20 chars)
-    domain_name = domain_lower.split('.')[0]
-    if len(domain_name) > 20:
-        return True
-    
-    return False
+    """Detect suspicious patterns in domain (phishing suffix anywhere in the name)"""
+    return scan_has_suspicious_pattern(domain, PHISHING_SUFFIXES, anywhere=True)
 
 def has_brand_in_text(text):
     """Check if any major brand is mentioned"""
     if not text:
         return False
-    text_lower = str(text).lower()
-    for brand in MAJOR_BRANDS:
-        if brand in text_lower:
-            return True
-    return False
+    return KEYWORDS.contains_any(str(text).lower(), 'brand')
 
 def extract_domain_from_url(url):
     """Extract domain from URL"""
@@ -225,10 +224,54 @@ def _normalize_token(value):
         return ''
     return re.sub(r'[^a-z0-9]', '', value.lower())
 
-NORMALIZED_BRANDS = [_normalize_token(brand) for brand in MAJOR_BRANDS if _normalize_token(brand)]
+# Sorted so ties between equally close brands resolve the same way on every run
+NORMALIZED_BRANDS = sorted({_normalize_token(brand) for brand in MAJOR_BRANDS if _normalize_token(brand)})
+
+BIT_PARALLEL_MAX_LENGTH = 64
+
+def _bit_parallel_distance(source, target, max_distance):
+    """Myers/Hyyrö bit-vector Levenshtein distance; the shorter string must fit in 64 bits.
+
+    Each character of the longer string updates the whole DP column with a few integer
+    operations instead of an inner loop over the shorter string.
+    """
+    if len(source) < len(target):
+        source, target = target, source
+    length = len(target)
+    if length == 0:
+        distance = len(source)
+        return None if max_distance is not None and distance > max_distance else distance
+    mask = (1 << length) - 1
+    high = 1 << (length - 1)
+    peq = {}
+    for i, ch in enumerate(target):
+        peq[ch] = peq.get(ch, 0) | (1 << i)
+    pv, mv, score = mask, 0, length
+    remaining = len(source)
+    for ch in source:
+        eq = peq.get(ch, 0)
+        xv = eq | mv
+        xh = (((eq & pv) + pv) ^ pv) | eq
+        ph = mv | (~(xh | pv) & mask)
+        mh = pv & xh
+        if ph & high:
+            score += 1
+        elif mh & high:
+            score -= 1
+        ph = ((ph << 1) | 1) & mask
+        mh = (mh << 1) & mask
+        pv = mh | (~(xv | ph) & mask)
+        mv = ph & xv
+        remaining -= 1
+        # Each remaining character can lower the score by at most one
+        if max_distance is not None and score - remaining > max_distance:
+            return None
+    if max_distance is not None and score > max_distance:
+        return None
+    return score
 
 def levenshtein_distance(source, target, max_distance=2):
-    """Compute Levenshtein distance with optional cutoff."""
+    """Compute Levenshtein distance with optional cutoff (None when above max_distance)."""
     if source == target:
         return 0
     if source is None or target is None:
@@ -236,6 +279,8 @@ def levenshtein_distance(source, target, max_distance=2):
     len_src, len_tgt = len(source), len(target)
     if max_distance is not None and abs(len_src - len_tgt) > max_distance:
         return None
+    if min(len_src, len_tgt) <= BIT_PARALLEL_MAX_LENGTH:
+        return _bit_parallel_distance(source, target, max_distance)
     # Ensure source is the longer string for minimal memory usage
     if len_src < len_tgt:
         source, target = target, source
@@ -260,8 +305,11 @@ def levenshtein_distance(source, target, max_distance=2):
         return None
     return distance
 
+# Built once at import: nearest-brand lookups no longer scan every brand
+BRAND_INDEX = BrandIndex(NORMALIZED_BRANDS, levenshtein_distance, max_distance=2)
+
 def get_typosquatting_features(domain):
-    """Detect brand typosquatting via Levenshtein distance."""
+    """Detect brand typosquatting via Levenshtein distance to the nearest brand."""
     features = {
         'typoquatting_detected': 0,
         'typoquatting_distance': 3,
@@ -270,21 +318,7 @@ def get_typosquatting_features(domain):
     normalized_domain = _normalize_token(domain)
     if not normalized_domain:
         return features
-    best_distance = None
-    best_brand = ''
-    for brand in NORMALIZED_BRANDS:
-        if not brand:
-            continue
-        if abs(len(normalized_domain) - len(brand)) > 2:
-            continue
-        distance = levenshtein_distance(normalized_domain, brand, max_distance=2)
-        if distance is None:
-            continue
-        if best_distance is None or distance < best_distance:
-            best_distance = distance
-            best_brand = brand
-            if distance == 0:
-                break
+    best_brand, best_distance = BRAND_INDEX.nearest(normalized_domain)
     if best_distance is not None and 0 < best_distance <= 2:
         features['typoquatting_detected'] = 1
         features['typoquatting_distance'] = best_distance
@@ -298,6 +332,121 @@ def get_registered_domain(extracted, fallback_domain):
         return f"{extracted.domain}.{extracted.suffix}".lower()
     return (fallback_domain or '').lower()
 
+@memoize_hosts(DOMAIN_CACHE_SIZE)
+def analyze_host(netloc):
+    """Analyze one URL host: registered domain, suffix and every host-only domain feature.
+
+    Memoized per netloc string (hit rate and evictions via domain_cache_stats()); the
+    returned record is shared between calls and must not be mutated.
+    """
+    domain_with_port = netloc.split(':')[0]
+    extracted = public_suffix.extract(netloc)
+    domain = extracted.domain
+    tld = extracted.suffix
+    registered_domain = get_registered_domain(extracted, domain_with_port)
+    subdomain_lower = extracted.subdomain.lower() if extracted.subdomain else ''
+    features = {
+        'domain_entropy': 0.0,
+        'high_entropy': 0,
+        'has_multiple_hyphens': 0,
+        'has_number_substitution': 0,
+        'has_phishing_suffix': 0,
+        'unusually_long_domain': 0,
+        'has_suspicious_tld': 0,
+        'is_url_shortener': 0,
+        'subdomain_count': 0,
+        'many_subdomains': 0,
+        'trusted_domain': 0,
+        'blacklisted_domain': 0,
+        'suspicious_domain_pattern': 0,
+        'suspicious_subdomain_pattern': 0,
+        'typoquatting_detected': 0,
+        'typoquatting_distance': 3,
+        'typoquatting_char_substitution': 0,
+    }
+
+    # Domain entropy (EXPLICIT THRESHOLD)
+    if domain:
+        entropy = calculate_domain_entropy(domain)
+        features['domain_entropy'] = entropy
+        features['high_entropy'] = 1 if entropy > 3.5 else 0
+
+        # Pattern detection
+        domain_lower = domain.lower()
+
+        # Multiple hyphens (EXPLICIT: >= 2)
+        if domain_lower.count('-') >= 2:
+            features['has_multiple_hyphens'] = 1
+
+        # Number substitution
+        if re.search(r'[a-z]\d[a-z]|\d[a-z]\d', domain_lower):
+            features['has_number_substitution'] = 1
+
+        # Phishing suffixes
+        if KEYWORDS.contains_any(domain_lower, 'phishing_suffix'):
+            features['has_phishing_suffix'] = 1
+
+        # Long domain (EXPLICIT: > 20)
+        if len(domain) > 20:
+            features['unusually_long_domain'] = 1
+        # Typosquatting detection
+        features.update(get_typosquatting_features(domain))
+
+    # TLD checks
+    if tld:
+        tld_last = tld.split('.')[-1].lower()
+        if tld_last in SUSPICIOUS_TLDS:
+            features['has_suspicious_tld'] = 1
+
+    # URL shortener
+    full_domain = f"{domain}.{tld}" if domain and tld else domain_with_port
+    if KEYWORDS.contains_any(full_domain.lower(), 'url_shortener'):
+        features['is_url_shortener'] = 1
+
+    # Reputation lists
+    if registered_domain:
+        if registered_domain in TRUSTED_DOMAINS:
+            features['trusted_domain'] = 1
+        if registered_domain in BLOCKED_DOMAINS:
+            features['blacklisted_domain'] = 1
+        if not features['trusted_domain'] and KEYWORDS.contains_any(registered_domain, 'suspicious_domain_pattern'):
+            features['suspicious_domain_pattern'] = 1
+    if subdomain_lower and not features['trusted_domain']:
+        if KEYWORDS.contains_any(subdomain_lower, 'suspicious_domain_pattern'):
+            features['suspicious_subdomain_pattern'] = 1
+
+    # Subdomain count (EXPLICIT: > 2)
+    subdomain_count = extracted.subdomain.count('.') + (1 if extracted.subdomain else 0)
+    features['subdomain_count'] = subdomain_count
+    if subdomain_count > 2:
+        features['many_subdomains'] = 1
+
+    # Host part of the reputation score (HTTPS is added per URL)
+    reputation = 0.0
+    if features['trusted_domain']:
+        reputation += 2.0
+    if features['blacklisted_domain']:
+        reputation -= 3.0
+    if features['suspicious_domain_pattern'] or features['suspicious_subdomain_pattern']:
+        reputation -= 1.0
+    if features['has_suspicious_tld']:
+        reputation -= 1.0
+    if features['is_url_shortener']:
+        reputation -= 1.0
+
+    return {
+        'domain': domain,
+        'suffix': tld,
+        'subdomain': extracted.subdomain,
+        'registered_domain': registered_domain,
+        'reputation': reputation,
+        'features': features,
+    }
+
+def domain_cache_stats():
+    """Size, hit rate and eviction counts of the per-host analysis cache."""
+    return cache_stats(analyze_host)
+
 # ==================== FEATURE EXTRACTION ====================
 
 def extract_domain_features(text):
@@ -358,7 +507,14 @@ def extract_domain_features(text):
         return features
     
     # Analyze first URL (most important)
-    url = urls[0]
+    features.update(url_domain_features(urls[0]))
+    
+    return features
+
+def url_domain_features(url):
+    """Domain features of a message's primary URL (everything extract_domain_features derives from it)"""
+    features = {}
+    original_url = url
     
     try:
         # Parse URL
@@ -387,92 +543,21 @@ def extract_domain_features(text):
                 pass
         
         # HTTPS check
-        if urls[0].startswith('https://'):
+        if original_url.startswith('https://'):
             features['has_https'] = 1
         
-        # Extract domain parts
-        extracted = tldextract.extract(url)
-        domain = extracted.domain
-        tld = extracted.suffix
-        registered_domain = get_registered_domain(extracted, domain_with_port)
-        subdomain_lower = extracted.subdomain.lower() if extracted.subdomain else ''
-        
-        # Domain entropy (EXPLICIT THRESHOLD)
-        if domain:
-            entropy = calculate_domain_entropy(domain)
-            features['domain_entropy'] = entropy
-            features['high_entropy'] = 1 if entropy > 3.5 else 0
-            
-            # Pattern detection
-            domain_lower = domain.lower()
-            
-            # Multiple hyphens (EXPLICIT: >= 2)
-            if domain_lower.count('-') >= 2:
-                features['has_multiple_hyphens'] = 1
-            
-            # Number substitution
-            if re.search(r'[a-z]\d[a-z]|\d[a-z]\d', domain_lower):
-                features['has_number_substitution'] = 1
-            
-            # Phishing suffixes
-            if any(suffix in domain_lower for suffix in PHISHING_SUFFIXES):
-                features['has_phishing_suffix'] = 1
-            
-            # Long domain (EXPLICIT: > 20)
-            if len(domain) > 20:
-                features['unusually_long_domain'] = 1
-            # Typosquatting detection
-            typo_features = get_typosquatting_features(domain)
-            for key, value in typo_features.items():
-                features[key] = value
-        
-        # TLD checks
-        if tld:
-            tld_last = tld.split('.')[-1].lower()
-            if tld_last in SUSPICIOUS_TLDS:
-                features['has_suspicious_tld'] = 1
-        
-        # URL shortener
-        full_domain = f"{domain}.{tld}" if domain and tld else domain_with_port
-        if any(shortener in full_domain.lower() for shortener in URL_SHORTENERS):
-            features['is_url_shortener'] = 1
-
-        # Reputation lists
-        if registered_domain:
-            if registered_domain in TRUSTED_DOMAINS:
-                features['trusted_domain'] = 1
-            if registered_domain in BLOCKED_DOMAINS:
-                features['blacklisted_domain'] = 1
-            if not features['trusted_domain'] and any(pattern in registered_domain for pattern in SUSPICIOUS_DOMAIN_PATTERNS):
-                features['suspicious_domain_pattern'] = 1
-        if subdomain_lower and not features['trusted_domain']:
-            if any(pattern in subdomain_lower for pattern in SUSPICIOUS_DOMAIN_PATTERNS):
-                features['suspicious_subdomain_pattern'] = 1
-        
+        # Host-level features (memoized per host)
+        record = analyze_host(netloc)
+        features.update(record['features'])
+
         # Path analysis
         features['path_length'] = len(path)
         if len(path) > 50:
             features['suspicious_path'] = 1
-        
-        # Subdomain count (EXPLICIT: > 2)
-        subdomain_count = extracted.subdomain.count('.') + (1 if extracted.subdomain else 0)
-        features['subdomain_count'] = subdomain_count
-        if subdomain_count > 2:
-            features['many_subdomains'] = 1
 
         # Aggregate domain reputation score
-        reputation = 0.0
-        if features['trusted_domain']:
-            reputation += 2.0
-        if features['blacklisted_domain']:
-            reputation -= 3.0
-        if features['suspicious_domain_pattern'] or features['suspicious_subdomain_pattern']:
-            reputation -= 1.0
-        if features['has_suspicious_tld']:
-            reputation -= 1.0
-        if features['is_url_shortener']:
-            reputation -= 1.0
-        if features['has_https']:
+        reputation = record['reputation']
+        if features.get('has_https'):
             reputation += 0.5
         features['domain_reputation_score'] = reputation
             
@@ -481,8 +566,8 @@ def extract_domain_features(text):
     
     return features
 
-def extract_brand_features(text):
-    """Extract 8 brand impersonation features"""
+def extract_brand_features(text, keyword_hits=None):
+    """Extract 8 brand impersonation features (keyword_hits: precomputed KEYWORDS.find of the lowercased text)"""
     
     features = {
         'has_brand_mention': 0,
@@ -498,10 +583,11 @@ def extract_brand_features(text):
     if not text or pd.isna(text):
         return features
     
-    text_lower = str(text).lower()
+    if keyword_hits is None:
+        keyword_hits = KEYWORDS.find(str(text).lower())
     
     # Find mentioned brands
-    mentioned_brands = [brand for brand in MAJOR_BRANDS if brand in text_lower]
+    mentioned_brands = sorted(keyword_hits['brand'])
     features['brand_count'] = len(mentioned_brands)
     features['has_brand_mention'] = 1 if mentioned_brands else 0
     features['multiple_brands'] = 1 if len(mentioned_brands) > 1 else 0
@@ -510,53 +596,50 @@ def extract_brand_features(text):
         return features
     
     # Check for urgency keywords
-    urgency_words = ['urgent', 'immediately', 'now', 'suspended', 'locked', 
-                     'frozen', 'expire', 'limited', 'act now']
-    if any(word in text_lower for word in urgency_words):
+    if keyword_hits['brand_urgency']:
         features['brand_with_urgency'] = 1
     
     # Check for verification keywords
-    verify_words = ['verify', 'confirm', 'validate', 'authenticate']
-    if any(word in text_lower for word in verify_words):
+    if keyword_hits['brand_verify']:
         features['brand_with_verify'] = 1
     
     # Check for financial keywords
-    financial_words = ['account', 'payment', 'card', 'bank', 'transfer', 'money']
-    if any(word in text_lower for word in financial_words):
+    if keyword_hits['brand_financial']:
         features['brand_with_financial'] = 1
     
-    # Check if URL has suspicious patterns
+    # Check if URL has suspicious patterns / matches a mentioned brand
     urls = extract_all_urls(text)
     if urls:
-        for url in urls:
-            domain = extract_domain_from_url(url)
-            if domain and has_suspicious_pattern(domain):
-                features['brand_with_suspicious_domain'] = 1
-                break
-        if mentioned_brands:
-            normalized_mentions = [_normalize_token(brand) for brand in mentioned_brands if _normalize_token(brand)]
-            domain_matches_brand = False
-            for url in urls:
-                domain = extract_domain_from_url(url)
-                if not domain:
-                    continue
-                try:
-                    extracted_domain = tldextract.extract(domain)
-                    normalized_domain = _normalize_token(extracted_domain.domain)
-                except Exception:
-                    normalized_domain = _normalize_token(domain)
-                if not normalized_domain:
-                    continue
-                if any(norm_brand in normalized_domain or normalized_domain in norm_brand for norm_brand in normalized_mentions):
-                    domain_matches_brand = True
-                    break
-            if not domain_matches_brand:
-                features['brand_domain_mismatch'] = 1
+        with_suspicious, mismatch = brand_url_flags(mentioned_brands, [brand_url_profile(url) for url in urls])
+        features['brand_with_suspicious_domain'] = with_suspicious
+        features['brand_domain_mismatch'] = mismatch
     
     return features
 
-def extract_text_features(text):
-    """Extract 12 text-based features"""
+def brand_url_profile(url):
+    """(suspicious domain?, normalized domain label) of one URL, as used by the brand checks"""
+    domain = extract_domain_from_url(url)
+    if not domain:
+        return False, ''
+    try:
+        normalized_domain = _normalize_token(analyze_host(domain)['domain'])
+    except Exception:
+        normalized_domain = _normalize_token(domain)
+    return bool(has_suspicious_pattern(domain)), normalized_domain
+
+def brand_url_flags(mentioned_brands, url_profiles):
+    """(brand_with_suspicious_domain, brand_domain_mismatch) for a message's brands and URL profiles"""
+    with_suspicious = 1 if any(suspicious for suspicious, _ in url_profiles) else 0
+    normalized_mentions = [_normalize_token(brand) for brand in mentioned_brands if _normalize_token(brand)]
+    for _, normalized_domain in url_profiles:
+        if not normalized_domain:
+            continue
+        if any(norm_brand in normalized_domain or normalized_domain in norm_brand for norm_brand in normalized_mentions):
+            return with_suspicious, 0
+    return with_suspicious, 1
+
+def extract_text_features(text, keyword_hits=None):
+    """Extract 12 text-based features (keyword_hits: precomputed KEYWORDS.find of the lowercased text)"""
     
     features = {
         # Length metrics (3)
@@ -607,35 +690,24 @@ def extract_text_features(text):
     if punct_count > 3:
         features['excessive_punctuation'] = 1
     
-    text_lower = text_str.lower()
+    if keyword_hits is None:
+        keyword_hits = KEYWORDS.find(text_str.lower())
     
-    # Urgency keywords
-    urgency = ['urgent', 'immediately', 'now', 'act now', 'limited time', 
-               'expire', 'today', 'hurry', 'quickly', 'suspended', 'locked']
-    features['has_urgency'] = 1 if any(kw in text_lower for kw in urgency) else 0
-    
-    # Financial keywords
-    financial = ['money', 'cash', 'prize', 'winner', 'claim', 'refund',
-                'payment', 'account', 'bank', 'card', 'transfer', 'deposit']
-    features['has_financial'] = 1 if any(kw in text_lower for kw in financial) else 0
-    
-    # Verification keywords
-    verification = ['verify', 'confirm', 'validate', 'authenticate',
-                   'code', 'otp', 'pin', 'password', 'security']
-    features['has_verification'] = 1 if any(kw in text_lower for kw in verification) else 0
-    
-    # Prize keywords
-    prize = ['congratulations', 'winner', 'selected', 'won', 'prize', 
-            'reward', 'gift', 'free', 'bonus', 'lucky']
-    features['has_prize'] = 1 if any(kw in text_lower for kw in prize) else 0
+    # Keyword families (urgency, financial, verification, prize)
+    features['has_urgency'] = 1 if keyword_hits['urgency'] else 0
+    features['has_financial'] = 1 if keyword_hits['financial'] else 0
+    features['has_verification'] = 1 if keyword_hits['verification'] else 0
+    features['has_prize'] = 1 if keyword_hits['prize'] else 0
     
     return features
 
 def extract_all_features(text):
     """Combine all engineered features"""
+    # One keyword pass shared by the brand and text extractors
+    keyword_hits = None if not text or pd.isna(text) else KEYWORDS.find(str(text).lower())
     domain_feats = extract_domain_features(text)
-    brand_feats = extract_brand_features(text)
-    text_feats = extract_text_features(text)
+    brand_feats = extract_brand_features(text, keyword_hits)
+    text_feats = extract_text_features(text, keyword_hits)
     
     # Combine all features
     all_features = {}
@@ -645,9 +717,134 @@ def extract_all_features(text):
     
     return all_features
 
+def extract_feature_frame(texts):
+    """Vectorized extract_all_features over a column of messages (list, array or Series).
+    
+    Same columns, dtypes and values as pd.DataFrame([extract_all_features(t) for t in texts]),
+    but text statistics and keyword flags are computed per column and each distinct URL is
+    analyzed once.
+    """
+    texts, as_str, blank = text_columns(texts)
+    n = len(texts)
+    present = ~blank.to_numpy()
+    defaults = extract_all_features(None)
+    columns = {name: np.full(n, value, dtype=np.float64 if isinstance(value, float) else np.int64)
+               for name, value in defaults.items()}
+    
+    # ---- Domain features: URL counts plus the primary (first) URL of each message ----
+    urls = exploded_urls(as_str, present)
+    rows = urls.index.to_numpy(dtype=np.int64)
+    unique_pairs = pd.DataFrame({'row': rows, 'url': urls.to_numpy()}).drop_duplicates()
+    url_counts = np.bincount(unique_pairs['row'].to_numpy(dtype=np.int64), minlength=n)
+    columns['url_count'] = url_counts
+    columns['has_url'] = (url_counts > 0).astype(np.int64)
+    
+    first = urls[~urls.index.duplicated()]
+    if len(first):
+        codes, uniques = pd.factorize(first.to_numpy())
+        records = [url_domain_features(url) for url in uniques]
+        first_rows = first.index.to_numpy(dtype=np.int64)
+        for name in {key for record in records for key in record}:
+            values = np.array([record.get(name, defaults[name]) for record in records], dtype=columns[name].dtype)
+            columns[name][first_rows] = values[codes]
+    
+    # ---- Text features ----
+    stats = text_stats(as_str)
+    columns['text_length'] = np.where(present, stats['length'], 0)
+    columns['word_count'] = np.where(present, stats['words'], 0)
+    # Total word length is every non-whitespace character
+    columns['avg_word_length'] = ratio(stats['length'] - stats['spaces'], stats['words'], present)
+    columns['digit_ratio'] = ratio(stats['digits'], stats['length'], present)
+    columns['uppercase_ratio'] = ratio(stats['uppers'], stats['length'], present)
+    columns['special_char_ratio'] = ratio(stats['special'], stats['length'], present)
+    columns['excessive_caps'] = (columns['uppercase_ratio'] > 0.3).astype(np.int64)
+    columns['excessive_punctuation'] = ((stats['punctuation'] > 3) & present).astype(np.int64)
+    
+    lowered = as_str.str.lower()
+    flags = keyword_flags(lowered, {family: KEYWORDS.families[family] for family in
+                                    ('urgency', 'financial', 'verification', 'prize', 'brand',
+                                     'brand_urgency', 'brand_verify', 'brand_financial')})
+    for name, family in (('has_urgency', 'urgency'), ('has_financial', 'financial'),
+                         ('has_verification', 'verification'), ('has_prize', 'prize')):
+        columns[name] = flags[family] * present
+    
+    # ---- Brand features: only rows that mention a brand need per-row work ----
+    has_brand = (flags['brand'] * present).astype(bool)
+    brand_rows = np.flatnonzero(has_brand)
+    lowered_values = lowered.to_numpy(dtype=object)
+    mentioned = {row: sorted(KEYWORDS.find(lowered_values[row])['brand']) for row in brand_rows.tolist()}
+    brand_counts = np.zeros(n, dtype=np.int64)
+    brand_counts[brand_rows] = [len(mentioned[row]) for row in brand_rows.tolist()]
+    columns['brand_count'] = brand_counts
+    columns['has_brand_mention'] = has_brand.astype(np.int64)
+    columns['multiple_brands'] = (brand_counts > 1).astype(np.int64)
+    for name, family in (('brand_with_urgency', 'brand_urgency'), ('brand_with_verify', 'brand_verify'),
+                         ('brand_with_financial', 'brand_financial')):
+        columns[name] = flags[family] * has_brand
+    
+    pair_rows = unique_pairs['row'].to_numpy(dtype=np.int64)
+    pair_urls = unique_pairs['url'].to_numpy(dtype=object)
+    keep = has_brand[pair_rows]
+    pair_rows, pair_urls = pair_rows[keep].tolist(), pair_urls[keep].tolist()
+    profiles = {url: brand_url_profile(url) for url in set(pair_urls)}
+    row_profiles = {}
+    for row, url in zip(pair_rows, pair_urls):
+        row_profiles.setdefault(row, []).append(profiles[url])
+    for row, url_profiles in row_profiles.items():
+        with_suspicious, mismatch = brand_url_flags(mentioned[row], url_profiles)
+        columns['brand_with_suspicious_domain'][row] = with_suspicious
+        columns['brand_domain_mismatch'][row] = mismatch
+    
+    return pd.DataFrame(columns, columns=list(defaults))
+
+def extract_features_parallel(texts, workers=1, chunksize=DEFAULT_CHUNKSIZE):
+    """extract_feature_frame over a process pool, one chunk of rows per task.
+    
+    Rows are independent, so the chunk frames are concatenated in input order and the result
+    equals extract_feature_frame(texts). Each worker builds the keyword automaton, brand index
+    and suffix trie once, when it imports this module (forked workers inherit the parent's).
+    """
+    texts = pd.Series(texts, dtype=object).reset_index(drop=True)
+    chunksize = max(int(chunksize), 1)
+    chunks = [texts.iloc[start:start + chunksize] for start in range(0, len(texts), chunksize)]
+    if workers <= 1 or len(chunks) <= 1:
+        return extract_feature_frame(texts)
+    with ProcessPoolExecutor(max_workers=min(workers, len(chunks))) as pool:
+        frames = list(pool.map(extract_feature_frame, chunks))
+    return pd.concat(frames, ignore_index=True)
+
 # ==================== MAIN PROCESSING ====================
 
+def parse_args():
+    ap = argparse.ArgumentParser(description="Extract explicit features for the domain-stratified train/test splits")
+    ap.add_argument('--workers', type=int, default=1, help='Feature extraction processes (0 = one per CPU core)')
+    ap.add_argument('--chunksize', type=int, default=DEFAULT_CHUNKSIZE, help='Messages per worker task')
+    ap.add_argument('--feature-store', default=FEATURE_STORE_DIR, help='Feature cache directory')
+    ap.add_argument('--no-cache', action='store_true', help='Extract every message, bypassing the feature store')
+    return ap.parse_args()
+
+def explicit_features(texts, workers=1, chunksize=DEFAULT_CHUNKSIZE, store_dir=FEATURE_STORE_DIR):
+    """Explicit feature frame for texts, extracting only messages the feature store has not seen.
+    
+    The store keeps one row per distinct message for the current FEATURE_VERSION, so an appended
+    corpus only pays for its new messages. Returns (frame, new_rows), new_rows being the number
+    of messages extracted; store_dir=None always extracts everything.
+    """
+    extract = lambda column: extract_features_parallel(column, workers, chunksize)
+    if store_dir is None:
+        frame = extract(texts)
+        return frame, len(frame)
+    return incremental_features('explicit', texts, FEATURE_VERSION, extract, store_dir=store_dir)
+
 if __name__ == "__main__":
+    args = parse_args()
+    workers = args.workers if args.workers > 0 else (os.cpu_count() or 1)
+    store_dir = None if args.no_cache else args.feature_store
+    
+    print("="*80)
+    print("🔧 STEP 5: EXPLICIT FEATURE ENGINEERING")
+    print("="*80)
+    
     print("\n📂 Loading train/test datasets...")
     
     train_df = pd.read_csv('Datasets/train_domain_stratified.csv')
@@ -657,14 +854,13 @@ if __name__ == "__main__":
     print(f"✓ Test: {len(test_df):,} messages")
     
     # Extract features
-    print("\n🔧 Extracting features from TRAIN set...")
-    tqdm.pandas(desc="Processing")
-    train_features = train_df['text'].progress_apply(extract_all_features)
-    train_features_df = pd.DataFrame(train_features.tolist())
+    print(f"\n🔧 Extracting features from TRAIN set ({workers} worker(s), {args.chunksize:,} messages per chunk)...")
+    train_features_df, new_rows = explicit_features(train_df['text'], workers, args.chunksize, store_dir)
+    print(f"✓ Extracted {new_rows:,} new messages, reused {len(train_features_df) - new_rows:,} from the feature store")
     
     print("\n🔧 Extracting features from TEST set...")
-    test_features = test_df['text'].progress_apply(extract_all_features)
-    test_features_df = pd.DataFrame(test_features.tolist())
+    test_features_df, new_rows = explicit_features(test_df['text'], workers, args.chunksize, store_dir)
+    print(f"✓ Extracted {new_rows:,} new messages, reused {len(test_features_df) - new_rows:,} from the feature store")
     
     print(f"\n✓ Extracted {len(train_features_df.columns)} features")
     print(f"\nFeature list:")
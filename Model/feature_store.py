@@ -0,0 +1,225 @@
+"""
+Feature Store
+On-disk cache of engineered feature frames shared by the pipeline steps. A frame is stored as
+typed Parquet (pickle when pyarrow is missing) under a key made of a hash of the input text
+column, the feature-code version, the bundled public suffix list version and any extractor
+parameters, so a step reuses features only when all of them match and recomputes otherwise.
+
+For corpora that grow by appending, incremental_features keeps one row table per feature version
+keyed by a hash of each message, so only messages not seen before are featurized; new rows go to
+append-only part files instead of rewriting the table.
+"""
+import contextlib
+import hashlib
+import json
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+import public_suffix
+
+try:
+    import pyarrow  # noqa: F401  (Parquet engine)
+    PYARROW_AVAILABLE = True
+except Exception:
+    PYARROW_AVAILABLE = False
+
+# Under Model/Datasets whichever directory a step is launched from
+FEATURE_STORE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'Datasets', 'feature_store')
+STORE_EXTENSION = '.parquet' if PYARROW_AVAILABLE else '.pkl'
+
+# Missing and non-string values can featurize differently from their str() form, so they are tagged apart
+_TEXT_TAG = b't'
+_MISSING_TAG = b'm'
+
+# Column holding each message's hash in incremental row tables
+ROW_HASH_COLUMN = '_text_hash'
+# Part files a row table may collect before incremental_features merges them into one
+ROW_TABLE_MAX_PARTS = 16
+
+
+def _encoded(text):
+    """Bytes identifying a message: a tag for its kind plus str(text)."""
+    if isinstance(text, str):
+        tag = _TEXT_TAG
+    elif text is None or text is pd.NA or (isinstance(text, float) and np.isnan(text)):
+        tag = _MISSING_TAG
+    else:
+        tag = type(text).__name__.encode('ascii') + b':'
+    return tag + str(text).encode('utf-8', 'surrogatepass')
+
+
+def text_fingerprint(texts):
+    """SHA-256 of a text column, order-sensitive and stable across runs and pandas versions."""
+    digest = hashlib.sha256()
+    for encoded in map(_encoded, pd.Series(texts, dtype=object).tolist()):
+        digest.update(len(encoded).to_bytes(8, 'little'))
+        digest.update(encoded)
+    return digest.hexdigest()
+
+
+def row_hashes(texts):
+    """Stable 128-bit hex hash of each message."""
+    return [hashlib.blake2b(encoded, digest_size=16).hexdigest()
+            for encoded in map(_encoded, pd.Series(texts, dtype=object).tolist())]
+
+
+def version_key(version, params=None):
+    """Hash of everything besides the texts that decides feature values."""
+    spec = {
+        'version': version,
+        'psl_version': public_suffix.PSL_VERSION,
+        'params': params or {},
+    }
+    # Sets (shortener / TLD lists) are keyed by their sorted contents
+    payload = json.dumps(spec, sort_keys=True, default=sorted)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def store_key(texts, version, params=None):
+    """Cache key for the features of texts under one feature-code version and parameter set."""
+    payload = text_fingerprint(texts) + version_key(version, params)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def store_path(name, key, store_dir=FEATURE_STORE_DIR):
+    return os.path.join(store_dir, f"{name}-{key[:24]}{STORE_EXTENSION}")
+
+
+def load_features(name, key, store_dir=FEATURE_STORE_DIR):
+    """Stored frame for (name, key), or None if there is none or it cannot be read."""
+    return _read_frame(store_path(name, key, store_dir))
+
+
+def _read_frame(path):
+    if not os.path.exists(path):
+        return None
+    try:
+        if PYARROW_AVAILABLE:
+            return pd.read_parquet(path)
+        return pd.read_pickle(path)
+    except Exception as e:
+        print(f"⚠️ Ignoring unreadable feature store entry {path}: {e}")
+        return None
+
+
+def save_features(frame, name, key, store_dir=FEATURE_STORE_DIR):
+    """Write frame for (name, key); written to a temporary file first so readers never see half a file."""
+    os.makedirs(store_dir, exist_ok=True)
+    return _write_frame(frame, store_path(name, key, store_dir))
+
+
+def _write_frame(frame, path):
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    frame = frame.reset_index(drop=True)
+    if PYARROW_AVAILABLE:
+        frame.to_parquet(tmp_path, index=False)
+    else:
+        frame.to_pickle(tmp_path)
+    os.replace(tmp_path, path)
+    return path
+
+
+def cached_features(name, texts, version, compute, params=None, store_dir=FEATURE_STORE_DIR):
+    """Return (frame, hit): the stored features of texts, or compute(texts) stored for next time.
+
+    store_dir=None disables the store and always computes.
+    """
+    if store_dir is None:
+        return compute(texts), False
+    key = store_key(texts, version, params)
+    frame = load_features(name, key, store_dir)
+    if frame is not None and len(frame) == len(texts):
+        return frame, True
+    frame = compute(texts)
+    save_features(frame, name, key, store_dir)
+    return frame, False
+
+
+def row_table_dir(name, version, params=None, store_dir=FEATURE_STORE_DIR):
+    return os.path.join(store_dir, f"{name}-rows-{version_key(version, params)[:24]}")
+
+
+def _row_parts(table_dir):
+    if not os.path.isdir(table_dir):
+        return []
+    return sorted(os.path.join(table_dir, entry) for entry in os.listdir(table_dir)
+                  if entry.startswith('part-') and entry.endswith(STORE_EXTENSION))
+
+
+def _read_rows(parts, hashes=None):
+    """Rows of the part files, only those whose hash is in hashes (all rows when hashes is None)."""
+    frames = []
+    for part in parts:
+        frame = _read_frame(part)
+        if frame is None:
+            continue
+        if hashes is not None:
+            # Plain set lookups: Series.isin is far slower on Arrow-backed string columns
+            frame = frame[[row_hash in hashes for row_hash in frame[ROW_HASH_COLUMN].tolist()]]
+        frames.append(frame)
+    if not frames:
+        return None
+    # Concurrent runs can store the same message twice; any copy will do
+    return pd.concat(frames, ignore_index=True).drop_duplicates(ROW_HASH_COLUMN, ignore_index=True)
+
+
+def _write_part(frame, table_dir):
+    os.makedirs(table_dir, exist_ok=True)
+    path = os.path.join(table_dir, f"part-{time.time_ns():020d}-{os.getpid()}{STORE_EXTENSION}")
+    return _write_frame(frame, path)
+
+
+def compact_row_table(table_dir):
+    """Merge a row table's part files into one; returns the number of parts merged.
+
+    The merged part is written before the old ones are removed, so concurrent readers at worst see
+    a message twice, never lose one; parts a concurrent compaction already removed are skipped.
+    """
+    parts = _row_parts(table_dir)
+    if len(parts) < 2:
+        return 0
+    rows = _read_rows(parts)
+    if rows is not None:
+        _write_part(rows, table_dir)
+    for part in parts:
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(part)
+    return len(parts)
+
+
+def incremental_features(name, texts, version, compute, params=None, store_dir=FEATURE_STORE_DIR):
+    """Return (frame, new_rows): features of texts, featurizing only messages not already stored.
+
+    The row table for (name, version, params) is a directory of append-only part files holding one
+    feature row per distinct message hash. Only the rows of texts are read back; messages missing
+    from the table are computed with compute(texts) and written as a new part, so existing parts
+    are never rewritten (once there are more than ROW_TABLE_MAX_PARTS they are compacted into one).
+    A new feature-code version (or suffix list / parameters) selects a fresh table, so nothing
+    stale is reused.
+    """
+    hashes = row_hashes(texts)
+    table_dir = row_table_dir(name, version, params, store_dir)
+    parts = _row_parts(table_dir)
+    table = _read_rows(parts, set(hashes)) if hashes else None
+    known = set(table[ROW_HASH_COLUMN]) if table is not None else set()
+
+    # First occurrence of every message not in the table yet, in input order
+    first_new = {}
+    for position, row_hash in enumerate(hashes):
+        if row_hash not in known and row_hash not in first_new:
+            first_new[row_hash] = position
+    if first_new or table is None:
+        values = pd.Series(texts, dtype=object).reset_index(drop=True)
+        new_rows = compute(values.iloc[list(first_new.values())]).reset_index(drop=True)
+        new_rows.insert(0, ROW_HASH_COLUMN, list(first_new))
+        table = new_rows if table is None else pd.concat([table, new_rows], ignore_index=True)
+        if first_new:
+            _write_part(new_rows, table_dir)
+            if len(parts) + 1 > ROW_TABLE_MAX_PARTS:
+                compact_row_table(table_dir)
+
+    frame = table.iloc[pd.Index(table[ROW_HASH_COLUMN]).get_indexer(hashes)]
+    return frame.drop(columns=ROW_HASH_COLUMN).reset_index(drop=True), len(first_new)
@@ -0,0 +1,180 @@
+#!/usr/bin/env python
+"""Vocabulary-free serving vectorizer for the generalized model.
+
+Usage:
+python hashed_vectorizer.py --artifacts artifacts [--n-features 4194304] [--check Datasets/unified_ml_dataset_val.csv]
+
+Converts the trained TfidfVectorizer + LogisticRegression into a HashedTfidfVectorizer and a model
+whose text weights are remapped from vocabulary columns to hash buckets. The bucket count is fixed;
+only buckets some vocabulary term hashes to are stored (sorted bucket ids with their IDF), so the
+artifacts and the model's coefficients scale with the vocabulary, not with n_features. Terms that
+share a bucket are accepted: the bucket's weight is the sum of their weights and its IDF their mean.
+N-grams in no occupied bucket drop out as out-of-vocabulary n-grams did; an unseen n-gram that
+hashes into an occupied bucket is counted as that bucket's terms, which is why the export checks
+prediction agreement on sample messages.
+
+Writes tfidf_vectorizer_generalized_hashed.joblib and scam_detector_generalized_hashed.joblib;
+Deploy/app.py serves them with TEXT_VECTORIZER=hashed.
+"""
+import argparse
+import copy
+from pathlib import Path
+
+import joblib
+import numpy as np
+from scipy.sparse import hstack, csr_matrix
+from sklearn.feature_extraction.text import HashingVectorizer
+from sklearn.preprocessing import normalize
+
+# Only the occupied buckets are stored, so this sets the collision rate, not the memory:
+# 5,000 terms share a bucket about 3 times in 4.2M buckets
+DEFAULT_N_FEATURES = 2 ** 22
+
+HASHED_VECTORIZER_FILE = 'tfidf_vectorizer_generalized_hashed.joblib'
+HASHED_MODEL_FILE = 'scam_detector_generalized_hashed.joblib'
+
+
+class HashedTfidfVectorizer:
+    """TF-IDF over hash buckets, restricted to the buckets in buckets (sorted).
+
+    transform() returns one column per stored bucket, in bucket order: hashed counts (log-scaled
+    with sublinear_tf) times the bucket IDF, then normalized, as TfidfVectorizer.transform does.
+    """
+
+    def __init__(self, hasher, buckets, idf, norm='l2', sublinear_tf=False):
+        self.hasher = hasher
+        self.buckets = np.asarray(buckets, dtype=np.int64)
+        self.idf_ = np.asarray(idf, dtype=np.float64)
+        self.norm = norm
+        self.sublinear_tf = sublinear_tf
+
+    def transform(self, raw_documents):
+        counts = self.hasher.transform(raw_documents).tocsr()
+        # Column of each hashed n-gram's bucket; n-grams past the last stored bucket are checked against it
+        position = np.minimum(np.searchsorted(self.buckets, counts.indices), len(self.buckets) - 1)
+        known = self.buckets[position] == counts.indices
+        # Row offsets after dropping n-grams in unoccupied buckets
+        kept = np.concatenate([[0], np.cumsum(known)])
+        data = counts.data[known].astype(np.float64)
+        if self.sublinear_tf:
+            np.log(data, out=data)
+            data += 1
+        columns = position[known]
+        data *= self.idf_[columns]
+        X = csr_matrix((data, columns, kept[counts.indptr]), shape=(counts.shape[0], len(self.buckets)))
+        return normalize(X, norm=self.norm, copy=False) if self.norm else X
+
+
+def _single_term(term):
+    return [term]
+
+
+def term_buckets(terms, n_features):
+    """Hash bucket of each term, as HashingVectorizer(alternate_sign=False) places it."""
+    hasher = HashingVectorizer(n_features=n_features, analyzer=_single_term, alternate_sign=False, norm=None)
+    return hasher.transform(terms).tocsr().indices
+
+
+def hashing_counterpart(vectorizer, n_features):
+    """HashingVectorizer producing the raw term counts vectorizer counts, hashed instead of looked up."""
+    return HashingVectorizer(
+        n_features=n_features, input=vectorizer.input, encoding=vectorizer.encoding,
+        decode_error=vectorizer.decode_error, strip_accents=vectorizer.strip_accents,
+        lowercase=vectorizer.lowercase, preprocessor=vectorizer.preprocessor,
+        tokenizer=vectorizer.tokenizer, stop_words=vectorizer.stop_words,
+        token_pattern=vectorizer.token_pattern, ngram_range=vectorizer.ngram_range,
+        analyzer=vectorizer.analyzer, binary=vectorizer.binary,
+        alternate_sign=False, norm=None, dtype=vectorizer.dtype,
+    )
+
+
+def export_hashed(vectorizer, model, n_features=DEFAULT_N_FEATURES):
+    """Return (hashed_vectorizer, hashed_model, collisions) approximating (vectorizer, model).
+
+    The model's coefficients for the text columns move to their terms' buckets (summed where terms
+    collide); trailing (engineered feature) coefficients and the intercept are kept as they are.
+    collisions is the number of vocabulary terms that share a bucket with an earlier term.
+    """
+    terms = np.array(sorted(vectorizer.vocabulary_, key=vectorizer.vocabulary_.get), dtype=object)
+    n_terms = len(terms)
+    buckets, column = np.unique(term_buckets(terms, n_features), return_inverse=True)
+    terms_per_bucket = np.bincount(column, minlength=len(buckets))
+    idf = np.bincount(column, weights=vectorizer.idf_, minlength=len(buckets)) / terms_per_bucket
+    hashed_vectorizer = HashedTfidfVectorizer(hashing_counterpart(vectorizer, n_features), buckets, idf,
+                                              norm=vectorizer.norm, sublinear_tf=vectorizer.sublinear_tf)
+
+    coef = model.coef_
+    text_coef = np.zeros((coef.shape[0], len(buckets)), dtype=coef.dtype)
+    np.add.at(text_coef, (slice(None), column), coef[:, :n_terms])
+    hashed_model = copy.deepcopy(model)
+    hashed_model.coef_ = np.hstack([text_coef, coef[:, n_terms:]])
+    hashed_model.n_features_in_ = hashed_model.coef_.shape[1]
+    return hashed_vectorizer, hashed_model, n_terms - len(buckets)
+
+
+def check_agreement(texts, vectorizer, model, hashed_vectorizer, hashed_model, features=None):
+    """Compare scam probabilities of both pipelines on preprocessed texts (+ scaled features)."""
+    X = vectorizer.transform(texts)
+    X_hashed = hashed_vectorizer.transform(texts)
+    if features is not None:
+        X = hstack([X, csr_matrix(features)])
+        X_hashed = hstack([X_hashed, csr_matrix(features)])
+    proba = model.predict_proba(X)[:, 1]
+    hashed_proba = hashed_model.predict_proba(X_hashed)[:, 1]
+    return {
+        'messages': len(proba),
+        'label_agreement': float(np.mean((proba > 0.5) == (hashed_proba > 0.5))) if len(proba) else 1.0,
+        'max_probability_diff': float(np.max(np.abs(proba - hashed_proba))) if len(proba) else 0.0,
+    }
+
+
+def parse_args():
+    ap = argparse.ArgumentParser(description='Export a vocabulary-free (hashing) serving vectorizer')
+    ap.add_argument('--artifacts', default='artifacts', help='Directory with the generalized artifacts')
+    ap.add_argument('--n-features', type=int, default=DEFAULT_N_FEATURES,
+                    help='Hash buckets (terms that collide share one weight)')
+    ap.add_argument('--check', default=None, help='CSV with a text column to compare predictions on')
+    ap.add_argument('--check-rows', type=int, default=5000, help='Messages from --check to compare')
+    return ap.parse_args()
+
+
+def main():
+    args = parse_args()
+    artifacts = Path(args.artifacts)
+
+    print("=" * 80)
+    print("🔢 Exporting hashed serving vectorizer")
+    print("=" * 80)
+
+    vectorizer = joblib.load(artifacts / 'tfidf_vectorizer_generalized.joblib')
+    model = joblib.load(artifacts / 'scam_detector_generalized.joblib')
+    hashed_vectorizer, hashed_model, collisions = export_hashed(vectorizer, model, args.n_features)
+    print(f"✓ {len(vectorizer.vocabulary_):,} vocabulary terms -> {len(hashed_vectorizer.buckets):,} of "
+          f"{args.n_features:,} buckets ({collisions:,} terms share a bucket)")
+
+    if args.check:
+        import pandas as pd
+        from text_scanner import URL_SHORTENERS, SUSPICIOUS_TLDS, preprocess as preprocess_text
+        from batch_features import generalized_feature_frame
+        texts = pd.read_csv(args.check, nrows=args.check_rows)['text']
+        processed = [preprocess_text(t) for t in texts]
+        features = None
+        scaler_path = artifacts / 'feature_scaler_generalized.joblib'
+        if model.coef_.shape[1] > len(vectorizer.vocabulary_) and scaler_path.exists():
+            scaler = joblib.load(scaler_path)
+            features = scaler.transform(generalized_feature_frame(texts, URL_SHORTENERS, SUSPICIOUS_TLDS))
+        report = check_agreement(processed, vectorizer, model, hashed_vectorizer, hashed_model, features)
+        print(f"✓ Checked {report['messages']:,} messages: label agreement {report['label_agreement']:.4%}, "
+              f"max probability difference {report['max_probability_diff']:.2e}")
+
+    joblib.dump(hashed_vectorizer, artifacts / HASHED_VECTORIZER_FILE)
+    joblib.dump(hashed_model, artifacts / HASHED_MODEL_FILE)
+    for name in (HASHED_VECTORIZER_FILE, HASHED_MODEL_FILE):
+        print(f"💾 {artifacts / name} ({(artifacts / name).stat().st_size / 1024:,.0f} KB)")
+
+
+if __name__ == '__main__':
+    # Run through the module, so the pickled vectorizer refers to hashed_vectorizer.HashedTfidfVectorizer
+    # (which Deploy/app.py can import) rather than __main__.HashedTfidfVectorizer
+    from hashed_vectorizer import main as module_main
+    module_main()
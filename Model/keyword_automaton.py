@@ -0,0 +1,122 @@
+"""
+Keyword Automaton
+Aho-Corasick matcher that finds every keyword family (urgency, financial, brands, ...) in one
+linear pass over a message, so matching cost does not grow with the size of the keyword lists.
+"""
+from collections import deque
+
+try:
+    import ahocorasick  # pyahocorasick: optional C implementation of the same automaton
+    AHOCORASICK_AVAILABLE = True
+except Exception:
+    AHOCORASICK_AVAILABLE = False
+
+
+class KeywordAutomaton:
+    """Multi-pattern substring matcher over named keyword families.
+
+    find(text) reports, per family, every keyword that occurs in text as a substring -
+    the same result as `[k for k in keywords if k in text]` for each family, but computed
+    in a single pass. Keywords are lowercased; callers pass lowercased text.
+    """
+
+    def __init__(self, families):
+        self.families = {name: frozenset(k.lower() for k in keywords if k)
+                         for name, keywords in families.items()}
+        # keyword -> families it belongs to ('prize' can be both financial and prize)
+        self.keyword_families = {}
+        for name, keywords in self.families.items():
+            for keyword in keywords:
+                self.keyword_families.setdefault(keyword, []).append(name)
+
+        if AHOCORASICK_AVAILABLE:
+            self._automaton = ahocorasick.Automaton()
+            for keyword in self.keyword_families:
+                self._automaton.add_word(keyword, keyword)
+            self._automaton.make_automaton()
+        else:
+            self._build()
+
+    def _build(self):
+        """Build the trie, failure links and a full transition table (a DFA) in pure Python."""
+        goto = [{}]
+        outputs = [set()]
+        for keyword in self.keyword_families:
+            state = 0
+            for ch in keyword:
+                nxt = goto[state].get(ch)
+                if nxt is None:
+                    nxt = len(goto)
+                    goto[state][ch] = nxt
+                    goto.append({})
+                    outputs.append(set())
+                state = nxt
+            outputs[state].add(keyword)
+
+        fail = [0] * len(goto)
+        delta = [None] * len(goto)
+        delta[0] = dict(goto[0])
+        queue = deque(goto[0].values())
+        while queue:
+            state = queue.popleft()
+            # Inherit the failure state's transitions, then override with this state's own edges
+            delta[state] = dict(delta[fail[state]])
+            for ch, nxt in goto[state].items():
+                fail[nxt] = delta[fail[state]].get(ch, 0)
+                delta[state][ch] = nxt
+                queue.append(nxt)
+            outputs[state] |= outputs[fail[state]]
+
+        # Bound dict.get per state keeps the hot loop down to one call per character
+        self._step = [transitions.get for transitions in delta]
+        self._outputs = [frozenset(out) if out else None for out in outputs]
+
+    def matched_keywords(self, text):
+        """Return the set of all keywords (from any family) occurring in text."""
+        found = set()
+        if not text:
+            return found
+        if AHOCORASICK_AVAILABLE:
+            for _, keyword in self._automaton.iter(text):
+                found.add(keyword)
+            return found
+        step = self._step
+        outputs = self._outputs
+        state = 0
+        for ch in text:
+            state = step[state](ch, 0)
+            if outputs[state] is not None:
+                found |= outputs[state]
+        return found
+
+    def find(self, text):
+        """Return {family: set of keywords of that family found in text} for every family."""
+        result = {name: set() for name in self.families}
+        for keyword in self.matched_keywords(text):
+            for name in self.keyword_families[keyword]:
+                result[name].add(keyword)
+        return result
+
+    def contains_any(self, text, family):
+        """Return True if any keyword of one family occurs in text."""
+        return any(family in self.keyword_families[keyword] for keyword in self.matched_keywords(text))
+
+    def hits(self, text):
+        """Return {family: 1 if any keyword of that family occurs in text else 0}."""
+        return {name: 1 if found else 0 for name, found in self.find(text).items()}
+
+    def counts(self, text):
+        """Return {family: number of distinct keywords of that family found in text}."""
+        return {name: len(found) for name, found in self.find(text).items()}
+
+
+# Keyword families of the generalized model (train_generalized_model.py, evaluate.py, Deploy/app.py)
+GENERALIZED_KEYWORDS = KeywordAutomaton({
+    'urgency': ['urgent', 'immediately', 'now', 'act now', 'limited time',
+                'expire', 'suspended', 'locked', 'frozen'],
+    'financial': ['bank', 'account', 'card', 'payment', 'money', 'transfer',
+                  'refund', 'prize', 'win', 'won', 'claim', 'reward'],
+    'verification': ['verify', 'verification', 'confirm', 'validate', 'authenticate',
+                     'code', 'otp', 'pin'],
+    'prize': ['congratulations', 'winner', 'selected', 'prize', 'gift', 'free'],
+})
@@ -0,0 +1,128 @@
+"""
+Latency Metrics
+Fixed-bucket histograms for the serving path (per-stage timings, message sizes, URL counts) and
+their Prometheus text exposition. Recording a value is a bisect plus two additions, so timers can
+stay on in production; quantiles (p50/p95/p99) are estimated from the buckets by linear
+interpolation, as Prometheus' histogram_quantile does, instead of keeping raw samples.
+"""
+from bisect import bisect_left
+
+# Seconds: 10 µs .. 10 s, roughly 2.5x apart, so both sub-millisecond stages and slow requests resolve
+LATENCY_BUCKETS = (
+    0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005,
+    0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+# Characters per message
+SIZE_BUCKETS = (16, 32, 64, 128, 256, 512, 1024, 2048, 4096, 8192, 16384, 65536)
+# URLs per message
+COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+QUANTILES = (0.5, 0.95, 0.99)
+
+
+class Histogram:
+    """Cumulative-bucket histogram of observed values (Prometheus semantics: bucket le >= value)."""
+
+    def __init__(self, buckets):
+        self.buckets = tuple(sorted(buckets))
+        # One slot per bucket plus the +Inf overflow
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def quantile(self, q):
+        """Estimated q-quantile; values in the +Inf bucket report the largest finite bound."""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        lower = 0.0
+        for bound, count in zip(self.buckets, self.counts):
+            if count and seen + count >= rank:
+                return lower + (bound - lower) * (rank - seen) / count
+            seen += count
+            lower = bound
+        return self.buckets[-1]
+
+    def snapshot(self):
+        return {
+            "count": self.count,
+            "sum": self.sum,
+            **{f"p{round(q * 100)}": self.quantile(q) for q in QUANTILES},
+        }
+
+
+class MetricsRegistry:
+    """Named histogram families with one label each (e.g. stage="vectorizer").
+
+    Not thread-safe: observe from a single thread (the app records on its event loop).
+    """
+
+    def __init__(self, prefix):
+        self.prefix = prefix
+        self.families = {}
+
+    def histogram(self, name, help_text, buckets, label=None):
+        self.families[name] = {"help": help_text, "buckets": buckets, "label": label, "series": {}}
+
+    def observe(self, name, value, label_value=None):
+        series = self.families[name]["series"]
+        hist = series.get(label_value)
+        if hist is None:
+            hist = series[label_value] = Histogram(self.families[name]["buckets"])
+        hist.observe(value)
+
+    def snapshot(self):
+        """Count, sum and quantiles per family and label value (JSON-friendly)."""
+        return {
+            name: {str(label_value): hist.snapshot() for label_value, hist in family["series"].items()}
+            for name, family in self.families.items()
+        }
+
+    def render(self):
+        """Prometheus text exposition format (version 0.0.4).
+
+        Each family is a histogram (_bucket / _sum / _count); the estimated quantiles are exported
+        alongside as a <name>_quantile gauge so dashboards can read p50/p95/p99 directly.
+        """
+        lines = []
+        for name, family in self.families.items():
+            metric = f"{self.prefix}_{name}"
+            label = family["label"]
+            lines.append(f"# HELP {metric} {family['help']}")
+            lines.append(f"# TYPE {metric} histogram")
+            for label_value, hist in family["series"].items():
+                base = f'{label}="{label_value}"' if label else ""
+                cumulative = 0
+                for bound, count in zip(hist.buckets + (float("inf"),), hist.counts):
+                    cumulative += count
+                    le = "+Inf" if bound == float("inf") else _format(bound)
+                    lines.append(f'{metric}_bucket{{{_join(base, f"le={_quote(le)}")}}} {cumulative}')
+                labels = f"{{{base}}}" if base else ""
+                lines.append(f"{metric}_sum{labels} {_format(hist.sum)}")
+                lines.append(f"{metric}_count{labels} {hist.count}")
+            lines.append(f"# HELP {metric}_quantile Estimated quantiles of {metric}")
+            lines.append(f"# TYPE {metric}_quantile gauge")
+            for label_value, hist in family["series"].items():
+                base = f'{label}="{label_value}"' if label else ""
+                for q in QUANTILES:
+                    lines.append(f'{metric}_quantile{{{_join(base, f"quantile={_quote(q)}")}}} '
+                                 f'{_format(hist.quantile(q))}')
+        return "\n".join(lines) + "\n"
+
+
+def _format(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def _quote(value):
+    return f'"{value}"'
+
+
+def _join(*labels):
+    return ",".join(label for label in labels if label)
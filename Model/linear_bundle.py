@@ -0,0 +1,255 @@
+#!/usr/bin/env python
+"""Flat NumPy bundle and lightweight scorer for the generalized linear model.
+
+Usage:
+python linear_bundle.py --artifacts artifacts [--check Datasets/unified_ml_dataset_val.csv]
+
+export_bundle() dumps what inference actually uses from the fitted TfidfVectorizer, StandardScaler
+and LogisticRegression (vocabulary, IDF, tokenizer settings, coefficients, intercept) into the
+scam_detector_generalized_bundle/ directory. The scaler is affine and the model linear, so it is
+folded into the engineered-feature weights and the intercept (fold_scaler): serving feeds raw
+feature values, in feature_names order, with no scaling step.
+
+The arrays are plain .npy files opened with np.load(mmap_mode='r'), so every worker process on a
+host maps the same page-cache pages instead of holding its own copy; the vocabulary is a sorted
+fixed-width string array searched with np.searchsorted rather than a per-process dict. Small
+settings (token pattern, n-gram range, feature names, intercept) live in bundle.json.
+
+LinearScorer scores a preprocessed message plus its raw features straight from those arrays:
+n-grams are looked up, TF-IDF weighted, L2-normalized and dotted with the coefficients in plain
+Python, without building SciPy matrices or going through sklearn's validation. The text part
+follows sklearn's arithmetic exactly; folding the scaler reorders a few floating point operations,
+so probabilities match the sklearn pipeline to within rounding (~1e-15).
+"""
+import argparse
+import json
+import math
+import os
+import re
+from pathlib import Path
+
+import numpy as np
+
+BUNDLE_DIR = 'scam_detector_generalized_bundle'
+BUNDLE_FORMAT_VERSION = 3
+BUNDLE_ARRAYS = ('vocabulary', 'idf', 'text_coef', 'feature_coef')
+# Largest probability difference from the sklearn pipeline --check accepts (folding the scaler
+# reorders floating point operations, so outputs are equal within rounding, not bit for bit)
+CHECK_TOLERANCE = 1e-12
+
+
+def fold_scaler(coef, intercept, mean, scale):
+    """(coef, intercept) for raw inputs: coef . ((x - mean) / scale) + b == (coef / scale) . x + b'."""
+    coef = np.asarray(coef, dtype=np.float64)
+    folded = coef / np.asarray(scale, dtype=np.float64)
+    return folded, float(intercept) - float(np.dot(folded, np.asarray(mean, dtype=np.float64)))
+
+
+def scaler_moments(scaler, n_features):
+    """(mean, scale) a StandardScaler applies; identity for None or disabled centering/scaling."""
+    if scaler is None:
+        return np.zeros(n_features), np.ones(n_features)
+    mean = scaler.mean_ if scaler.with_mean and scaler.mean_ is not None else np.zeros(n_features)
+    scale = scaler.scale_ if scaler.with_std and scaler.scale_ is not None else np.ones(n_features)
+    return mean, scale
+
+
+def export_bundle(vectorizer, scaler, model, path):
+    """Write the arrays LinearScorer needs; raises ValueError for vectorizer settings it does not replicate."""
+    unsupported = {
+        'analyzer': vectorizer.analyzer != 'word',
+        'preprocessor': vectorizer.preprocessor is not None,
+        'tokenizer': vectorizer.tokenizer is not None,
+        'strip_accents': vectorizer.strip_accents is not None,
+        'stop_words': vectorizer.stop_words is not None,
+        'sublinear_tf': vectorizer.sublinear_tf,
+        'binary': vectorizer.binary,
+        'norm': vectorizer.norm not in ('l2', None),
+        'classes': len(model.classes_) != 2,
+    }
+    problems = [name for name, bad in unsupported.items() if bad]
+    if problems:
+        raise ValueError(f"Cannot export to a linear bundle (unsupported settings: {', '.join(problems)})")
+
+    terms = sorted(vectorizer.vocabulary_, key=vectorizer.vocabulary_.get)
+    # Column order must be code point order so a sorted-array search returns the column index
+    if terms != sorted(terms):
+        raise ValueError("Vocabulary columns are not in sorted term order")
+    n_terms = len(terms)
+    coef = np.asarray(model.coef_[0], dtype=np.float64)
+    n_features = coef.shape[0] - n_terms
+    feature_names = [str(name) for name in getattr(scaler, 'feature_names_in_', range(n_features))] if scaler is not None else []
+    if len(feature_names) != n_features:
+        raise ValueError(f"Model has {n_features} non-text weights but the scaler has {len(feature_names)} columns")
+    feature_coef, intercept = fold_scaler(coef[n_terms:], model.intercept_[0], *scaler_moments(scaler, n_features))
+
+    path = str(path)
+    os.makedirs(path, exist_ok=True)
+    arrays = {
+        'vocabulary': np.array(terms, dtype=str),
+        'idf': np.asarray(vectorizer.idf_, dtype=np.float64),
+        'text_coef': coef[:n_terms],
+        'feature_coef': feature_coef,
+    }
+    # Each file is replaced, never rewritten in place: a serving process may still have the old one mapped
+    for name in BUNDLE_ARRAYS:
+        target = os.path.join(path, f"{name}.npy")
+        with open(f"{target}.tmp", 'wb') as f:
+            np.save(f, np.ascontiguousarray(arrays[name]))
+        os.replace(f"{target}.tmp", target)
+    settings = {
+        'format_version': BUNDLE_FORMAT_VERSION,
+        'token_pattern': vectorizer.token_pattern,
+        'lowercase': bool(vectorizer.lowercase),
+        'ngram_range': [int(n) for n in vectorizer.ngram_range],
+        'l2_norm': vectorizer.norm == 'l2',
+        'feature_names': feature_names,
+        'intercept': intercept,
+    }
+    # Written last: a bundle without bundle.json is incomplete
+    with open(os.path.join(path, 'bundle.json.tmp'), 'w') as f:
+        json.dump(settings, f, indent=2)
+    os.replace(os.path.join(path, 'bundle.json.tmp'), os.path.join(path, 'bundle.json'))
+    return path
+
+
+def _sigmoid(x):
+    """scipy.special.expit for one float (same formula, same libm exp)."""
+    try:
+        return 1.0 / (1.0 + math.exp(-x))
+    except OverflowError:
+        return 0.0
+
+
+class LinearScorer:
+    """Scam probability of (preprocessed text, raw feature values) from a linear bundle."""
+
+    def __init__(self, settings, arrays):
+        if settings['format_version'] != BUNDLE_FORMAT_VERSION:
+            raise ValueError(f"Bundle format {settings['format_version']} != {BUNDLE_FORMAT_VERSION}; re-export it")
+        # Plain ndarray views of the (possibly memory-mapped) buffers: no copy, cheaper indexing
+        self.vocabulary = np.asarray(arrays['vocabulary'])
+        self.idf = np.asarray(arrays['idf'])
+        self.text_coef = np.asarray(arrays['text_coef'])
+        self.feature_coef = np.asarray(arrays['feature_coef'], dtype=np.float64)
+        self.token_pattern = re.compile(settings['token_pattern'])
+        self.lowercase = settings['lowercase']
+        self.min_n, self.max_n = settings['ngram_range']
+        self.l2_norm = settings['l2_norm']
+        self.feature_names = list(settings['feature_names'])
+        self.intercept = float(settings['intercept'])
+
+    @classmethod
+    def load(cls, path, mmap=True):
+        """Open a bundle directory; arrays are memory-mapped read-only unless mmap=False."""
+        with open(os.path.join(path, 'bundle.json')) as f:
+            settings = json.load(f)
+        arrays = {name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode='r' if mmap else None,
+                                allow_pickle=False)
+                  for name in BUNDLE_ARRAYS}
+        return cls(settings, arrays)
+
+    def ngrams(self, text):
+        """The n-grams TfidfVectorizer's word analyzer yields for text, in the same order."""
+        if self.lowercase:
+            text = text.lower()
+        tokens = self.token_pattern.findall(text)
+        if self.max_n == 1:
+            return tokens
+        grams = list(tokens) if self.min_n == 1 else []
+        for n in range(max(self.min_n, 2), min(self.max_n + 1, len(tokens) + 1)):
+            for i in range(len(tokens) - n + 1):
+                grams.append(" ".join(tokens[i:i + n]))
+        return grams
+
+    def text_weights(self, text):
+        """Sorted (term index, TF-IDF weight) pairs: one row of vectorizer.transform, nonzeros only."""
+        grams = self.ngrams(text)
+        if not grams:
+            return [], []
+        grams = np.array(grams, dtype=str)
+        positions = self.vocabulary.searchsorted(grams)
+        # A gram is known only if the term at its insertion point is the gram itself
+        counts = {}
+        for index in positions[self.vocabulary.take(positions, mode='clip') == grams].tolist():
+            counts[index] = counts.get(index, 0) + 1
+        indices = sorted(counts)
+        values = [float(counts[index]) * idf for index, idf in zip(indices, self.idf.take(indices).tolist())]
+        if self.l2_norm:
+            # Sequential sum in column order, as sklearn's row normalization does
+            norm = 0.0
+            for value in values:
+                norm += value * value
+            if norm != 0.0:
+                norm = math.sqrt(norm)
+                values = [value / norm for value in values]
+        return indices, values
+
+    def text_decision(self, text):
+        """The text (TF-IDF) part of the logit."""
+        indices, values = self.text_weights(text)
+        total = 0.0
+        for value, coef in zip(values, self.text_coef.take(indices).tolist()):
+            total += value * coef
+        return total
+
+    def decisions(self, texts, features):
+        """Logits of several messages; features is an (n, len(feature_names)) array of raw values."""
+        features = np.asarray(features, dtype=np.float64).reshape(len(texts), len(self.feature_names))
+        text_part = np.array([self.text_decision(text) for text in texts], dtype=np.float64)
+        return text_part + features @ self.feature_coef + self.intercept
+
+    def predict_proba(self, texts, features):
+        """Scam probability per message (texts preprocessed, features raw in feature_names order)."""
+        return np.array([_sigmoid(x) for x in self.decisions(texts, features).tolist()])
+
+
+def parse_args():
+    ap = argparse.ArgumentParser(description='Export the generalized model as a flat NumPy bundle')
+    ap.add_argument('--artifacts', default='artifacts', help='Directory with the generalized artifacts')
+    ap.add_argument('--check', default=None, help='CSV with a text column to compare against sklearn on')
+    ap.add_argument('--check-rows', type=int, default=5000, help='Messages from --check to compare')
+    return ap.parse_args()
+
+
+def main():
+    import time
+    import joblib
+    import pandas as pd
+    from scipy.sparse import hstack, csr_matrix
+
+    args = parse_args()
+    artifacts = Path(args.artifacts)
+
+    print("=" * 80)
+    print("📦 Exporting linear bundle")
+    print("=" * 80)
+
+    vectorizer = joblib.load(artifacts / 'tfidf_vectorizer_generalized.joblib')
+    scaler = joblib.load(artifacts / 'feature_scaler_generalized.joblib')
+    model = joblib.load(artifacts / 'scam_detector_generalized.joblib')
+    path = export_bundle(vectorizer, scaler, model, artifacts / BUNDLE_DIR)
+    size = sum(entry.stat().st_size for entry in Path(path).iterdir())
+    print(f"💾 {path}/ ({size / 1024:,.0f} KB)")
+
+    if args.check:
+        from text_scanner import URL_SHORTENERS, SUSPICIOUS_TLDS, preprocess as preprocess_text
+        from batch_features import generalized_feature_frame
+        scorer = LinearScorer.load(path)
+        texts = pd.read_csv(args.check, nrows=args.check_rows)['text']
+        processed = [preprocess_text(t) for t in texts]
+        features = generalized_feature_frame(texts, URL_SHORTENERS, SUSPICIOUS_TLDS)
+        X = hstack([vectorizer.transform(processed), csr_matrix(scaler.transform(features))])
+        expected = model.predict_proba(X)[:, 1]
+        rows = features[scorer.feature_names].to_numpy(dtype=np.float64)
+        start = time.perf_counter()
+        actual = np.concatenate([scorer.predict_proba([text], row) for text, row in zip(processed, rows)])
+        elapsed = time.perf_counter() - start
+        max_diff = float(np.max(np.abs(actual - expected))) if len(actual) else 0.0
+        print(f"{'✓' if max_diff <= CHECK_TOLERANCE else '❌'} Checked {len(actual):,} messages: "
+              f"{int((actual == expected).sum()):,} bit-identical, max difference {max_diff:.2e} "
+              f"(tolerance {CHECK_TOLERANCE:.0e}), {elapsed / max(len(actual), 1) * 1e6:.1f} µs per message")
+
+
+if __name__ == '__main__':
+    main()
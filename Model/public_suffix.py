@@ -0,0 +1,138 @@
+"""
+Public Suffix Resolution
+Offline replacement for tldextract.extract: splits a host into subdomain, domain and suffix using
+the Public Suffix List snapshot bundled next to this file (public_suffix_list.dat, ICANN section,
+the same rules tldextract applies by default). The list is parsed once into a label trie at import;
+nothing is fetched or cached on disk, so startup and results are deterministic.
+"""
+import ipaddress
+import os
+import re
+from collections import namedtuple
+
+PUBLIC_SUFFIX_LIST_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "public_suffix_list.dat")
+
+# Field names match tldextract's ExtractResult so call sites read the same
+ExtractResult = namedtuple('ExtractResult', ['subdomain', 'domain', 'suffix'])
+
+_SCHEME_CHARS = frozenset('abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789+-.')
+_IPV4 = re.compile(r'^(?:(?:[0-9]|[1-9][0-9]|1[0-9]{2}|2[0-4][0-9]|25[0-5])\.){3}'
+                   r'(?:[0-9]|[1-9][0-9]|1[0-9]{2}|2[0-4][0-9]|25[0-5])$', re.ASCII)
+_RULE = re.compile(r'^(?P<suffix>[.*!]*\w\S*)', re.UNICODE | re.MULTILINE)
+_UNICODE_DOTS = ('。', '．', '｡')
+
+
+def _punycode(label):
+    """ASCII (xn--) form of a unicode rule label, or None if it has none."""
+    if label.isascii():
+        return None
+    try:
+        return 'xn--' + label.encode('punycode').decode('ascii')
+    except UnicodeError:
+        return None
+
+
+def load_suffix_trie(path=PUBLIC_SUFFIX_LIST_PATH):
+    """Parse a suffix list into (version, trie).
+
+    The trie is nested dicts keyed by label from the right; a node's None key marks the end of a
+    rule. Wildcard ('*') and exception ('!label') rules are stored as ordinary labels. Unicode
+    rules are also stored under their punycode labels so encoded hosts match without decoding.
+    """
+    with open(path, encoding="utf-8") as f:
+        text = f.read()
+    version_match = re.search(r'^// VERSION: (\S+)', text, re.MULTILINE)
+    version = version_match.group(1) if version_match else "unknown"
+    # Only the ICANN section: tldextract ignores private domains unless asked
+    text = text.partition("// ===BEGIN PRIVATE DOMAINS===")[0]
+
+    trie = {}
+    for match in _RULE.finditer(text):
+        labels = match.group('suffix').split('.')
+        variants = [labels]
+        if not match.group('suffix').isascii():
+            variants.append([_punycode(label) or label for label in labels])
+        for labels in variants:
+            node = trie
+            for label in reversed(labels):
+                node = node.setdefault(label, {})
+            node[None] = True
+    return version, trie
+
+
+PSL_VERSION, SUFFIX_TRIE = load_suffix_trie()
+
+
+def netloc_of(url):
+    """Host of a URL-like string: scheme, path, userinfo and port stripped, case preserved."""
+    double_slashes = url.find("//")
+    if double_slashes == 0:
+        url = url[2:]
+    elif double_slashes >= 2 and url[double_slashes - 1] == ":" and \
+            set(url[:double_slashes - 1]) <= _SCHEME_CHARS:
+        url = url[double_slashes + 2:]
+    authority = url.partition("/")[0].partition("?")[0].partition("#")[0]
+    after_userinfo = authority.rpartition("@")[-1]
+    if after_userinfo and after_userinfo[0] == "[":
+        ipv6, bracket, _ = after_userinfo.partition("]")
+        if bracket:
+            return ipv6 + "]"
+    host = after_userinfo.partition(":")[0].strip()
+    return host.rstrip(".。．｡")
+
+
+def _suffix_start(labels):
+    """Index of the first public suffix label in labels, or None if no rule matches."""
+    node = SUFFIX_TRIE
+    suffix_start = None
+    index = len(labels)
+    for label in reversed(labels):
+        lowered = label.lower()
+        child = node.get(lowered)
+        if child is not None:
+            index -= 1
+            node = child
+            if None in node:
+                suffix_start = index
+            continue
+        if '*' in node:
+            # Wildcard rule: this label is part of the suffix unless an exception rule names it
+            return index if '!' + lowered in node else index - 1
+        break
+    return suffix_start
+
+
+def split_host(host):
+    """Split a bare host (no scheme, port or path) into ExtractResult(subdomain, domain, suffix)."""
+    for dot in _UNICODE_DOTS:
+        if dot in host:
+            host = host.replace(dot, '.')
+    if len(host) >= 4 and host[0] == '[' and host[-1] == ']':
+        try:
+            ipaddress.IPv6Address(host[1:-1])
+            return ExtractResult('', host, '')
+        except ValueError:
+            pass
+
+    labels = host.split('.')
+    start = _suffix_start(labels)
+    if start is None:
+        if len(labels) == 4 and host[:1].isdecimal() and _IPV4.match(host):
+            return ExtractResult('', host, '')
+        return ExtractResult('.'.join(labels[:-1]), labels[-1], '')
+    subdomain = '.'.join(labels[:start - 1]) if start >= 2 else ''
+    domain = labels[start - 1] if start > 0 else ''
+    return ExtractResult(subdomain, domain, '.'.join(labels[start:]))
+
+
+def extract(url):
+    """Drop-in for tldextract.extract(url) (ICANN suffixes) without network or disk access."""
+    return split_host(netloc_of(url))
+
+
+def registered_domain(host):
+    """Return the registrable domain (domain + public suffix) of a host, lowercased, or ''."""
+    parts = extract(host)
+    if parts.domain and parts.suffix:
+        return f"{parts.domain}.{parts.suffix}".lower()
+    return ''
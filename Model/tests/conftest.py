@@ -0,0 +1,73 @@
+"""
+Shared pytest setup: the Model/ scripts and Deploy/app.py import each other as flat modules,
+so both directories go on sys.path the way running a script from them would.
+"""
+import os
+import sys
+
+import pytest
+
+MODEL_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEPLOY_DIR = os.path.join(MODEL_DIR, 'Deploy')
+
+for path in (MODEL_DIR, DEPLOY_DIR):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+# Messages the test model is trained on (and the app tests score)
+SCAM_TEXTS = [
+    "URGENT: your account is suspended, verify now at http://paypa1-secure.xyz/login",
+    "Congratulations winner! Claim your free prize at https://bit.ly/3xYz",
+    "Your card payment failed. Confirm your bank details at http://192.168.4.7:8080/pay",
+    "Final notice: refund pending, validate your account at www.refund-alert.top",
+]
+HAM_TEXTS = [
+    "Hey, are we still meeting for lunch tomorrow at 12?",
+    "The meeting notes are attached, see you on Monday",
+    "Happy birthday! Hope you have a great day",
+    "Can you pick up some milk on the way home?",
+]
+
+
+def train_test_artifacts(artifacts_dir):
+    """Fit a tiny TF-IDF + StandardScaler + LogisticRegression and save it as the generalized artifacts."""
+    import joblib
+    import numpy as np
+    from scipy.sparse import hstack, csr_matrix
+    from sklearn.feature_extraction.text import TfidfVectorizer
+    from sklearn.linear_model import LogisticRegression
+    from sklearn.preprocessing import StandardScaler
+
+    from batch_features import generalized_feature_frame
+    from text_scanner import URL_SHORTENERS, SUSPICIOUS_TLDS, preprocess
+
+    texts = SCAM_TEXTS + HAM_TEXTS
+    labels = np.array([1] * len(SCAM_TEXTS) + [0] * len(HAM_TEXTS))
+    vectorizer = TfidfVectorizer(ngram_range=(1, 2))
+    features = generalized_feature_frame(texts, URL_SHORTENERS, SUSPICIOUS_TLDS)
+    scaler = StandardScaler().fit(features)
+    X = hstack([vectorizer.fit_transform([preprocess(t) for t in texts]), csr_matrix(scaler.transform(features))])
+    model = LogisticRegression(C=10.0).fit(X, labels)
+
+    os.makedirs(artifacts_dir, exist_ok=True)
+    joblib.dump(model, os.path.join(artifacts_dir, 'scam_detector_generalized.joblib'))
+    joblib.dump(vectorizer, os.path.join(artifacts_dir, 'tfidf_vectorizer_generalized.joblib'))
+    joblib.dump(scaler, os.path.join(artifacts_dir, 'feature_scaler_generalized.joblib'))
+
+
+@pytest.fixture(scope='session')
+def app_module(tmp_path_factory):
+    """Deploy/app.py imported once, serving test artifacts (its settings are read at import)."""
+    artifacts_dir = str(tmp_path_factory.mktemp('artifacts'))
+    train_test_artifacts(artifacts_dir)
+    os.environ['ARTIFACTS_DIR'] = artifacts_dir
+    os.environ.setdefault('INFERENCE_MODE', 'inline')
+    import app
+    return app
+
+
+@pytest.fixture(scope='module')
+def client(app_module):
+    from fastapi.testclient import TestClient
+    with TestClient(app_module.app) as test_client:
+        yield test_client
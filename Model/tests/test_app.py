@@ -0,0 +1,135 @@
+"""Deploy/app.py endpoints through TestClient, on the test artifacts from conftest."""
+import json
+
+import pytest
+
+from conftest import HAM_TEXTS, SCAM_TEXTS
+
+
+def test_ready(client):
+    assert client.get('/readyz').status_code == 200
+    assert client.get('/health').json()['status'] == 'healthy'
+
+
+def test_batch_matches_single_predictions(client):
+    texts = SCAM_TEXTS + HAM_TEXTS + ['', 'plain message without links']
+    batch = client.post('/predict-scam/batch', json={'texts': texts})
+    assert batch.status_code == 200
+    results = batch.json()['results']
+    assert [r['input_text'] for r in results] == texts
+    for text, result in zip(texts, results):
+        single = client.post('/predict-scam', json={'text': text}).json()
+        assert single == result
+    assert [r['prediction'] for r in results[:len(SCAM_TEXTS)]] == ['scam'] * len(SCAM_TEXTS)
+    assert [r['prediction'] for r in results[len(SCAM_TEXTS):len(SCAM_TEXTS) + len(HAM_TEXTS)]] == \
+        ['not a scam'] * len(HAM_TEXTS)
+
+
+def test_batch_full_record(client):
+    result = client.post('/predict-scam/batch', json={'texts': [SCAM_TEXTS[0]]}).json()['results'][0]
+    assert set(result) == {'input_text', 'prediction', 'confidence', 'threat_indicators', 'artifact_hash'}
+    assert 0.5 <= result['confidence'] <= 1.0
+    assert result['threat_indicators']['suspicious_tld'] is True
+    assert result['threat_indicators']['total_red_flags'] == sum(
+        value for key, value in result['threat_indicators'].items() if key != 'total_red_flags')
+
+
+def test_batch_empty_and_oversized(client, app_module, monkeypatch):
+    assert client.post('/predict-scam/batch', json={'texts': []}).json() == {'results': []}
+    monkeypatch.setattr(app_module, 'MAX_BATCH_SIZE', 2)
+    assert client.post('/predict-scam/batch', json={'texts': ['a', 'b', 'c']}).status_code == 413
+    assert client.post('/predict-scam/batch', json={'text': 'a'}).status_code == 422
+
+
+def _ndjson(response):
+    return [json.loads(line) for line in response.text.splitlines()]
+
+
+def test_stream_scores_lines_in_order(client):
+    texts = SCAM_TEXTS + HAM_TEXTS
+    body = '\n'.join(json.dumps({'text': text, 'id': i}) for i, text in enumerate(texts)) + '\n'
+    response = client.post('/predict-scam/stream', content=body.encode(),
+                           headers={'Content-Type': 'application/x-ndjson'})
+    assert response.status_code == 200
+    assert response.headers['content-type'].startswith('application/x-ndjson')
+    records = _ndjson(response)
+    batch = client.post('/predict-scam/batch', json={'texts': texts}).json()['results']
+    assert [r['line'] for r in records] == list(range(1, len(texts) + 1))
+    assert [r['id'] for r in records] == list(range(len(texts)))
+    for record, expected in zip(records, batch):
+        expected.pop('input_text')
+        assert {k: v for k, v in record.items() if k not in ('line', 'id')} == expected
+
+
+def test_stream_batches_and_bad_lines(client, app_module, monkeypatch):
+    monkeypatch.setattr(app_module, 'STREAM_BATCH_SIZE', 2)
+    monkeypatch.setattr(app_module, 'STREAM_MAX_LINE_BYTES', 96)
+    lines = [json.dumps(SCAM_TEXTS[1]), '', '{"no_text": 1}', 'not json', json.dumps('x' * 200),
+             json.dumps(HAM_TEXTS[0])]
+    # Sent in small chunks, so lines arrive split across reads
+    body = ('\n'.join(lines)).encode()
+    chunks = (body[i:i + 7] for i in range(0, len(body), 7))
+    records = _ndjson(client.post('/predict-scam/stream', content=chunks))
+    assert [r['line'] for r in records] == [1, 3, 4, 5, 6]
+    assert records[0]['prediction'] == 'scam'
+    assert 'error' in records[1] and 'error' in records[2]
+    assert 'STREAM_MAX_LINE_BYTES' in records[3]['error']
+    assert records[4]['prediction'] == 'not a scam'
+
+
+@pytest.mark.parametrize('orjson_available', [True, False])
+def test_stream_ids_json_cannot_hold_only_fail_their_line(client, app_module, monkeypatch, orjson_available):
+    monkeypatch.setattr(app_module, 'ORJSON_AVAILABLE', orjson_available and app_module.ORJSON_AVAILABLE)
+    big = 123456789012345678901234567890
+    lines = [json.dumps({'text': SCAM_TEXTS[0], 'id': 1}), '{"text": "x", "id": %d}' % big,
+             '{"text": "x", "id": NaN}', json.dumps({'text': HAM_TEXTS[0], 'id': 4})]
+    response = client.post('/predict-scam/stream', content='\n'.join(lines).encode())
+    records = _ndjson(response)
+    assert 'NaN' not in response.text
+    assert [r['line'] for r in records] == [1, 2, 3, 4]
+    assert records[0]['prediction'] == 'scam'
+    assert records[1]['id'] == big and 'prediction' in records[1]
+    assert 'error' in records[2] and 'id' not in records[2]
+    assert records[3]['prediction'] == 'not a scam' and records[3]['id'] == 4
+
+
+def test_stream_plain_text(client):
+    body = '\n'.join(SCAM_TEXTS[:2]).encode()
+    records = _ndjson(client.post('/predict-scam/stream', content=body, headers={'Content-Type': 'text/plain'}))
+    assert [r['prediction'] for r in records] == ['scam', 'scam']
+
+
+def test_compact_mode(client, app_module):
+    text = SCAM_TEXTS[0]
+    full = client.post('/predict-scam', json={'text': text}).json()
+    compact = client.post('/predict-scam', json={'text': text}, params={'response': 'compact'}).json()
+    assert set(compact) == {'prediction', 'scam_probability', 'artifact_hash'}
+    assert compact['prediction'] == full['prediction'] == 'scam'
+    assert compact['scam_probability'] == full['confidence']
+    assert compact['artifact_hash'] == full['artifact_hash']
+
+    header = client.post('/predict-scam', json={'text': text}, headers={'X-Response-Mode': 'compact'}).json()
+    assert header == compact
+
+    bitmask = client.post('/predict-scam', json={'text': text},
+                          params={'response': 'compact', 'indicators': 'bitmask'}).json()
+    assert app_module.build_indicators(bitmask['threat_mask']) == full['threat_indicators']
+    indicators = client.post('/predict-scam', json={'text': text},
+                             params={'response': 'compact', 'indicators': 'full'}).json()
+    assert indicators['threat_indicators'] == full['threat_indicators']
+
+
+def test_compact_batch_and_stream(client):
+    texts = SCAM_TEXTS + HAM_TEXTS
+    params = {'response': 'compact', 'indicators': 'bitmask'}
+    batch = client.post('/predict-scam/batch', json={'texts': texts}, params=params).json()['results']
+    assert all(set(r) == {'prediction', 'scam_probability', 'artifact_hash', 'threat_mask'} for r in batch)
+    body = '\n'.join(json.dumps(text) for text in texts).encode()
+    records = _ndjson(client.post('/predict-scam/stream', content=body, params=params))
+    assert [{k: v for k, v in r.items() if k != 'line'} for r in records] == batch
+
+
+def test_unknown_response_options(client):
+    assert client.post('/predict-scam', json={'text': 'hi'}, params={'response': 'tiny'}).status_code == 400
+    assert client.post('/predict-scam', json={'text': 'hi'},
+                       params={'response': 'compact', 'indicators': 'some'}).status_code == 400
@@ -0,0 +1,48 @@
+"""BrandIndex lookups against a linear scan over the brand list."""
+import random
+
+from brand_index import BrandIndex, deletion_variants
+from extract_features import BRAND_INDEX, NORMALIZED_BRANDS, levenshtein_distance
+
+
+def linear_nearest(brands, word, max_distance=2):
+    best, best_distance = None, None
+    for brand in sorted(set(brands)):
+        distance = levenshtein_distance(word, brand, max_distance=max_distance)
+        if distance is not None and (best_distance is None or distance < best_distance):
+            best, best_distance = brand, distance
+    return best, best_distance
+
+
+def test_deletion_variants():
+    assert deletion_variants('abc', 1) == {'abc', 'bc', 'ac', 'ab'}
+    assert '' in deletion_variants('ab', 2)
+
+
+def test_nearest_matches_linear_scan():
+    words = ['paypa1', 'paypal', 'amazn', 'g00gle', 'netfiix', 'xyz', '', 'microsoftt', 'appple', 'chasee']
+    rng = random.Random(8)
+    for _ in range(500):
+        brand = rng.choice(NORMALIZED_BRANDS)
+        chars = list(brand)
+        for _ in range(rng.randint(0, 3)):
+            op = rng.randrange(3)
+            position = rng.randrange(len(chars) + 1)
+            if op == 0:
+                chars.insert(position, rng.choice('abcdefghijklmnopqrstuvwxyz0123456789'))
+            elif chars and position < len(chars):
+                if op == 1:
+                    del chars[position]
+                else:
+                    chars[position] = rng.choice('abcdefghijklmnopqrstuvwxyz0123456789')
+        words.append(''.join(chars))
+    for word in words:
+        expected = linear_nearest(NORMALIZED_BRANDS, word) if word else (None, None)
+        assert BRAND_INDEX.nearest(word) == expected, word
+
+
+def test_ties_resolve_in_brand_order():
+    index = BrandIndex(['bat', 'cat', 'hat'], levenshtein_distance, max_distance=1)
+    assert index.nearest('at') == ('bat', 1)
+    assert index.nearest('zzzz') == (None, None)
+    assert len(index) == 3
@@ -0,0 +1,125 @@
+"""Feature store keys and caching."""
+import os
+
+import numpy as np
+import pandas as pd
+
+import feature_store
+
+
+def test_store_dir_is_independent_of_cwd():
+    model_dir = os.path.dirname(os.path.abspath(feature_store.__file__))
+    assert feature_store.FEATURE_STORE_DIR == os.path.join(model_dir, 'Datasets', 'feature_store')
+
+
+def test_text_fingerprint_is_order_sensitive_and_type_aware():
+    fp = feature_store.text_fingerprint
+    assert fp(['a', 'b']) == fp(pd.Series(['a', 'b']))
+    assert fp(['a', 'b']) != fp(['b', 'a'])
+    # Length-prefixed, so joining differently never collides
+    assert fp(['ab', 'c']) != fp(['a', 'bc'])
+    assert fp(['nan']) != fp([np.nan])
+    assert fp(['1']) != fp([1])
+
+
+def test_row_hashes_are_stable_per_message():
+    hashes = feature_store.row_hashes(['hello', 'world', 'hello', None])
+    assert hashes[0] == hashes[2]
+    assert len(set(hashes)) == 3
+    assert all(len(h) == 32 for h in hashes)
+    assert feature_store.row_hashes(['hello']) == [hashes[0]]
+
+
+def test_store_key_tracks_version_and_params():
+    key = feature_store.store_key(['a'], 1, {'tlds': {'xyz', 'top'}})
+    assert key == feature_store.store_key(['a'], 1, {'tlds': {'top', 'xyz'}})
+    assert key != feature_store.store_key(['a'], 2, {'tlds': {'xyz', 'top'}})
+    assert key != feature_store.store_key(['a'], 1, {'tlds': {'xyz'}})
+    assert key != feature_store.store_key(['b'], 1, {'tlds': {'xyz', 'top'}})
+
+
+def test_cached_features_hits_on_same_texts(tmp_path):
+    calls = []
+
+    def compute(texts):
+        calls.append(len(texts))
+        return pd.DataFrame({'length': [len(t) for t in texts]})
+
+    texts = pd.Series(['one', 'three'])
+    first, hit = feature_store.cached_features('len', texts, 1, compute, store_dir=str(tmp_path))
+    assert not hit
+    second, hit = feature_store.cached_features('len', texts, 1, compute, store_dir=str(tmp_path))
+    assert hit
+    pd.testing.assert_frame_equal(first, second)
+    _, hit = feature_store.cached_features('len', texts, 2, compute, store_dir=str(tmp_path))
+    assert not hit
+    assert calls == [2, 2]
+
+
+def _length_features(calls):
+    def compute(texts):
+        calls.append(list(texts))
+        return pd.DataFrame({'length': [len(str(t)) for t in texts]})
+    return compute
+
+
+def test_incremental_features_only_computes_new_messages(tmp_path):
+    calls = []
+    compute = _length_features(calls)
+    store = str(tmp_path)
+
+    frame, new_rows = feature_store.incremental_features('len', ['a', 'bb', 'a'], 1, compute, store_dir=store)
+    assert new_rows == 2
+    assert frame['length'].tolist() == [1, 2, 1]
+
+    frame, new_rows = feature_store.incremental_features('len', ['ccc', 'bb'], 1, compute, store_dir=store)
+    assert new_rows == 1
+    assert frame['length'].tolist() == [3, 2]
+    assert calls == [['a', 'bb'], ['ccc']]
+
+    # New rows are appended as a part file; earlier parts are left untouched
+    table_dir = feature_store.row_table_dir('len', 1, store_dir=store)
+    assert len(feature_store._row_parts(table_dir)) == 2
+
+    _, new_rows = feature_store.incremental_features('len', ['a'], 2, compute, store_dir=store)
+    assert new_rows == 1
+
+
+def test_incremental_features_compacts_parts(tmp_path, monkeypatch):
+    monkeypatch.setattr(feature_store, 'ROW_TABLE_MAX_PARTS', 3)
+    compute = _length_features([])
+    store = str(tmp_path)
+    for i in range(4):
+        feature_store.incremental_features('len', ['x' * (i + 1)], 1, compute, store_dir=store)
+
+    table_dir = feature_store.row_table_dir('len', 1, store_dir=store)
+    assert len(feature_store._row_parts(table_dir)) == 1
+    frame, new_rows = feature_store.incremental_features('len', ['xxxx', 'x', 'xx'], 1, compute, store_dir=store)
+    assert new_rows == 0
+    assert frame['length'].tolist() == [4, 1, 2]
+
+
+def test_incremental_features_empty_input_writes_nothing(tmp_path):
+    store = str(tmp_path)
+    frame, new_rows = feature_store.incremental_features('len', [], 1, _length_features([]), store_dir=store)
+    assert new_rows == 0
+    assert list(frame.columns) == ['length'] and frame.empty
+    assert feature_store._row_parts(feature_store.row_table_dir('len', 1, store_dir=store)) == []
+
+
+def test_compaction_skips_parts_already_removed(tmp_path, monkeypatch):
+    compute = _length_features([])
+    store = str(tmp_path)
+    for text in ['a', 'bb', 'ccc']:
+        feature_store.incremental_features('len', [text], 1, compute, store_dir=store)
+    table_dir = feature_store.row_table_dir('len', 1, store_dir=store)
+    read_rows = feature_store._read_rows
+
+    def racing_read(parts, hashes=None):
+        # Another compaction removes a part between our listing and our deletes
+        rows = read_rows(parts, hashes)
+        os.remove(parts[0])
+        return rows
+    monkeypatch.setattr(feature_store, '_read_rows', racing_read)
+    assert feature_store.compact_row_table(table_dir) == 3
+    assert len(feature_store._row_parts(table_dir)) == 1
@@ -0,0 +1,66 @@
+"""hashed_vectorizer export: compact bucket storage and agreement with the vocabulary model."""
+import numpy as np
+import pytest
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.linear_model import LogisticRegression
+
+import hashed_vectorizer
+
+CORPUS = [
+    "verify your account now", "your parcel is waiting claim it", "lunch tomorrow at noon",
+    "urgent account suspended verify", "meeting moved to friday", "claim your prize now",
+    "see you at the game", "your bank account is locked", "dinner at my place tonight",
+]
+LABELS = [1, 1, 0, 1, 0, 1, 0, 1, 0]
+
+
+@pytest.fixture(scope='module')
+def trained():
+    vectorizer = TfidfVectorizer(ngram_range=(1, 2), sublinear_tf=True)
+    X = vectorizer.fit_transform(CORPUS)
+    extra = np.linspace(-1, 1, len(CORPUS))[:, None]
+    model = LogisticRegression().fit(np.hstack([X.toarray(), extra]), LABELS)
+    return vectorizer, model, extra
+
+
+def test_export_stores_only_occupied_buckets(trained):
+    vectorizer, model, _ = trained
+    hashed, hashed_model, collisions = hashed_vectorizer.export_hashed(vectorizer, model)
+    n_terms = len(vectorizer.vocabulary_)
+    assert collisions == 0
+    assert len(hashed.buckets) == len(hashed.idf_) == n_terms
+    assert np.all(np.diff(hashed.buckets) > 0)
+    assert hashed_model.coef_.shape == model.coef_.shape
+    assert hashed_model.coef_[0, -1] == model.coef_[0, -1]
+
+
+def test_hashed_transform_matches_vocabulary(trained):
+    vectorizer, model, extra = trained
+    hashed, hashed_model, _ = hashed_vectorizer.export_hashed(vectorizer, model)
+    report = hashed_vectorizer.check_agreement(CORPUS, vectorizer, model, hashed, hashed_model, extra)
+    assert report['label_agreement'] == 1.0
+    assert report['max_probability_diff'] < 1e-12
+
+    # Same TF-IDF values, in bucket order instead of vocabulary order
+    terms = sorted(vectorizer.vocabulary_, key=vectorizer.vocabulary_.get)
+    columns = np.searchsorted(hashed.buckets, hashed_vectorizer.term_buckets(terms, hashed.hasher.n_features))
+    expected = vectorizer.transform(CORPUS).toarray()
+    np.testing.assert_allclose(hashed.transform(CORPUS).toarray()[:, columns], expected, atol=1e-12)
+
+
+def test_unknown_ngrams_drop_out(trained):
+    vectorizer, model, _ = trained
+    hashed, _, _ = hashed_vectorizer.export_hashed(vectorizer, model)
+    X = hashed.transform(["completely unseen words", ""])
+    assert X.nnz == 0
+
+
+def test_colliding_terms_share_summed_weight(trained):
+    vectorizer, model, _ = trained
+    hashed, hashed_model, collisions = hashed_vectorizer.export_hashed(vectorizer, model, n_features=8)
+    n_terms = len(vectorizer.vocabulary_)
+    assert collisions == n_terms - len(hashed.buckets) > 0
+    assert len(hashed.buckets) <= 8
+    n_text = len(hashed.buckets)
+    np.testing.assert_allclose(hashed_model.coef_[0, :n_text].sum(), model.coef_[0, :n_terms].sum())
+    assert hashed.transform(CORPUS).shape == (len(CORPUS), n_text)
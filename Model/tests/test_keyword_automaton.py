@@ -0,0 +1,57 @@
+"""KeywordAutomaton against the per-family substring scans it replaced."""
+import random
+
+import pytest
+
+import keyword_automaton
+from keyword_automaton import GENERALIZED_KEYWORDS, KeywordAutomaton
+
+FAMILIES = {
+    'urgency': ['urgent', 'now', 'act now', 'expire'],
+    'financial': ['bank', 'prize', 'win', 'won', 'claim'],
+    'prize': ['prize', 'winner', 'free'],
+    'overlap': ['he', 'she', 'his', 'hers', 'ushers'],
+}
+
+
+def reference_find(families, text):
+    return {name: {k for k in keywords if k in text} for name, keywords in families.items()}
+
+
+@pytest.fixture(params=['ahocorasick', 'python'])
+def automaton(request, monkeypatch):
+    if request.param == 'ahocorasick' and not keyword_automaton.AHOCORASICK_AVAILABLE:
+        pytest.skip('pyahocorasick is not installed')
+    if request.param == 'python':
+        monkeypatch.setattr(keyword_automaton, 'AHOCORASICK_AVAILABLE', False)
+    return KeywordAutomaton(FAMILIES)
+
+
+@pytest.mark.parametrize('text', [
+    '', 'act now to claim your prize', 'ushers', 'winner winner, you won!', 'nothing here',
+    'bankbank expired freely', 'she sells his hers',
+])
+def test_find_matches_substring_scan(automaton, text):
+    assert automaton.find(text) == reference_find(FAMILIES, text)
+
+
+def test_find_matches_substring_scan_fuzzed(automaton):
+    rng = random.Random(7)
+    alphabet = 'abehinorsuw cdklmptxz'
+    for _ in range(2000):
+        text = ''.join(rng.choice(alphabet) for _ in range(rng.randint(0, 30)))
+        assert automaton.find(text) == reference_find(FAMILIES, text), text
+
+
+def test_family_helpers(automaton):
+    text = 'claim your free prize now'
+    assert automaton.hits(text) == {'urgency': 1, 'financial': 1, 'prize': 1, 'overlap': 0}
+    assert automaton.counts(text) == {'urgency': 1, 'financial': 2, 'prize': 2, 'overlap': 0}
+    assert automaton.contains_any(text, 'prize')
+    assert not automaton.contains_any(text, 'overlap')
+
+
+def test_generalized_keywords_lowercase_only():
+    assert GENERALIZED_KEYWORDS.hits('your account is locked')['urgency'] == 1
+    # Callers lowercase the text; uppercase input is not matched
+    assert GENERALIZED_KEYWORDS.hits('LOCKED')['urgency'] == 0
@@ -0,0 +1,52 @@
+"""Histogram quantile estimates and the Prometheus exposition."""
+import pytest
+
+from latency_metrics import Histogram, MetricsRegistry
+
+
+def test_empty_histogram():
+    assert Histogram((1, 2)).quantile(0.5) == 0.0
+
+
+def test_quantile_interpolates_within_bucket():
+    hist = Histogram((1.0, 2.0, 4.0))
+    for value in (0.5, 1.5, 1.5, 3.0):
+        hist.observe(value)
+    assert hist.counts == [1, 2, 1, 0]
+    # rank 2 of 4 falls halfway through the (1, 2] bucket's two observations
+    assert hist.quantile(0.5) == pytest.approx(1.5)
+    assert hist.quantile(0.25) == pytest.approx(1.0)
+    assert hist.quantile(1.0) == pytest.approx(4.0)
+
+
+def test_quantile_skips_empty_buckets_and_caps_overflow():
+    hist = Histogram((1.0, 10.0, 100.0))
+    hist.observe(50.0)
+    # The only observation sits in (10, 100]; empty buckets below it are skipped
+    assert hist.quantile(0.5) == pytest.approx(55.0)
+    hist.observe(1000.0)
+    # +Inf bucket values report the largest finite bound
+    assert hist.quantile(0.99) == 100.0
+
+
+def test_bucket_bounds_are_inclusive():
+    hist = Histogram((1.0, 2.0))
+    hist.observe(1.0)
+    hist.observe(2.0)
+    assert hist.counts == [1, 1, 0]
+    assert hist.snapshot()['count'] == 2
+    assert hist.snapshot()['sum'] == 3.0
+
+
+def test_registry_render():
+    registry = MetricsRegistry('scam_api')
+    registry.histogram('stage_seconds', 'Stage time', (0.1, 1.0), label='stage')
+    registry.observe('stage_seconds', 0.05, 'model')
+    registry.observe('stage_seconds', 5.0, 'model')
+    text = registry.render()
+    assert '# TYPE scam_api_stage_seconds histogram' in text
+    assert 'scam_api_stage_seconds_bucket{stage="model",le="0.1"} 1' in text
+    assert 'scam_api_stage_seconds_bucket{stage="model",le="+Inf"} 2' in text
+    assert 'scam_api_stage_seconds_count{stage="model"} 2' in text
+    assert 'scam_api_stage_seconds_quantile{stage="model",quantile="0.5"}' in text
+    assert registry.snapshot()['stage_seconds']['model']['count'] == 2
@@ -0,0 +1,48 @@
+"""Bit-parallel edit distance against the textbook dynamic program."""
+import random
+
+import pytest
+
+from extract_features import BIT_PARALLEL_MAX_LENGTH, _bit_parallel_distance, levenshtein_distance
+
+
+def reference_distance(source, target):
+    previous = list(range(len(target) + 1))
+    for i, src in enumerate(source, start=1):
+        current = [i]
+        for j, tgt in enumerate(target, start=1):
+            current.append(min(current[j - 1] + 1, previous[j] + 1, previous[j - 1] + (src != tgt)))
+        previous = current
+    return previous[-1]
+
+
+def capped(distance, max_distance):
+    return None if max_distance is not None and distance > max_distance else distance
+
+
+@pytest.mark.parametrize('source,target', [
+    ('', ''), ('', 'abc'), ('kitten', 'sitting'), ('paypal', 'paypa1'), ('flaw', 'lawn'),
+    ('a' * 64, 'a' * 63 + 'b'), ('ab' * 40, 'ba' * 40),
+])
+def test_bit_parallel_matches_dp(source, target):
+    assert _bit_parallel_distance(source, target, None) == reference_distance(source, target)
+
+
+def test_bit_parallel_matches_dp_fuzzed():
+    rng = random.Random(9)
+    for _ in range(3000):
+        source = ''.join(rng.choice('abcd') for _ in range(rng.randint(0, 70)))
+        target = ''.join(rng.choice('abcd') for _ in range(rng.randint(0, BIT_PARALLEL_MAX_LENGTH)))
+        expected = reference_distance(source, target)
+        for max_distance in (None, 0, 1, 2, 5):
+            assert _bit_parallel_distance(source, target, max_distance) == capped(expected, max_distance), \
+                (source, target, max_distance)
+
+
+def test_levenshtein_cutoffs_and_long_strings():
+    assert levenshtein_distance('paypal', 'paypal') == 0
+    assert levenshtein_distance('paypal', None) is None
+    assert levenshtein_distance('abc', 'abcdef', max_distance=2) is None
+    long_source, long_target = 'x' * 70 + 'abc', 'x' * 70 + 'abd'
+    assert levenshtein_distance(long_source, long_target) == 1
+    assert levenshtein_distance('kitten', 'sitting', max_distance=None) == 3
@@ -0,0 +1,79 @@
+"""linear_bundle: the exported scorer against the sklearn (joblib) pipeline it replaces."""
+import numpy as np
+import pandas as pd
+import pytest
+from scipy.sparse import hstack, csr_matrix
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.linear_model import LogisticRegression
+from sklearn.preprocessing import StandardScaler
+
+import linear_bundle
+
+TEXTS = [
+    "urgent verify your account url now", "your parcel is held pay the fee url",
+    "are we still on for lunch tomorrow", "you won a prize claim url today",
+    "meeting notes attached see you monday", "account suspended confirm your details url",
+    "happy birthday hope you have a great day", "final notice unpaid invoice url",
+    "can you pick up milk on the way", "", "a",
+]
+LABELS = [1, 1, 0, 1, 0, 1, 0, 1, 0, 0, 0]
+
+
+@pytest.fixture(scope='module')
+def pipeline():
+    rng = np.random.default_rng(18)
+    features = pd.DataFrame({
+        'url_count': rng.integers(0, 4, len(TEXTS)).astype(float),
+        'length': [float(len(t)) for t in TEXTS],
+        'entropy': rng.normal(3.0, 0.7, len(TEXTS)),
+    })
+    vectorizer = TfidfVectorizer(ngram_range=(1, 2))
+    scaler = StandardScaler().fit(features)
+    X = hstack([vectorizer.fit_transform(TEXTS), csr_matrix(scaler.transform(features))])
+    model = LogisticRegression(C=10.0).fit(X, LABELS)
+    return vectorizer, scaler, model, features
+
+
+def test_bundle_matches_sklearn_within_tolerance(pipeline, tmp_path):
+    vectorizer, scaler, model, features = pipeline
+    path = linear_bundle.export_bundle(vectorizer, scaler, model, tmp_path / linear_bundle.BUNDLE_DIR)
+    scorer = linear_bundle.LinearScorer.load(path)
+    assert scorer.feature_names == list(features.columns)
+
+    texts = TEXTS + ["verify your prize unseen words", "lunch lunch lunch url"]
+    rows = pd.concat([features, features.iloc[:2]], ignore_index=True)
+    expected = model.predict_proba(hstack([vectorizer.transform(texts), csr_matrix(scaler.transform(rows))]))[:, 1]
+    actual = scorer.predict_proba(texts, rows.to_numpy())
+    # The scaler is folded into the weights, so this is equal within rounding, not bit for bit
+    np.testing.assert_allclose(actual, expected, rtol=0, atol=linear_bundle.CHECK_TOLERANCE)
+
+
+def test_bundle_text_weights_match_vectorizer(pipeline, tmp_path):
+    vectorizer, scaler, model, _ = pipeline
+    scorer = linear_bundle.LinearScorer.load(linear_bundle.export_bundle(vectorizer, scaler, model, tmp_path))
+    for text in TEXTS:
+        row = vectorizer.transform([text])
+        indices, values = scorer.text_weights(text)
+        assert indices == sorted(row.indices.tolist())
+        np.testing.assert_array_equal(values, row.toarray()[0, indices])
+
+
+def test_fold_scaler_is_affine_identity():
+    rng = np.random.default_rng(0)
+    coef, mean, scale = rng.normal(size=5), rng.normal(size=5), rng.uniform(0.5, 2.0, 5)
+    x = rng.normal(size=5)
+    folded, intercept = linear_bundle.fold_scaler(coef, 0.3, mean, scale)
+    assert folded @ x + intercept == pytest.approx(coef @ ((x - mean) / scale) + 0.3, abs=1e-12)
+
+
+def test_scaler_moments_identity_without_scaler():
+    mean, scale = linear_bundle.scaler_moments(None, 3)
+    assert mean.tolist() == [0.0, 0.0, 0.0]
+    assert scale.tolist() == [1.0, 1.0, 1.0]
+
+
+def test_export_rejects_unsupported_settings(pipeline, tmp_path):
+    _, scaler, model, _ = pipeline
+    vectorizer = TfidfVectorizer(sublinear_tf=True).fit(TEXTS)
+    with pytest.raises(ValueError, match='sublinear_tf'):
+        linear_bundle.export_bundle(vectorizer, scaler, model, tmp_path)
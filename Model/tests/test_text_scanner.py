@@ -0,0 +1,99 @@
+"""Pins text_scanner and domain_reputation URL handling to the regex chains they replaced."""
+import random
+import re
+
+import pytest
+
+import domain_reputation
+import text_scanner
+
+
+def reference_preprocess(text):
+    """preprocess() as Deploy/app.py and the training scripts had it, one re.sub per pass."""
+    t = str(text).lower()
+    t = re.sub(r'https?://[^\s]+', ' URL ', t)
+    t = re.sub(r'www\.[^\s]+', ' URL ', t)
+    t = re.sub(r'[a-zA-Z0-9-]+\.[a-zA-Z]{2,}(?:/[^\s]*)?', ' URL ', t)
+    t = re.sub(r'\S+@\S+', ' EMAIL ', t)
+    t = re.sub(r'\d{10,}', ' PHONE ', t)
+    t = re.sub(r'[^a-z0-9\s]', ' ', t)
+    return re.sub(r'\s+', ' ', t).strip()
+
+
+def reference_urls(text):
+    return re.findall(r'https?://[^\s]+|www\.[^\s]+|[a-zA-Z0-9-]+\.[a-zA-Z]{2,}(?:/[^\s]*)?', str(text))
+
+
+SAMPLES = [
+    "URGENT! Your PayPal account is locked. Verify at http://paypal-secure.xyz/login now",
+    "Call 18005551234 or mail support@bank-alert.com today",
+    "visit www.Amazon.com/deals or amaz0n-verify.top?x=1 (limited offer!)",
+    "HTTPS://Upper.Case.COM/Path and hxxp://not.a.url",
+    "Ünïcödé täxt with ссылка.рф and 中文.com mixed in",
+    "a@b c@ @d e@f.gh 1234567890123 12345 x1234567890y",
+    "trailing.dots... and ...leading.dots and e.g. i.e.",
+    "",
+]
+
+ALPHABET = "abcXYZ019@.:/-_ \t\n#~'\"ü%?=&"
+
+
+@pytest.mark.parametrize("text", SAMPLES)
+def test_scan_matches_regex_chain(text):
+    result = text_scanner.scan_message(text)
+    assert result.normalized == reference_preprocess(text)
+    assert result.urls == reference_urls(text)
+    assert text_scanner.preprocess(text) == reference_preprocess(text)
+    assert text_scanner.extract_all_urls(text) == reference_urls(text)
+
+
+def test_scan_matches_regex_chain_fuzzed():
+    rng = random.Random(6)
+    for _ in range(3000):
+        text = "".join(rng.choice(ALPHABET) for _ in range(rng.randint(0, 40)))
+        assert text_scanner.preprocess(text) == reference_preprocess(text), text
+        assert text_scanner.extract_all_urls(text) == reference_urls(text), text
+
+
+def test_scan_missing_text():
+    assert text_scanner.scan_message(None) == ([], [], [], '')
+    assert text_scanner.scan_message(float('nan')).normalized == ''
+    assert text_scanner.extract_all_urls(None) == []
+
+
+def test_url_host():
+    assert text_scanner.url_host('https://paypal.com:8443/login') == 'paypal.com:8443'
+    assert text_scanner.url_host('www.paypa1.com/x') == 'www.paypa1.com'
+    assert text_scanner.url_host('httpbin.org/get') == 'httpbin.org'
+    assert text_scanner.url_host('www.x.y.z.q.w.e.r.comfreehttps://a') == 'www.x.y.z.q.w.e.r.comfreehttps:'
+
+
+def test_calculate_domain_entropy():
+    assert text_scanner.calculate_domain_entropy('ab') == 0.0
+    assert text_scanner.calculate_domain_entropy('aaaa') == 0.0
+    assert text_scanner.calculate_domain_entropy('abcd') == 2.0
+
+
+def test_is_ip_address():
+    assert text_scanner.is_ip_address('192.168.0.1')
+    assert not text_scanner.is_ip_address('192.168.0')
+    assert not text_scanner.is_ip_address('paypal.com')
+    assert not text_scanner.is_ip_address('')
+
+
+def test_has_suspicious_pattern():
+    assert text_scanner.has_suspicious_pattern('pay-pal-login.com')
+    assert text_scanner.has_suspicious_pattern('amaz0n.com')
+    assert text_scanner.has_suspicious_pattern('paypalsecure')
+    assert not text_scanner.has_suspicious_pattern('paypal.com')
+    assert text_scanner.has_suspicious_pattern('verify-paypal.com', suffixes=('verify',), anywhere=True)
+
+
+def test_domain_reputation_urls_keep_explicit_order():
+    # http(s) links first, then www. links rewritten to http://, as before the shared scanner
+    text = "go www.a.com then http://b.com/x#frag ~y https://c.org/'q' www.d.net/ü"
+    assert domain_reputation.extract_all_urls(text) == [
+        'http://b.com/x', "https://c.org/'q'", 'http://www.a.com', 'http://www.d.net/',
+    ]
+    assert domain_reputation.extract_all_urls(None) == []
+    assert domain_reputation.extract_all_urls('bare.com only') == []
@@ -0,0 +1,175 @@
+"""
+Shared Message Scanner
+Precompiled URL/token patterns used by serving (Deploy/app.py) and the training scripts,
+so every entry point tokenizes a message exactly the same way.
+"""
+import math
+import re
+from collections import namedtuple
+from urllib.parse import urlparse
+
+# Same alternation the generalized model was trained with: explicit scheme, www. prefix, bare domain
+URL_PATTERN = re.compile(r'https?://[^\s]+|www\.[^\s]+|[a-zA-Z0-9-]+\.[a-zA-Z]{2,}(?:/[^\s]*)?')
+
+_SCHEME_URL = re.compile(r'https?://\S')
+_WWW_URL = re.compile(r'www\.\S')
+_BARE_DOMAIN = re.compile(r'[a-z0-9-]+\.[a-z]{2,}(?:/\S*)?')
+_DIGIT_RUN = re.compile(r'\d{10,}')
+_WORD = re.compile(r'[a-z0-9]+')
+_IPV4 = re.compile(r'^\d{1,3}\.\d{1,3}\.\d{1,3}\.\d{1,3}$')
+_NUMBER_MIX = re.compile(r'[a-z]\d[a-z]|\d[a-z]\d')
+
+# Domain endings the generalized model treats as phishing-style (paypal-secure, amazonverify, ...)
+SUSPICIOUS_SUFFIXES = ('secure', 'verify', 'login', 'account', 'update',
+                       'confirm', 'alert', 'support', 'service', 'online')
+
+# Registered domains of link shorteners and TLDs the generalized model flags (training and serving)
+URL_SHORTENERS = {
+    'bit.ly', 'tinyurl.com', 'goo.gl', 'ow.ly', 't.co', 'is.gd', 'buff.ly',
+    'adf.ly', 'bit.do', 'mcaf.ee', 'su.pr', 'tiny.cc', 'tr.im', 'cli.gs',
+    'x.co', 'shorturl.at', 'cutt.ly', 'rb.gy', 'short.io', 'tiny.one',
+    'qrco.de', 'q-r.to', 'clk.sh', 's.id', 'rebrand.ly', 'bl.ink'
+}
+
+SUSPICIOUS_TLDS = {
+    'xyz', 'top', 'club', 'work', 'click', 'link', 'online', 'site',
+    'website', 'space', 'tech', 'store', 'business', 'tk', 'ml', 'ga',
+    'cf', 'gq', 'pw', 'cc', 'info', 'ws', 'su', 'icu', 'bid', 'loan'
+}
+
+ScanResult = namedtuple('ScanResult', ['urls', 'emails', 'digit_runs', 'normalized'])
+
+
+def _is_missing(text):
+    return text is None or (isinstance(text, float) and math.isnan(text))
+
+
+def _normalize_token(lowered, words, digit_runs):
+    """Normalize one lowercased whitespace token the way the old chain of re.sub passes did.
+
+    Equivalent to, in order: scheme URLs and www. URLs and bare domains -> URL, \\S+@\\S+ -> EMAIL,
+    \\d{10,} -> PHONE, then every non [a-z0-9] character -> space. The placeholder tokens are
+    uppercase, so the final pass erases them too; only the surviving words are kept.
+    """
+    # Scheme and www. URLs run to the end of the token
+    match = _SCHEME_URL.search(lowered)
+    if match:
+        lowered = lowered[:match.start()]
+    match = _WWW_URL.search(lowered)
+    if match:
+        lowered = lowered[:match.start()]
+    if not lowered:
+        return
+
+    pieces = []
+    start = 0
+    for match in _BARE_DOMAIN.finditer(lowered):
+        pieces.append(lowered[start:match.start()])
+        start = match.end()
+    pieces.append(lowered[start:])
+
+    for piece in pieces:
+        if not piece or '@' in piece[1:-1]:
+            continue
+        if len(piece) >= 10 and not piece.isalpha():
+            runs = _DIGIT_RUN.findall(piece)
+            if runs:
+                digit_runs.extend(runs)
+                piece = _DIGIT_RUN.sub(' ', piece)
+        words.extend(_WORD.findall(piece))
+
+
+def scan_message(text):
+    """Tokenize a message once and return its URLs, emails, long digit runs and normalized text.
+
+    urls matches extract_all_urls() and normalized matches preprocess(); digit_runs are the
+    10+ digit sequences preprocess() treats as phone numbers.
+    """
+    if _is_missing(text) or not text:
+        return ScanResult([], [], [], '')
+
+    urls, emails, digit_runs, words = [], [], [], []
+    for token in str(text).split():
+        lowered = token.lower()
+        if lowered.isascii() and lowered.isalnum():
+            # Plain word: no URL, email or punctuation, only a possible phone number
+            if len(lowered) >= 10 and not lowered.isalpha():
+                _normalize_token(lowered, words, digit_runs)
+            else:
+                words.append(lowered)
+            continue
+        if '.' in token or ':' in token:
+            urls.extend(URL_PATTERN.findall(token))
+        if '@' in token[1:-1]:
+            emails.append(token)
+        _normalize_token(lowered, words, digit_runs)
+
+    return ScanResult(urls, emails, digit_runs, ' '.join(words))
+
+
+def extract_all_urls(text):
+    """Extract all URLs (scheme, www. and bare domains) from text."""
+    if _is_missing(text) or not text:
+        return []
+    return URL_PATTERN.findall(str(text))
+
+
+def preprocess(text):
+    """Lowercase text and strip URLs, emails, phone numbers and punctuation (no domain memorization)."""
+    return scan_message(text).normalized
+
+
+def url_host(url):
+    """Host of an extracted URL (port included), read the way serving reads it.
+
+    Scheme-less URLs get http:// so urlparse sees the host; a URL that still parses without one
+    falls back to its first path segment. Raises ValueError for URLs urlparse rejects.
+    """
+    if not url.startswith(('http://', 'https://')):
+        url = 'http://' + url
+    parsed = urlparse(url)
+    return parsed.netloc or parsed.path.split('/')[0]
+
+
+def calculate_domain_entropy(domain):
+    """Shannon entropy of a domain name in bits per character (0.0 below 3 characters)."""
+    if not domain or len(domain) < 3:
+        return 0.0
+    freq = {}
+    for char in domain:
+        freq[char] = freq.get(char, 0) + 1
+    entropy = 0.0
+    for count in freq.values():
+        p = count / len(domain)
+        entropy -= p * math.log2(p)
+    return entropy
+
+
+def is_ip_address(domain):
+    """Check if domain is a dotted IPv4 address."""
+    if not domain:
+        return False
+    return bool(_IPV4.match(domain))
+
+
+def has_suspicious_pattern(domain, suffixes=SUSPICIOUS_SUFFIXES, anywhere=False):
+    """Detect suspicious patterns in a domain name.
+
+    Flags 2+ hyphens, letter/digit mixing (paypa1, amaz0n), a phishing suffix and names longer
+    than 20 characters. Suffixes must end the domain unless anywhere=True.
+    """
+    if not domain:
+        return False
+    domain_lower = domain.lower()
+    if domain_lower.count('-') >= 2:
+        return True
+    if _NUMBER_MIX.search(domain_lower):
+        return True
+    if anywhere:
+        if any(suffix in domain_lower for suffix in suffixes):
+            return True
+    elif domain_lower.endswith(tuple(suffixes)):
+        return True
+    if len(domain_lower.split('.')[0]) > 20:
+        return True
+    return False
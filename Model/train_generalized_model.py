@@ -5,7 +5,6 @@ Focus: Pattern-based learning instead of memorizing specific domains
 
 import pandas as pd
 import numpy as np
-import re
 from sklearn.model_selection import train_test_split
 from sklearn.feature_extraction.text import TfidfVectorizer
 from sklearn.linear_model import LogisticRegression
@@ -13,8 +12,10 @@ from sklearn.preprocessing import StandardScaler
 from sklearn.metrics import classification_report, confusion_matrix, roc_auc_score
 import joblib
 import json
-from urllib.parse import urlparse
-import tldextract
+import public_suffix
+from text_scanner import URL_SHORTENERS, SUSPICIOUS_TLDS, extract_all_urls, url_host, calculate_domain_entropy, is_ip_address, has_suspicious_pattern, preprocess as preprocess_text
+from keyword_automaton import GENERALIZED_KEYWORDS
+from batch_features import generalized_features
 
 print("="*80)
 print("🚀 Training Generalized Scam Detection Model")
@@ -36,19 +37,6 @@ print(f"  Scam: {scam_count}")
 print(f"  Ham: {ham_count}")
 
 # --- Domain Feature Extraction (Pattern-based, NOT domain memorization) ---
-URL_SHORTENERS = {
-    'bit.ly', 'tinyurl.com', 'goo.gl', 'ow.ly', 't.co', 'is.gd', 'buff.ly',
-    'adf.ly', 'bit.do', 'mcaf.ee', 'su.pr', 'tiny.cc', 'tr.im', 'cli.gs',
-    'x.co', 'shorturl.at', 'cutt.ly', 'rb.gy', 'short.io', 'tiny.one',
-    'qrco.de', 'q-r.to', 'clk.sh', 's.id', 'rebrand.ly', 'bl.ink'
-}
-
-SUSPICIOUS_TLDS = {
-    'xyz', 'top', 'club', 'work', 'click', 'link', 'online', 'site',
-    'website', 'space', 'tech', 'store', 'business', 'tk', 'ml', 'ga',
-    'cf', 'gq', 'pw', 'cc', 'info', 'ws', 'su', 'icu', 'bid', 'loan'
-}
-
 # Common words found in legitimate domains (NOT brand-specific)
 LEGITIMATE_KEYWORDS = {
     'bank', 'official', 'service', 'support', 'account', 'customer',
@@ -169,58 +157,6 @@ def has_character_substitution(domain, brand):
     
     return False
 
-def extract_all_urls(text):
-    if not text or pd.isna(text):
-        return []
-    url_pattern = r'https?://[^\s]+|www\.[^\s]+|[a-zA-Z0-9-]+\.[a-zA-Z]{2,}(?:/[^\s]*)?'
-    return re.findall(url_pattern, str(text))
-
-def is_ip_address(domain):
-    if not domain:
-        return False
-    return bool(re.match(r'^\d{1,3}\.\d{1,3}\.\d{1,3}\.\d{1,3}$', domain))
-
-def calculate_domain_entropy(domain):
-    """Higher entropy = more random = more suspicious"""
-    if not domain or len(domain) < 3:
-        return 0.0
-    import math
-    freq = {}
-    for char in domain:
-        freq[char] = freq.get(char, 0) + 1
-    entropy = 0.0
-    for count in freq.values():
-        p = count / len(domain)
-        entropy -= p * math.log2(p)
-    return entropy
-
-def has_suspicious_pattern(domain):
-    """Detect suspicious patterns in domain names"""
-    if not domain:
-        return False
-    domain_lower = domain.lower()
-    
-    # Pattern 1: Multiple hyphens (e.g., paypal-secure-verify.com)
-    if domain_lower.count('-') >= 2:
-        return True
-    
-    # Pattern 2: Numbers mixed with letters suspiciously (e.g., paypa1.com, amaz0n.com)
-    if re.search(r'[a-z]\d[a-z]|\d[a-z]\d', domain_lower):
-        return True
-    
-    # Pattern 3: Common brand-like patterns (ending in common suffixes)
-    suspicious_suffixes = ['secure', 'verify', 'login', 'account', 'update', 
-                          'confirm', 'alert', 'support', 'service', 'online']
-    for suffix in suspicious_suffixes:
-        if domain_lower.endswith(suffix):
-            return True
-    
-    # Pattern 4: Long domain names (> 20 chars excluding TLD)
-    if len(domain_lower.split('.')[0]) > 20:
-        return True
-    
-    return False
-
 def extract_generalized_features(text):
     """Extract features that work on UNSEEN domains"""
     features = {
@@ -265,8 +201,7 @@ def extract_generalized_features(text):
         entropy_values = []
         for url in urls:
             try:
-                parsed = urlparse(url if url.startswith('http') else f'http://{url}')
-                netloc = parsed.netloc or parsed.path.split('/')[0]
+                netloc = url_host(url)
                 
                 # IP address detection
                 if is_ip_address(netloc.split(':')[0]):
@@ -283,7 +218,7 @@ def extract_generalized_features(text):
                     features['has_https'] = 1
                 
                 # Extract domain
-                extracted = tldextract.extract(url)
+                extracted = public_suffix.extract(netloc)
                 domain = extracted.domain
                 tld = extracted.suffix
                 
@@ -320,54 +255,20 @@ def extract_generalized_features(text):
         features['special_char_ratio'] = special_count / len(text_str)
     
     # Keyword detection (pattern-based, NOT brand-specific)
-    urgency_keywords = ['urgent', 'immediately', 'now', 'act now', 'limited time', 
-                       'expire', 'suspended', 'locked', 'frozen']
-    features['has_urgency'] = 1 if any(kw in text_lower for kw in urgency_keywords) else 0
-    
-    financial_keywords = ['bank', 'account', 'card', 'payment', 'money', 'transfer',
-                         'refund', 'prize', 'win', 'won', 'claim', 'reward']
-    features['has_financial_keywords'] = 1 if any(kw in text_lower for kw in financial_keywords) else 0
-    
-    verification_keywords = ['verify', 'verification', 'confirm', 'validate', 'authenticate',
-                            'code', 'otp', 'pin']
-    features['has_verification_keywords'] = 1 if any(kw in text_lower for kw in verification_keywords) else 0
-    
-    prize_keywords = ['congratulations', 'winner', 'selected', 'prize', 'gift', 'free']
-    features['has_prize_keywords'] = 1 if any(kw in text_lower for kw in prize_keywords) else 0
+    kw = GENERALIZED_KEYWORDS.hits(text_lower)
+    features['has_urgency'] = kw['urgency']
+    features['has_financial_keywords'] = kw['financial']
+    features['has_verification_keywords'] = kw['verification']
+    features['has_prize_keywords'] = kw['prize']
     
     return features
 
-# --- Text Preprocessing (Remove specific domains to prevent memorization) ---
-def preprocess_text(text):
-    """Preprocess text while removing specific domain names"""
-    if not text or pd.isna(text):
-        return ""
-    
-    text = str(text).lower()
-    
-    # Replace URLs with generic tokens
-    text = re.sub(r'https?://[^\s]+', ' URL ', text)
-    text = re.sub(r'www\.[^\s]+', ' URL ', text)
-    text = re.sub(r'[a-zA-Z0-9-]+\.[a-zA-Z]{2,}(?:/[^\s]*)?', ' URL ', text)
-    
-    # Replace emails with generic token
-    text = re.sub(r'\S+@\S+', ' EMAIL ', text)
-    
-    # Replace phone numbers
-    text = re.sub(r'\d{10,}', ' PHONE ', text)
-    
-    # Remove special characters but keep spaces
-    text = re.sub(r'[^a-z0-9\s]', ' ', text)
-    
-    # Remove extra spaces
-    text = re.sub(r'\s+', ' ', text).strip()
-    
-    return text
-
 print("\n🔧 Extracting features...")
-# Extract generalized features
-feature_dicts = [extract_generalized_features(text) for text in df['text']]
-feature_df = pd.DataFrame(feature_dicts)
+# Extract generalized features (column-wise; same values as extract_generalized_features per row),
+# reused from the feature store when the dataset and feature code are unchanged
+feature_df, cache_hit = generalized_features(df['text'], URL_SHORTENERS, SUSPICIOUS_TLDS)
+if cache_hit:
+    print("✓ Reused cached features (dataset and feature version unchanged)")
 
 print(f"✓ Extracted {len(feature_df.columns)} generalized features")
 print("\nFeature columns:")
@@ -13,6 +13,7 @@ from sklearn.metrics import classification_report, confusion_matrix, accuracy_sc
 import xgboost as xgb
 import joblib
 import os
+from extract_features import explicit_features
 
 print("="*80)
 print("🎯 PHASE 3: SPECIALIST MODEL TRAINING")
@@ -24,8 +25,16 @@ os.makedirs('artifacts/phase3', exist_ok=True)
 # ==================== LOAD DATA ====================
 
 print("\n📂 Loading feature datasets...")
-train_df = pd.read_csv('Datasets/train_features.csv')
-test_df = pd.read_csv('Datasets/test_features.csv')
+# Features come from the feature store (typed Parquet written by extract_features.py) keyed on
+# each message; only messages added or changed since, or a new feature version, are extracted here
+train_split = pd.read_csv('Datasets/train_domain_stratified.csv')
+test_split = pd.read_csv('Datasets/test_domain_stratified.csv')
+train_df, train_new = explicit_features(train_split['text'])
+test_df, test_new = explicit_features(test_split['text'])
+train_df['label'] = train_split['label'].values
+test_df['label'] = test_split['label'].values
+print(f"✓ Feature store: {train_new + test_new:,} messages extracted, "
+      f"{len(train_df) + len(test_df) - train_new - test_new:,} reused")
 
 print(f"✓ Train: {len(train_df):,} samples")
 print(f"✓ Test: {len(test_df):,} samples")
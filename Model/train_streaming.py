@@ -0,0 +1,182 @@
+#!/usr/bin/env python
+"""Out-of-core training of the generalized scam detector.
+
+Usage:
+python train_streaming.py --data Datasets/unified_ml_dataset_train.csv --out artifacts
+
+Streams the CSV in chunks instead of loading it, so the corpus size is bounded by disk rather
+than RAM. Text goes through a stateless HashingVectorizer (no vocabulary) with IDF weights
+counted in a first pass; the 18 generalized engineered features are scaled with running
+statistics (StandardScaler.partial_fit); an SGD logistic regression is fitted with partial_fit.
+A stable hash of each message holds a fraction out for evaluation.
+
+The artifacts keep the names and interfaces Deploy/app.py and evaluate.py load
+(scam_detector_generalized / tfidf_vectorizer_generalized / feature_scaler_generalized):
+the vectorizer is a HashingVectorizer + TfidfTransformer pipeline with .transform, the model
+has .predict_proba.
+"""
+import argparse
+import json
+import zlib
+from datetime import datetime
+from pathlib import Path
+
+import joblib
+import numpy as np
+import pandas as pd
+from scipy.sparse import hstack, csr_matrix
+from sklearn.feature_extraction.text import HashingVectorizer, TfidfTransformer
+from sklearn.linear_model import SGDClassifier
+from sklearn.metrics import classification_report, confusion_matrix, roc_auc_score
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import StandardScaler
+
+from text_scanner import URL_SHORTENERS, SUSPICIOUS_TLDS, preprocess as preprocess_text
+from batch_features import generalized_feature_frame
+
+RANDOM_SEED = 42
+
+LABEL_MAP = {'spam': 1, 'ham': 0, 'scam': 1, 'legitimate': 0, 1: 1, 0: 0}
+
+
+def parse_args():
+    ap = argparse.ArgumentParser(description='Train the generalized model out of core (chunked CSV, partial_fit)')
+    ap.add_argument('--data', default='Datasets/unified_ml_dataset_train.csv', help='Training CSV file path')
+    ap.add_argument('--out', default='artifacts', help='Output directory for artifacts')
+    ap.add_argument('--text-col', default='text', help='Name of text column')
+    ap.add_argument('--label-col', default='label', help='Name of label column')
+    ap.add_argument('--chunksize', type=int, default=100_000, help='Rows read per chunk')
+    ap.add_argument('--epochs', type=int, default=2, help='Passes of partial_fit over the training rows')
+    ap.add_argument('--n-features', type=int, default=2 ** 20, help='Hashed text dimensions')
+    ap.add_argument('--min-df', type=int, default=5, help='Ignore hashed terms in fewer documents')
+    ap.add_argument('--max-df', type=float, default=0.8, help='Ignore hashed terms in more than this document fraction')
+    ap.add_argument('--C', type=float, default=0.5, help='Inverse regularization, as for the batch LogisticRegression')
+    ap.add_argument('--holdout', type=float, default=0.02, help='Fraction of messages held out for evaluation')
+    return ap.parse_args()
+
+
+def read_chunks(args):
+    """Yield (texts, labels) per CSV chunk; labels mapped like train_generalized_model.py."""
+    reader = pd.read_csv(args.data, usecols=[args.text_col, args.label_col], chunksize=args.chunksize,
+                         dtype={args.text_col: object}, low_memory=False)
+    for chunk in reader:
+        labels = chunk[args.label_col].map(LABEL_MAP).fillna(0).astype(int).to_numpy()
+        yield chunk[args.text_col].reset_index(drop=True), labels
+
+
+def holdout_mask(texts, fraction):
+    """Stable per-message split: identical messages always land on the same side."""
+    buckets = np.array([zlib.crc32(str(t).encode('utf-8', 'surrogatepass')) % 10_000 for t in texts])
+    return buckets < fraction * 10_000
+
+
+def make_hasher(n_features):
+    # Same tokenization and n-grams as the batch TfidfVectorizer; raw counts, TfidfTransformer normalizes
+    return HashingVectorizer(n_features=n_features, ngram_range=(1, 2), alternate_sign=False, norm=None)
+
+
+def main():
+    args = parse_args()
+    rng = np.random.default_rng(RANDOM_SEED)
+
+    print("=" * 80)
+    print("🚀 Streaming Training: Generalized Scam Detection Model")
+    print("=" * 80)
+
+    hasher = make_hasher(args.n_features)
+    scaler = StandardScaler()
+    doc_freq = np.zeros(args.n_features, dtype=np.int64)
+    class_counts = np.zeros(2, dtype=np.int64)
+    feature_columns = None
+
+    # Pass 1: document frequencies, running scaler statistics and class counts (training rows only)
+    print(f"\n📂 Pass 1: statistics from {args.data} ({args.chunksize:,} rows per chunk)...")
+    n_holdout = 0
+    for texts, labels in read_chunks(args):
+        train = ~holdout_mask(texts, args.holdout)
+        n_holdout += int((~train).sum())
+        texts, labels = texts[train].reset_index(drop=True), labels[train]
+        if not len(texts):
+            continue
+        counts = hasher.transform(texts.map(preprocess_text))
+        doc_freq += np.bincount(counts.indices, minlength=args.n_features)
+        features = generalized_feature_frame(texts, URL_SHORTENERS, SUSPICIOUS_TLDS)
+        feature_columns = list(features.columns)
+        scaler.partial_fit(features)
+        class_counts += np.bincount(labels, minlength=2)
+    n_train = int(class_counts.sum())
+    if n_train == 0 or (class_counts == 0).any():
+        raise SystemExit("❌ Training rows must contain both classes")
+    print(f"✓ Train: {n_train:,} messages (Scam: {class_counts[1]:,} | Ham: {class_counts[0]:,}) | Holdout: {n_holdout:,}")
+
+    # IDF as TfidfTransformer(smooth_idf=True) computes it; buckets outside [min_df, max_df] get weight 0
+    idf = np.log((1 + n_train) / (1 + doc_freq)) + 1.0
+    pruned = (doc_freq < args.min_df) | (doc_freq > args.max_df * n_train)
+    idf[pruned] = 0.0
+    tfidf = TfidfTransformer()
+    tfidf.idf_ = idf
+    vectorizer = Pipeline([('hash', hasher), ('tfidf', tfidf)])
+    print(f"✓ Hashed text buckets in use: {int((~pruned).sum()):,} of {args.n_features:,}")
+
+    # Balanced class weights and the SGD counterpart of LogisticRegression(C=...) on n_train samples
+    class_weight = {c: n_train / (2 * class_counts[c]) for c in (0, 1)}
+    model = SGDClassifier(loss='log_loss', penalty='l2', alpha=1.0 / (args.C * n_train),
+                          class_weight=class_weight, random_state=RANDOM_SEED)
+
+    # Passes 2..: partial_fit on shuffled training chunks; the last pass also scores the holdout
+    holdout_y, holdout_proba = [], []
+    for epoch in range(1, args.epochs + 1):
+        print(f"\n🤖 Epoch {epoch}/{args.epochs}...")
+        last = epoch == args.epochs
+        for texts, labels in read_chunks(args):
+            X = hstack([vectorizer.transform(texts.map(preprocess_text)),
+                        csr_matrix(scaler.transform(generalized_feature_frame(texts, URL_SHORTENERS, SUSPICIOUS_TLDS)))]).tocsr()
+            held = holdout_mask(texts, args.holdout)
+            train_rows = rng.permutation(np.flatnonzero(~held))
+            if len(train_rows):
+                model.partial_fit(X[train_rows], labels[train_rows], classes=np.array([0, 1]))
+            if last and held.any() and hasattr(model, 'coef_'):
+                holdout_y.append(labels[held])
+                holdout_proba.append(model.predict_proba(X[held])[:, 1])
+    print("✓ Model trained!")
+
+    roc_auc = None
+    if holdout_y:
+        # Scores come from the model as it stood at each chunk of the last pass
+        y_true = np.concatenate(holdout_y)
+        y_proba = np.concatenate(holdout_proba)
+        y_pred = (y_proba > 0.5).astype(int)
+        print("\n📊 Holdout evaluation:")
+        print(classification_report(y_true, y_pred, target_names=['Ham', 'Scam'], zero_division=0))
+        print(confusion_matrix(y_true, y_pred, labels=[0, 1]))
+        if len(np.unique(y_true)) == 2:
+            roc_auc = float(roc_auc_score(y_true, y_proba))
+            print(f"\n✓ ROC-AUC Score: {roc_auc:.4f}")
+
+    out_dir = Path(args.out)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    print(f"\n💾 Saving artifacts to {out_dir}...")
+    joblib.dump(model, out_dir / 'scam_detector_generalized.joblib')
+    joblib.dump(vectorizer, out_dir / 'tfidf_vectorizer_generalized.joblib')
+    joblib.dump(scaler, out_dir / 'feature_scaler_generalized.joblib')
+
+    config = {
+        'feature_columns': feature_columns,
+        'text_vectorizer': 'hashing',
+        'hash_n_features': args.n_features,
+        'hash_buckets_in_use': int((~pruned).sum()),
+        'total_features': args.n_features + len(feature_columns),
+        'model_type': 'SGD Logistic Regression (Generalized, streaming)',
+        'training_samples': n_train,
+        'holdout_samples': n_holdout,
+        'epochs': args.epochs,
+        'roc_auc': roc_auc,
+        'timestamp': datetime.now().isoformat(),
+    }
+    with open(out_dir / 'feature_config_generalized.json', 'w') as f:
+        json.dump(config, f, indent=2)
+    print("✓ Model saved!")
+
+
+if __name__ == '__main__':
+    main()